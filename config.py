@@ -7,10 +7,96 @@ class Config:
     # ============================================
     BOT_TOKEN = os.getenv('BOT_TOKEN', '7695101627:AAGmJn1G5GIoqL2ILiGgAtzePOZEsHQjVJ8')
     ADMIN_IDS = [866916345]
+    ADMIN_CACHE_TTL = float(os.getenv('ADMIN_CACHE_TTL', '300'))  # Перечитывать admins раз в N сек
+
+    # Получение апдейтов: polling или webhook (aiohttp-сервер, можно за reverse proxy)
+    BOT_MODE = os.getenv('BOT_MODE', 'polling')
+    DROP_PENDING_UPDATES = os.getenv('DROP_PENDING_UPDATES', '0') == '1'  # Сбрасывать накопившиеся апдейты при старте
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # Публичный адрес, например https://bot.example.com
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # Пусто — генерируется при каждом старте
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))  # 1-100
+    WEBHOOK_REPLY_IN_RESPONSE = os.getenv('WEBHOOK_REPLY_IN_RESPONSE', '0') == '1'  # Ответ методом в теле ответа
+    WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '30'))  # Дожидаться апдейтов при остановке (сек)
+
+    # Лимиты исходящих сообщений (общий планировщик отправок)
+    SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '25'))  # Сообщений в секунду на весь бот
+    SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', '1'))  # Сообщений в секунду в один чат
+    SEND_CHAT_BURST = float(os.getenv('SEND_CHAT_BURST', '3'))  # Подряд без ожидания
+    SEND_GROUP_RATE_PER_MIN = float(os.getenv('SEND_GROUP_RATE_PER_MIN', '20'))  # В группу/канал в минуту
+    SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', '3'))  # Повторов после 429
+
+    # Рассылки: задания в БД, выполняются в фоне и продолжаются после перезапуска
+    BROADCAST_WORKERS = int(os.getenv('BROADCAST_WORKERS', '8'))  # Одновременных отправок
+    BROADCAST_BATCH_SIZE = int(os.getenv('BROADCAST_BATCH_SIZE', '50'))  # Получателей за одну запись в БД
+    BROADCAST_MAX_ATTEMPTS = int(os.getenv('BROADCAST_MAX_ATTEMPTS', '5'))
+    BROADCAST_RETRY_BASE = float(os.getenv('BROADCAST_RETRY_BASE', '30'))  # Первая задержка повтора (сек)
+
+    # Защита от флуда: лимиты на пользователя в скользящем окне (админы не ограничиваются)
+    THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', '1') == '1'
+    THROTTLE_MESSAGE_LIMIT = int(os.getenv('THROTTLE_MESSAGE_LIMIT', '20'))  # Сообщений за окно
+    THROTTLE_CALLBACK_LIMIT = int(os.getenv('THROTTLE_CALLBACK_LIMIT', '30'))  # Нажатий кнопок за окно
+    THROTTLE_WINDOW = float(os.getenv('THROTTLE_WINDOW', '10'))  # Окно (сек)
+    THROTTLE_DUPLICATE_WINDOW = float(os.getenv('THROTTLE_DUPLICATE_WINDOW', '1'))  # Повтор той же кнопки (сек)
+    THROTTLE_MAX_USERS = int(os.getenv('THROTTLE_MAX_USERS', '10000'))
+
+    # Метрики обработчиков и Telegram API: /metrics (Prometheus) и /metrics.json на локальном порту
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')  # Наружу не публикуем
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '9101'))  # 0 — без HTTP, только JSON при остановке
+    METRICS_DUMP = os.getenv('METRICS_DUMP', 'handler_metrics.json')
 
     # ✅ КРИТИЧЕСКОЕ ИЗМЕНЕНИЕ: Единая база данных
     DB_NAME = "education_center.db"  # Было: "students.db"
 
+    # Пул подключений SQLite
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+    DB_PRAGMA_PROFILE = os.getenv('DB_PRAGMA_PROFILE', 'balanced')  # safe / balanced / fast
+    DB_PRAGMAS = {}  # Переопределение отдельных PRAGMA, например {'cache_size': -32000}
+
+    # Async-API БД: потоки для sqlite3 и таймаут одного вызова (сек)
+    DB_ASYNC_WORKERS = int(os.getenv('DB_ASYNC_WORKERS', '4'))
+    DB_ASYNC_TIMEOUT = float(os.getenv('DB_ASYNC_TIMEOUT', '10'))
+
+    # Отчёты и статистика: отдельные подключения только для чтения в своих потоках
+    DB_REPORT_WORKERS = int(os.getenv('DB_REPORT_WORKERS', '1'))
+    DB_REPORT_TIMEOUT = float(os.getenv('DB_REPORT_TIMEOUT', '60'))
+
+    # Профилирование запросов (выключено по умолчанию): статистика по формам SQL,
+    # лог запросов дольше DB_SLOW_QUERY_MS с EXPLAIN QUERY PLAN, JSON-отчёт при остановке
+    DB_PROFILE = os.getenv('DB_PROFILE', '0') == '1'
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '50'))
+    DB_PROFILE_DUMP = os.getenv('DB_PROFILE_DUMP', 'query_profile.json')
+
+    # Хранилище состояний FSM: sqlite (переживает перезапуск) или memory
+    FSM_STORAGE = os.getenv('FSM_STORAGE', 'sqlite')
+    FSM_TTL_HOURS = float(os.getenv('FSM_TTL_HOURS', '168'))  # Брошенные состояния удаляются через N часов
+    FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', '10000'))
+    FSM_FLUSH_DELAY = float(os.getenv('FSM_FLUSH_DELAY', '0.5'))  # Склеивание записей update_data (сек)
+
+    # Резервные копии (sqlite3 backup API, без остановки бота)
+    BACKUP_ENABLED = os.getenv('BACKUP_ENABLED', '1') == '1'
+    BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+    BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+    BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))  # Сколько последних копий хранить
+    BACKUP_COMPRESS = os.getenv('BACKUP_COMPRESS', '1') == '1'  # gzip
+    BACKUP_VERIFY = os.getenv('BACKUP_VERIFY', '1') == '1'  # PRAGMA integrity_check копии
+    BACKUP_PAGES = int(os.getenv('BACKUP_PAGES', '256'))  # Страниц за один шаг копирования
+
+    # Архивация регистраций (0 дней — правило выключено)
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', '1') == '1'
+    ARCHIVE_INTERVAL_HOURS = float(os.getenv('ARCHIVE_INTERVAL_HOURS', '24'))
+    ARCHIVE_COMPLETED_DAYS = int(os.getenv('ARCHIVE_COMPLETED_DAYS', '180'))  # Завершившие курс
+    ARCHIVE_TRIAL_DAYS = int(os.getenv('ARCHIVE_TRIAL_DAYS', '90'))  # Пробный урок без движения
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '200'))  # Регистраций в одной транзакции
+
+    # Часовой пояс, в котором админы вводят время уроков и напоминаний.
+    # В БД время хранится как UTC epoch (колонки *_ts)
+    TIMEZONE = os.getenv('TIMEZONE', 'Asia/Tashkent')
+
     CHANNEL_ID = -1002906910895
 
     # ============================================
@@ -24,13 +24,29 @@ def get_db() -> Database:
     global _db_instance
     if _db_instance is None:
         from config import Config
-        _db_instance = Database(Config.DB_NAME)
+        _db_instance = Database(
+            Config.DB_NAME,
+            pool_size=Config.DB_POOL_SIZE,
+            busy_timeout_ms=Config.DB_BUSY_TIMEOUT_MS,
+            pragma_profile=Config.DB_PRAGMA_PROFILE,
+            pragmas=Config.DB_PRAGMAS,
+            async_workers=Config.DB_ASYNC_WORKERS,
+            async_timeout=Config.DB_ASYNC_TIMEOUT,
+            admin_ids=Config.ADMIN_IDS,
+            admin_cache_ttl=Config.ADMIN_CACHE_TTL,
+            profile=Config.DB_PROFILE,
+            slow_query_ms=Config.DB_SLOW_QUERY_MS,
+            report_workers=Config.DB_REPORT_WORKERS,
+            report_timeout=Config.DB_REPORT_TIMEOUT
+        )
     return _db_instance
 
 
 def reset_db():
     """Сбросить singleton (для тестирования)"""
     global _db_instance
+    if _db_instance is not None:
+        _db_instance.close()
     _db_instance = None
 
 
@@ -0,0 +1,134 @@
+"""
+Admin Cache
+Кэш состава администраторов (таблица admins + статический список из конфига)
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AdminCache:
+    """
+    Множество ID администраторов в памяти
+
+    Загружается из таблицы admins и дополняется статическим списком
+    (Config.ADMIN_IDS). Изменения через обработчики применяются сразу
+    (add/remove), TTL — страховка от правок в обход бота.
+
+    Внутри одного апдейта результат проверки запоминается (remember),
+    поэтому повторные is_admin() в обработчиках ничего не пересчитывают.
+    """
+
+    def __init__(self, db, static_ids: Iterable[int] = (), ttl: float = 300.0):
+        self.db = db
+        self.static_ids = frozenset(static_ids)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids: FrozenSet[int] = self.static_ids
+        self._loaded_at: Optional[float] = None
+        self._current: ContextVar[Optional[Tuple[int, bool]]] = ContextVar('admin_check', default=None)
+        self.hits = 0
+        self.refreshes = 0
+
+    @property
+    def is_fresh(self) -> bool:
+        """Загружен ли список и не истёк ли TTL"""
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+
+    def refresh(self) -> FrozenSet[int]:
+        """
+        Перечитать администраторов из БД
+
+        При ошибке БД остаётся предыдущий список.
+
+        Returns:
+            FrozenSet[int]: Актуальное множество ID
+        """
+        try:
+            rows = self.db.execute_query("SELECT user_id FROM admins WHERE is_active = 1")
+            ids = self.static_ids | {row['user_id'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error loading admins: {e}")
+            with self._lock:
+                self._loaded_at = time.monotonic()
+                return self._ids
+
+        with self._lock:
+            self._ids = frozenset(ids)
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+            return self._ids
+
+    def is_admin(self, user_id: int) -> bool:
+        """
+        Является ли пользователь администратором
+
+        Args:
+            user_id: Telegram ID
+
+        Returns:
+            bool: True если администратор
+        """
+        current = self._current.get()
+        if current is not None and current[0] == user_id:
+            return current[1]
+
+        if not self.is_fresh:
+            self.refresh()
+        else:
+            self.hits += 1
+        return user_id in self._ids
+
+    def remember(self, user_id: int, result: bool):
+        """
+        Запомнить результат проверки для текущего апдейта
+
+        Returns:
+            Token для forget()
+        """
+        return self._current.set((user_id, result))
+
+    def forget(self, token):
+        """Сбросить результат, запомненный remember()"""
+        self._current.reset(token)
+
+    def add(self, user_id: int):
+        """Добавить администратора в кэш (после INSERT в admins)"""
+        with self._lock:
+            self._ids = self._ids | {user_id}
+        self._forget_user(user_id)
+
+    def remove(self, user_id: int):
+        """Убрать администратора из кэша (после удаления из admins)"""
+        with self._lock:
+            if user_id not in self.static_ids:
+                self._ids = self._ids - {user_id}
+        self._forget_user(user_id)
+
+    def _forget_user(self, user_id: int):
+        """Не отдавать устаревший результат из текущего апдейта"""
+        current = self._current.get()
+        if current is not None and current[0] == user_id:
+            self._current.set(None)
+
+    def invalidate(self):
+        """Перечитать список при следующей проверке"""
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер кэша и счётчики"""
+        return {
+            'admins': len(self._ids),
+            'static': len(self.static_ids),
+            'hits': self.hits,
+            'refreshes': self.refreshes,
+            'fresh': self.is_fresh,
+            'ttl': self.ttl,
+        }
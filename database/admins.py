@@ -6,10 +6,13 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+from .pagination import KeysetPage, KeysetPaginator, PageRequest
+
 logger = logging.getLogger(__name__)
 
 
-class AdminRepository:
+class AdminRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с администраторами"""
 
     def __init__(self, db):
@@ -24,6 +27,7 @@ class AdminRepository:
                     VALUES (?, ?, ?)
                     """
             admin_id = self.db.execute_insert(query, (user_id, username, full_name))
+            self.db.admin_cache.add(user_id)
             logger.info(f"Created admin {admin_id} for user {user_id}")
             return admin_id
         except Exception as e:
@@ -35,17 +39,29 @@ class AdminRepository:
         query = "SELECT * FROM admins WHERE is_active = 1 ORDER BY created_at DESC"
         return self.db.execute_query(query)
 
+    def get_page(self, prefix: str, request: Optional[PageRequest] = None,
+                 page_size: int = 10) -> KeysetPage:
+        """Страница всех администраторов (новые первыми)"""
+        paginator = KeysetPaginator(
+            self.db,
+            "SELECT id, user_id, username, full_name, created_at, is_active FROM admins",
+            order_by=("created_at", "id"),
+            keys=("created_at", "id"),
+            prefix=prefix,
+            page_size=page_size
+        )
+        return paginator.fetch(request=request)
+
     def is_admin(self, user_id: int) -> bool:
         """Проверить является ли пользователь администратором"""
-        query = "SELECT id FROM admins WHERE user_id = ? AND is_active = 1"
-        rows = self.db.execute_query(query, (user_id,))
-        return len(rows) > 0
+        return self.db.admin_cache.is_admin(user_id)
 
     def deactivate(self, admin_id: int) -> bool:
         """Деактивировать администратора"""
         try:
             query = "UPDATE admins SET is_active = 0 WHERE id = ?"
             affected = self.db.execute_update(query, (admin_id,))
+            self.db.admin_cache.invalidate()  # admin_id — ID записи, а не пользователя
             return affected > 0
         except Exception as e:
             logger.error(f"Error deactivating admin: {e}")
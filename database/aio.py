@@ -0,0 +1,97 @@
+"""
+Async Facade
+Неблокирующий доступ к БД из обработчиков aiogram
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncExecutor:
+    """
+    Ограниченный пул потоков для синхронных вызовов sqlite3
+
+    Количество одновременно выполняемых и ожидающих задач ограничено,
+    чтобы всплеск запросов не накапливал бесконечную очередь.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: Optional[int] = None,
+                 default_timeout: Optional[float] = 10.0, thread_name_prefix: str = "db"):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 8
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._semaphores = {}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Семафор очереди для текущего event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphores = {loop: semaphore}  # Старые loop'ы (asyncio.run в скриптах) не держим
+        return semaphore
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Выполнить func(*args, **kwargs) в пуле потоков
+
+        Args:
+            func: Синхронная функция
+            timeout: Таймаут в секундах (None — значение по умолчанию)
+
+        Returns:
+            Результат func
+
+        Raises:
+            asyncio.TimeoutError: Вызов не уложился в таймаут. Запрос в потоке
+            при этом не прерывается, но обработчик перестаёт его ждать.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        async with self._semaphore():
+            future = loop.run_in_executor(self._executor, call)
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"DB call {getattr(func, '__qualname__', func)} timed out after {timeout}s")
+                raise
+
+    def shutdown(self):
+        """Остановить пул потоков"""
+        self._executor.shutdown(wait=True)
+
+
+class AsyncRepositoryMixin:
+    """
+    Асинхронные двойники методов репозитория
+
+    Для любого метода get_by_id доступен await repo.aget_by_id(...),
+    который выполняется в пуле потоков БД. Можно передать timeout=...
+    Репозиторий может выполнять свои вызовы в другом пуле, переопределив
+    _run_async().
+    """
+
+    def _run_async(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        return self.db.run_async(func, *args, timeout=timeout, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith('a') and not name.startswith('__'):
+            sync_method = getattr(type(self), name[1:], None)
+            if callable(sync_method):
+                bound = getattr(self, name[1:])
+
+                async def async_method(*args, timeout: Optional[float] = None, **kwargs):
+                    return await self._run_async(bound, *args, timeout=timeout, **kwargs)
+
+                async_method.__name__ = name
+                async_method.__doc__ = sync_method.__doc__
+                return async_method
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
@@ -0,0 +1,360 @@
+"""
+Registration Archive
+Перенос завершённых и заброшенных регистраций из горячих таблиц в архив
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from utils.validators import normalize_phone
+from .aio import AsyncRepositoryMixin
+from .migrations import ARCHIVE_TABLES, sync_archive_columns
+from .timestamps import now_epoch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArchivePolicy:
+    """Правило архивации: регистрации со статусом status без изменений дольше days дней"""
+    reason: str
+    status: str
+    days: int
+
+
+DEFAULT_POLICIES = (
+    ArchivePolicy('completed', 'completed', 180),
+    ArchivePolicy('stale_trial', 'trial', 90),
+)
+
+
+def _casefold(value) -> str:
+    """Регистронезависимое сравнение кириллицы (lower() в SQLite — только ASCII)"""
+    return value.casefold().replace('ё', 'е') if isinstance(value, str) else ''
+
+
+class Archiver(AsyncRepositoryMixin):
+    """
+    Архив регистраций
+
+    Регистрация переносится вместе с заметками и отзывами пачками по
+    batch_size: каждая пачка — отдельная короткая транзакция, между
+    пачками пауза pause, поэтому регистрации пользователей не ждут
+    весь прогон. Без изменений считается регистрация, у которой
+    updated_at (его двигают смена статуса, заметки, назначение урока)
+    и запланированный пробный урок старше порога.
+
+    Статистика (stats_counters) переносом не меняется, журнал смен
+    статуса остаётся на месте. Архив не входит в полнотекстовый
+    индекс: поиск по нему — search(), по запросу админа.
+
+    Example:
+        >>> archiver = Archiver(db, [ArchivePolicy('completed', 'completed', 180)])
+        >>> archiver.run()
+        {'completed': 42}
+    """
+
+    def __init__(self, db, policies: Iterable[ArchivePolicy] = DEFAULT_POLICIES,
+                 batch_size: int = 200, pause: float = 0.05):
+        """
+        Args:
+            db: Database
+            policies: Правила архивации
+            batch_size: Регистраций в одной транзакции
+            pause: Пауза между пачками (сек)
+        """
+        self.db = db
+        self.policies = tuple(policies)
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.last_run: Optional[Dict[str, int]] = None
+        self._columns: Optional[Dict[str, List[str]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _table_columns(self) -> Dict[str, List[str]]:
+        """Колонки горячих таблиц (архив при необходимости догоняет их)"""
+        if self._columns is None:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+                self._columns = {table: sync_archive_columns(cursor, table, archive)
+                                 for table, archive in ARCHIVE_TABLES.items()}
+        return self._columns
+
+    # ============================================
+    # ПЕРЕНОС
+    # ============================================
+
+    def archive_batch(self, policy: ArchivePolicy, after_id: int = 0) -> List[int]:
+        """
+        Перенести одну пачку регистраций по правилу
+
+        Args:
+            policy: Правило
+            after_id: Продолжить с регистраций, у которых id больше
+
+        Returns:
+            List[int]: ID перенесённых регистраций (пусто — больше нечего)
+        """
+        columns = self._table_columns()
+        query = """
+                SELECT id
+                FROM registrations
+                WHERE status_code = ?
+                  AND COALESCE(updated_at, created_at) < datetime('now', ?)
+                  AND (trial_lesson_ts IS NULL OR trial_lesson_ts < ?)
+                  AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """
+        cutoff_ts = now_epoch() - policy.days * 86400
+
+        with self.db.transaction():
+            rows = self.db.execute_query(
+                query, (policy.status, f"-{policy.days} days", cutoff_ts, after_id, self.batch_size)
+            )
+            ids = [row['id'] for row in rows]
+            if not ids:
+                return []
+
+            placeholders = ', '.join('?' for _ in ids)
+            params = tuple(ids)
+            registration_columns = ', '.join(columns['registrations'])
+            self.db.execute_update(f"""
+                INSERT INTO registrations_archive ({registration_columns}, archived_at, archive_reason)
+                SELECT {registration_columns}, CURRENT_TIMESTAMP, ?
+                FROM registrations
+                WHERE id IN ({placeholders})
+            """, (policy.reason,) + params)
+
+            for table in ('registration_notes', 'feedback'):
+                table_columns = ', '.join(columns[table])
+                self.db.execute_update(f"""
+                    INSERT INTO {ARCHIVE_TABLES[table]} ({table_columns})
+                    SELECT {table_columns}
+                    FROM {table}
+                    WHERE registration_id IN ({placeholders})
+                """, params)
+                self.db.execute_update(f"DELETE FROM {table} WHERE registration_id IN ({placeholders})",
+                                       params)
+
+            self.db.execute_update(f"DELETE FROM registrations WHERE id IN ({placeholders})", params)
+        return ids
+
+    def run(self, policies: Optional[Iterable[ArchivePolicy]] = None,
+            max_batches: Optional[int] = None) -> Dict[str, int]:
+        """
+        Прогнать правила до конца (или до max_batches пачек на правило)
+
+        Returns:
+            Dict[str, int]: reason -> перенесено регистраций
+        """
+        moved: Dict[str, int] = {}
+        for policy in (self.policies if policies is None else tuple(policies)):
+            moved[policy.reason] = 0
+            after_id = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                ids = self.archive_batch(policy, after_id)
+                if not ids:
+                    break
+                moved[policy.reason] += len(ids)
+                after_id = ids[-1]
+                batches += 1
+                if self.pause:
+                    time.sleep(self.pause)
+            if moved[policy.reason]:
+                logger.info(f"Archived {moved[policy.reason]} registrations ({policy.reason})")
+        self.last_run = moved
+        return moved
+
+    def restore(self, reg_id: int) -> bool:
+        """
+        Вернуть регистрацию из архива вместе с заметками и отзывами
+
+        updated_at сдвигается на текущее время, чтобы следующий прогон
+        не унёс регистрацию обратно.
+
+        Returns:
+            bool: True если регистрация была в архиве
+        """
+        columns = self._table_columns()
+        try:
+            with self.db.transaction():
+                if not self.db.execute_query("SELECT 1 FROM registrations_archive WHERE id = ?", (reg_id,)):
+                    return False
+                last_event = self.db.execute_query(
+                    "SELECT COALESCE(MAX(id), 0) AS id FROM registration_status_events"
+                )[0]['id']
+
+                registration_columns = ', '.join(columns['registrations'])
+                self.db.execute_update(f"""
+                    INSERT INTO registrations ({registration_columns})
+                    SELECT {registration_columns}
+                    FROM registrations_archive
+                    WHERE id = ?
+                """, (reg_id,))
+                for table in ('registration_notes', 'feedback'):
+                    table_columns = ', '.join(columns[table])
+                    self.db.execute_update(f"""
+                        INSERT INTO {table} ({table_columns})
+                        SELECT {table_columns}
+                        FROM {ARCHIVE_TABLES[table]}
+                        WHERE registration_id = ?
+                    """, (reg_id,))
+                    self.db.execute_update(f"DELETE FROM {ARCHIVE_TABLES[table]} WHERE registration_id = ?",
+                                           (reg_id,))
+                self.db.execute_update("DELETE FROM registrations_archive WHERE id = ?", (reg_id,))
+
+                # Триггер записал возврат как новую регистрацию — для статистики это не она
+                self.db.execute_update(
+                    "DELETE FROM registration_status_events WHERE registration_id = ? AND id > ?",
+                    (reg_id, last_event)
+                )
+                self.db.execute_update(
+                    "UPDATE registrations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (reg_id,)
+                )
+            logger.info(f"Restored registration {reg_id} from archive")
+            return True
+        except Exception as e:
+            logger.error(f"Error restoring registration {reg_id}: {e}")
+            return False
+
+    # ============================================
+    # ПОИСК ПО АРХИВУ
+    # ============================================
+
+    def search(self, text: str, limit: int = 10) -> List[Dict]:
+        """
+        Найти регистрации в архиве по телефону, имени или тексту заметок
+
+        Телефон ищется по индексам phone_e164 / phone_rev, имя и
+        заметки — проходом по архиву (поиск по запросу, не на каждый
+        экран).
+
+        Returns:
+            List[Dict]: id, name, phone, status_code, course_name,
+            created_at, archived_at, archive_reason
+        """
+        select = """
+                 SELECT a.id,
+                        a.full_name as name,
+                        a.phone,
+                        a.status_code,
+                        a.created_at,
+                        a.archived_at,
+                        a.archive_reason,
+                        c.name      as course_name
+                 FROM registrations_archive a
+                          LEFT JOIN courses c ON a.course_id = c.id
+                 """
+        text = text.strip()
+        if not text:
+            return []
+
+        normalized = normalize_phone(text)
+        if normalized:
+            rows = self.db.execute_query(
+                select + " WHERE a.phone_e164 = ? ORDER BY a.id DESC LIMIT ?", (normalized, limit)
+            )
+            if rows:
+                return rows
+
+        if not any(ch.isalpha() for ch in text):
+            digits = ''.join(ch for ch in text if ch.isdigit())
+            if not 7 <= len(digits) <= 9:
+                return []
+            suffix = digits[::-1]
+            return self.db.execute_query(
+                select + " WHERE a.phone_rev >= ? AND a.phone_rev < ? ORDER BY a.id DESC LIMIT ?",
+                (suffix, suffix + ':', limit)
+            )
+
+        needle = _casefold(text)
+        with self.db.get_connection() as conn:
+            conn.create_function('casefold', 1, _casefold, deterministic=True)
+            return self.db.execute_query(select + """
+                 WHERE instr(casefold(a.full_name), ?) > 0
+                    OR a.id IN (SELECT registration_id
+                                FROM registration_notes_archive
+                                WHERE instr(casefold(text), ?) > 0)
+                 ORDER BY a.id DESC
+                 LIMIT ?
+            """, (needle, needle, limit))
+
+    def get_notes(self, reg_id: int, limit: int = 5) -> List[Dict]:
+        """Последние заметки архивной регистрации"""
+        query = """
+                SELECT id, note_type, text, author_id, created_at
+                FROM registration_notes_archive
+                WHERE registration_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+                """
+        return self.db.execute_query(query, (reg_id, limit))
+
+    def get_summary(self) -> Dict[str, int]:
+        """Сколько регистраций в архиве по причинам"""
+        rows = self.db.execute_query("""
+            SELECT COALESCE(archive_reason, '') AS reason, COUNT(*) AS count
+            FROM registrations_archive
+            GROUP BY 1
+        """)
+        return {row['reason']: row['count'] for row in rows}
+
+    # ============================================
+    # РАСПИСАНИЕ
+    # ============================================
+
+    async def _run_periodically(self, interval: float, first_delay: float):
+        await asyncio.sleep(first_delay)
+        while True:
+            try:
+                # Отдельный поток: прогон длиннее таймаута вызовов AsyncExecutor
+                await asyncio.to_thread(self.run)
+            except Exception as e:
+                logger.error(f"Scheduled archiving failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float, first_delay: float = 300.0) -> asyncio.Task:
+        """
+        Запустить архивацию по расписанию
+
+        Args:
+            interval: Период (сек)
+            first_delay: Задержка первого прогона после старта (сек)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_periodically(interval, first_delay))
+            logger.info(f"Scheduled archiving every {interval / 3600:g} h")
+        return self._task
+
+    async def stop(self):
+        """Остановить расписание"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_archiver: Optional[Archiver] = None
+
+
+def get_archiver() -> Archiver:
+    """Архиватор основной БД (правила из Config)"""
+    global _archiver
+    if _archiver is None:
+        from config import Config
+        from . import get_db
+        policies = []
+        if Config.ARCHIVE_COMPLETED_DAYS > 0:
+            policies.append(ArchivePolicy('completed', 'completed', Config.ARCHIVE_COMPLETED_DAYS))
+        if Config.ARCHIVE_TRIAL_DAYS > 0:
+            policies.append(ArchivePolicy('stale_trial', 'trial', Config.ARCHIVE_TRIAL_DAYS))
+        _archiver = Archiver(get_db(), policies, batch_size=Config.ARCHIVE_BATCH_SIZE)
+    return _archiver
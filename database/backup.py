@@ -0,0 +1,291 @@
+"""
+Backup Service
+Горячие резервные копии через sqlite3 backup API (без остановки бота)
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _TooManyRestarts(Exception):
+    """Источник меняется быстрее, чем идёт пошаговое копирование"""
+
+
+class BackupService:
+    """
+    Резервное копирование работающей БД
+
+    Копия снимается sqlite3.Connection.backup() порциями по pages
+    страниц с паузой sleep между ними: блокировка чтения держится
+    только на время одной порции, поэтому запись не простаивает.
+    Если источник изменился во время копирования, SQLite сам начинает
+    проход заново, копия всегда согласована. После max_restarts
+    перезапусков копия снимается за один шаг (в WAL чтение не мешает
+    записи).
+
+    Example:
+        >>> service = BackupService(db, "backups", keep=7, compress=True)
+        >>> info = service.create()
+        >>> service.verify(info['path'])['ok']
+        True
+    """
+
+    def __init__(self, db, directory: str = "backups", keep: int = 7, compress: bool = False,
+                 pages: int = 256, sleep: float = 0.01, verify: bool = True,
+                 max_restarts: int = 20):
+        """
+        Args:
+            db: Database
+            directory: Каталог для копий
+            keep: Сколько последних копий хранить
+            compress: Сжимать копии gzip
+            pages: Страниц за один шаг backup()
+            sleep: Пауза между шагами (сек)
+            verify: Проверять каждую копию PRAGMA integrity_check
+            max_restarts: Перезапусков пошагового копирования до перехода на один шаг
+        """
+        self.db = db
+        self.directory = directory
+        self.keep = max(1, keep)
+        self.compress = compress
+        self.pages = max(1, pages)
+        self.sleep = sleep
+        self.verify_after_backup = verify
+        self.max_restarts = max_restarts
+        self.prefix = os.path.splitext(os.path.basename(db.db_name))[0] + "_"
+        self.last_backup: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ============================================
+    # КОПИРОВАНИЕ
+    # ============================================
+
+    def create(self) -> Dict[str, Any]:
+        """
+        Снять копию, при необходимости сжать, проверить и удалить старые
+
+        Копия, не прошедшая проверку, переименовывается в *.corrupt,
+        старые копии в этом случае не удаляются.
+
+        Returns:
+            Dict: path, size, seconds, restarts, verified (результат verify или None)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.directory, f"{self.prefix}{stamp}.db")
+        partial = path + ".part"
+
+        started = time.perf_counter()
+        restarts = 0
+        last_remaining = None
+
+        def progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            # Оставшихся страниц стало больше — источник изменился, проход начат заново
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > self.max_restarts:
+                    raise _TooManyRestarts()
+            last_remaining = remaining
+
+        source = sqlite3.connect(self.db.db_name, timeout=self.db.pool.busy_timeout_ms / 1000)
+        target = sqlite3.connect(partial)
+        try:
+            try:
+                source.backup(target, pages=self.pages, progress=progress, sleep=self.sleep)
+            except _TooManyRestarts:
+                logger.info(f"Backup restarted {restarts} times, copying in one step")
+                source.backup(target, pages=-1)
+        except Exception:
+            target.close()
+            os.remove(partial)
+            raise
+        finally:
+            target.close()
+            source.close()
+
+        if self.compress:
+            with open(partial, 'rb') as raw, gzip.open(path + ".gz", 'wb') as packed:
+                shutil.copyfileobj(raw, packed, 1024 * 1024)
+            os.remove(partial)
+            path += ".gz"
+        else:
+            os.replace(partial, path)
+
+        info = {
+            'path': path,
+            'size': os.path.getsize(path),
+            'seconds': round(time.perf_counter() - started, 3),
+            'restarts': restarts,
+            'verified': None,
+        }
+        if self.verify_after_backup:
+            info['verified'] = self.verify(path)
+            if not info['verified']['ok']:
+                # Испорченная копия не считается копией: list_backups() её не видит,
+                # и ротация не вытесняет ради неё последние исправные
+                corrupt = path + ".corrupt"
+                os.replace(path, corrupt)
+                info['path'] = corrupt
+                logger.error(f"Backup failed integrity check, kept as {corrupt}: "
+                             f"{info['verified']['errors']}")
+                self.last_backup = info
+                return info
+
+        logger.info(f"Backup saved to {path} ({info['size']} bytes, {info['seconds']} s, "
+                    f"{restarts} restarts)")
+        self.rotate()
+        self.last_backup = info
+        return info
+
+    def rotate(self) -> List[str]:
+        """
+        Удалить копии сверх keep (самые старые)
+
+        Returns:
+            List[str]: Удалённые файлы
+        """
+        removed = []
+        for backup in self.list_backups()[self.keep:]:
+            try:
+                os.remove(backup['path'])
+                removed.append(backup['path'])
+            except OSError as e:
+                logger.warning(f"Could not remove old backup {backup['path']}: {e}")
+        if removed:
+            logger.info(f"Removed {len(removed)} old backups")
+        return removed
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Копии в каталоге, новые первыми: path, size, created"""
+        if not os.path.isdir(self.directory):
+            return []
+        backups = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.prefix) and (name.endswith('.db') or name.endswith('.db.gz')):
+                path = os.path.join(self.directory, name)
+                backups.append({
+                    'path': path,
+                    'size': os.path.getsize(path),
+                    'created': os.path.getmtime(path),
+                })
+        # Имя содержит метку времени — сортировка по имени устойчивее mtime
+        backups.sort(key=lambda backup: os.path.basename(backup['path']), reverse=True)
+        return backups
+
+    # ============================================
+    # ПРОВЕРКА
+    # ============================================
+
+    def verify(self, path: str) -> Dict[str, Any]:
+        """
+        Проверить, что из копии можно восстановиться
+
+        Копия (.gz распаковывается во временный файл) открывается только
+        для чтения: PRAGMA integrity_check и версия схемы.
+
+        Returns:
+            Dict: ok, errors (список строк integrity_check), schema_version, tables
+        """
+        temp_path = None
+        check_path = path
+        try:
+            if path.endswith('.gz'):
+                fd, temp_path = tempfile.mkstemp(suffix='.db')
+                with os.fdopen(fd, 'wb') as raw, gzip.open(path, 'rb') as packed:
+                    shutil.copyfileobj(packed, raw, 1024 * 1024)
+                check_path = temp_path
+
+            conn = sqlite3.connect(f"file:{check_path}?mode=ro", uri=True)
+            try:
+                errors = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+                schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                tables = conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+                ).fetchone()[0]
+            finally:
+                conn.close()
+
+            ok = errors == ['ok']
+            return {'ok': ok, 'errors': [] if ok else errors,
+                    'schema_version': schema_version, 'tables': tables}
+        except (sqlite3.Error, OSError) as e:
+            return {'ok': False, 'errors': [str(e)], 'schema_version': None, 'tables': 0}
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
+
+    # ============================================
+    # РАСПИСАНИЕ
+    # ============================================
+
+    async def acreate(self) -> Dict[str, Any]:
+        """
+        Асинхронный create()
+
+        Выполняется в отдельном потоке, а не в пуле AsyncExecutor, чтобы
+        долгое копирование не занимало потоки обработчиков.
+        """
+        return await asyncio.to_thread(self.create)
+
+    async def _run_periodically(self, interval: float, first_delay: float):
+        await asyncio.sleep(first_delay)
+        while True:
+            try:
+                await self.acreate()
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float, first_delay: float = 60.0) -> asyncio.Task:
+        """
+        Запустить резервное копирование по расписанию
+
+        Args:
+            interval: Период (сек)
+            first_delay: Задержка первой копии после старта (сек)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_periodically(interval, first_delay))
+            logger.info(f"Scheduled backups every {interval / 3600:g} h to {self.directory}")
+        return self._task
+
+    async def stop(self):
+        """Остановить расписание"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_service: Optional[BackupService] = None
+
+
+def get_backup_service() -> BackupService:
+    """Сервис резервного копирования основной БД (настройки из Config)"""
+    global _service
+    if _service is None:
+        from config import Config
+        from . import get_db
+        _service = BackupService(
+            get_db(),
+            directory=Config.BACKUP_DIR,
+            keep=Config.BACKUP_KEEP,
+            compress=Config.BACKUP_COMPRESS,
+            pages=Config.BACKUP_PAGES,
+            verify=Config.BACKUP_VERIFY
+        )
+    return _service
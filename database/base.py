@@ -5,8 +5,19 @@ Base database Class
 
 import sqlite3
 import logging
+import threading
+import time
 from contextlib import contextmanager
-from typing import List, Dict, Any
+from dataclasses import MISSING, fields, is_dataclass
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator, Callable
+
+from .admin_cache import AdminCache
+from .aio import AsyncExecutor
+from .migrations import SCHEMA_VERSION, MigrationRunner, get_user_version
+from .pool import ConnectionPool, DEFAULT_PROFILE
+from .profiler import QueryProfiler
+from .readonly import ReadOnlyReader
+from .reference import ReferenceCache
 # ✅ ИСПРАВЛЕНО: Удален импорт из handlers.user_handlers, который создавал циклический импорт
 # from handlers.user_handlers import db  # ❌ УДАЛЕНО
 
@@ -71,14 +82,86 @@ def _init_reference_data(cursor):
                        """, courses)
 
 
+# Размер порции fetchmany для iter_query/aiter_query
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _row_converter(columns: List[str], row_type) -> Optional[Callable]:
+    """
+    Преобразователь кортежа строки в row_type
+
+    Args:
+        columns: Имена колонок результата (cursor.description)
+        row_type: None — dict, tuple — кортеж как есть, dataclass —
+            экземпляр по совпадающим именам колонок, иначе любой
+            callable(*row)
+
+    Returns:
+        Callable или None, если строку можно отдавать без преобразования
+    """
+    if row_type is tuple:
+        return None
+    if row_type is None:
+        return lambda row: dict(zip(columns, row))
+    if is_dataclass(row_type):
+        names = [f.name for f in fields(row_type) if f.init]
+        if columns == names:
+            return lambda row: row_type(*row)
+        missing = [f.name for f in fields(row_type)
+                   if f.init and f.name not in columns
+                   and f.default is MISSING and f.default_factory is MISSING]
+        if missing:
+            raise ValueError(f"{row_type.__name__}: query has no columns {missing}")
+        mapping = [(name, columns.index(name)) for name in names if name in columns]
+        return lambda row: row_type(**{name: row[i] for name, i in mapping})
+    return lambda row: row_type(*row)
+
+
 class Database:
-    def __init__(self, db_name: str):
+    def __init__(self, db_name: str, pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 pragma_profile: str = DEFAULT_PROFILE, pragmas: Optional[Dict[str, Any]] = None,
+                 async_workers: Optional[int] = None, async_timeout: Optional[float] = 10.0,
+                 admin_ids: Optional[List[int]] = None, admin_cache_ttl: float = 300.0,
+                 profile: bool = False, slow_query_ms: float = 50.0,
+                 report_workers: int = 1, report_timeout: Optional[float] = 60.0):
         self.db_name = db_name
         self.logger = logging.getLogger(__name__)
 
-        # Инициализируем схему при первом запуске
+        # Профилировщик запросов (None — выключен, execute_* не замеряют время)
+        self.profiler: Optional[QueryProfiler] = None
+        if profile:
+            self.enable_profiling(slow_query_ms)
+
+        # Пул постоянных подключений (WAL: читатели не блокируют писателя)
+        self.pool = ConnectionPool(
+            db_name,
+            max_size=pool_size,
+            busy_timeout_ms=busy_timeout_ms,
+            pragma_profile=pragma_profile,
+            pragmas=pragmas
+        )
+
+        # Пул потоков для async-API (не больше, чем подключений в пуле)
+        self.executor = AsyncExecutor(
+            max_workers=min(async_workers or pool_size, pool_size),
+            default_timeout=async_timeout
+        )
+
+        # Отчёты читают через отдельные подключения только для чтения (создаются по требованию)
+        self.report_workers = report_workers
+        self.report_timeout = report_timeout
+        self._readonly: Optional[ReadOnlyReader] = None
+
+        # Инициализируем схему при первом запуске, догоняем версию миграциями
+        self._migration_thread: Optional[threading.Thread] = None
         self._init_schema()
 
+        # Кэш справочников (курсы, типы обучения, расписания, статусы)
+        self.reference = ReferenceCache(self)
+
+        # Кэш администраторов (таблица admins + статический список)
+        self.admin_cache = AdminCache(self, admin_ids or (), ttl=admin_cache_ttl)
+
         # Инициализируем репозитории (ленивая загрузка)
         self._registrations = None
         self._students = None
@@ -89,11 +172,23 @@ class Database:
         self._lessons = None
         self._feedback = None
         self._reminders = None
+        self._search = None
+        self._stats = None
+        self._broadcasts = None
+        self._notifications = None
 
     def _init_schema(self):
-        """Инициализировать схему БД (если не существует)"""
+        """
+        Инициализировать схему БД и применить миграции
+
+        Если схема актуальна, это одно чтение PRAGMA user_version.
+        Фоновые шаги (индексы) запускаются в отдельном потоке.
+        """
         try:
             with self.get_connection() as conn:
+                if get_user_version(conn) >= SCHEMA_VERSION:
+                    return
+
                 # Проверяем существование основных таблиц
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -106,8 +201,33 @@ class Database:
                     # БД пустая, нужно создать схему
                     self.logger.info("Initializing database schema...")
                     self._create_schema(conn)
+
+                runner = MigrationRunner()
+                deferred = runner.run(conn)
         except Exception as e:
             self.logger.error(f"Error initializing schema: {e}")
+            return
+
+        if deferred:
+            self._migration_thread = threading.Thread(
+                target=self._run_deferred_migrations, args=(runner,),
+                name="db-migrations", daemon=True
+            )
+            self._migration_thread.start()
+
+    def _run_deferred_migrations(self, runner: MigrationRunner):
+        """Фоновые миграции (построение индексов) после старта"""
+        try:
+            runner.run_deferred(self.transaction)
+            self.logger.info(f"Background migrations finished, schema version {self.schema_version}")
+        except Exception as e:
+            self.logger.error(f"Background migrations failed: {e}")
+
+    @property
+    def schema_version(self) -> int:
+        """Текущая версия схемы (PRAGMA user_version)"""
+        with self.get_connection() as conn:
+            return get_user_version(conn)
 
     def _create_schema(self, conn: sqlite3.Connection):
         """Создать схему БД из SQL файла или встроенных команд"""
@@ -862,6 +982,10 @@ class Database:
         """
         Context manager для безопасной работы с подключением
 
+        Подключение берётся из пула. Вложенные вызовы в одном потоке
+        (в потоке event loop — в одной задаче asyncio) получают то же
+        подключение, а commit/rollback выполняет только внешний уровень.
+
         Yields:
             sqlite3.Connection: Подключение к БД
 
@@ -870,17 +994,86 @@ class Database:
             ...     cursor = conn.cursor()
             ...     cursor.execute("SELECT * FROM users")
         """
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row  # Доступ к полям по имени
+        conn = self.pool.acquire()
+        outermost = self.pool.depth == 1
         try:
             yield conn
-            conn.commit()
+            if outermost:
+                conn.commit()
         except Exception as e:
-            conn.rollback()
-            self.logger.error(f"database error: {e}")
+            if outermost:
+                conn.rollback()
+                self.logger.error(f"database error: {e}")
             raise
         finally:
-            conn.close()
+            self.pool.release(conn)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True):
+        """
+        Unit of work: все запросы внутри блока (в том числе через
+        репозитории) идут через одно подключение и фиксируются одним commit.
+        При исключении откатывается всё целиком.
+
+        Вложенный transaction() присоединяется к внешней транзакции.
+
+        Args:
+            immediate: Сразу взять блокировку записи (BEGIN IMMEDIATE),
+                чтобы не получить "database is locked" посреди блока
+
+        Example:
+            >>> with db.transaction():
+            ...     db.execute_update("UPDATE registrations SET status_code = ? WHERE id = ?", ...)
+            ...     db.registrations.add_note(reg_id, "Статус изменён")
+        """
+        with self.get_connection() as conn:
+            if self.pool.depth == 1 and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield conn
+
+    @property
+    def in_transaction(self) -> bool:
+        """Выполняется ли текущий поток (задача asyncio) внутри transaction()/get_connection()"""
+        return self.pool.depth > 0
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Статистика пула подключений"""
+        return self.pool.stats()
+
+    def reference_stats(self) -> Dict[str, Any]:
+        """Статистика кэша справочников"""
+        return self.reference.stats()
+
+    def enable_profiling(self, slow_query_ms: float = 50.0) -> QueryProfiler:
+        """
+        Включить статистику запросов execute_* (повторный вызов меняет только порог)
+
+        Args:
+            slow_query_ms: Порог медленного запроса, мс
+
+        Returns:
+            QueryProfiler
+        """
+        if self.profiler is None:
+            self.profiler = QueryProfiler(slow_ms=slow_query_ms)
+            self.logger.info(f"Query profiling enabled (slow > {slow_query_ms} ms)")
+        else:
+            self.profiler.slow_ms = slow_query_ms
+        return self.profiler
+
+    def disable_profiling(self):
+        """Выключить статистику запросов (накопленные данные отбрасываются)"""
+        self.profiler = None
+
+    def close(self):
+        """Остановить пул потоков и закрыть все подключения пула"""
+        if self._migration_thread is not None and self._migration_thread.is_alive():
+            self.logger.info("Waiting for background migrations to finish...")
+            self._migration_thread.join()
+        self.executor.shutdown()
+        if self._readonly is not None:
+            self._readonly.close()
+        self.pool.close_all()
 
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """
@@ -893,10 +1086,14 @@ class Database:
         Returns:
             List[Dict]: Список результатов
         """
+        profiler = self.profiler
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            started = time.perf_counter() if profiler else 0.0
             cursor.execute(query, params)
             rows = cursor.fetchall()
+            if profiler:
+                profiler.record(conn, query, params, time.perf_counter() - started, len(rows))
             return [dict(row) for row in rows]
 
     def execute_update(self, query: str, params: tuple = ()) -> int:
@@ -910,9 +1107,13 @@ class Database:
         Returns:
             int: Количество затронутых строк
         """
+        profiler = self.profiler
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            started = time.perf_counter() if profiler else 0.0
             cursor.execute(query, params)
+            if profiler:
+                profiler.record(conn, query, params, time.perf_counter() - started, cursor.rowcount)
             return cursor.rowcount
 
     def execute_insert(self, query: str, params: tuple = ()) -> int:
@@ -926,15 +1127,183 @@ class Database:
         Returns:
             int: ID новой записи
         """
+        profiler = self.profiler
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            started = time.perf_counter() if profiler else 0.0
             cursor.execute(query, params)
+            if profiler:
+                profiler.record(conn, query, params, time.perf_counter() - started, cursor.rowcount)
             return cursor.lastrowid
 
+    def iter_chunks(self, query: str, params: tuple = (), chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    row_type=None) -> Iterator[List[Any]]:
+        """
+        Выполнить SELECT и отдавать результат порциями fetchmany
+
+        В памяти одновременно только одна порция. Подключение пула занято,
+        пока генератор не исчерпан или не закрыт, поэтому генератор
+        потребляется в том же потоке и без долгих пауз между порциями.
+
+        Args:
+            query: SQL запрос
+            params: Параметры запроса
+            chunk_size: Строк в порции
+            row_type: None — dict, tuple — кортеж (самый дешёвый вариант),
+                dataclass (например, models.data_models.RecipientRow) —
+                поля заполняются по именам колонок
+
+        Yields:
+            List: Порция строк
+        """
+        profiler = self.profiler
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # Кортежи: sqlite3.Row не создаётся
+            started = time.perf_counter() if profiler else 0.0
+            cursor.execute(query, params)
+            spent = time.perf_counter() - started if profiler else 0.0
+            convert = _row_converter([column[0] for column in cursor.description], row_type)
+            total = 0
+            try:
+                while True:
+                    started = time.perf_counter() if profiler else 0.0
+                    rows = cursor.fetchmany(chunk_size)
+                    if profiler:
+                        spent += time.perf_counter() - started
+                    if not rows:
+                        break
+                    total += len(rows)
+                    yield rows if convert is None else [convert(row) for row in rows]
+            finally:
+                cursor.close()
+                if profiler:
+                    profiler.record(conn, query, params, spent, total)
+
+    def iter_query(self, query: str, params: tuple = (), chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   row_type=None) -> Iterator[Any]:
+        """
+        Потоковый execute_query: строки по одной, память — одна порция
+
+        Example:
+            >>> for telegram_id, name in db.iter_query(
+            ...         "SELECT telegram_id, full_name FROM users", row_type=tuple):
+            ...     ...
+        """
+        for chunk in self.iter_chunks(query, params, chunk_size, row_type):
+            yield from chunk
+
+    # ============================================
+    # ASYNC API (для обработчиков aiogram)
+    # ============================================
+
+    async def run_async(self, func, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Выполнить синхронную функцию работы с БД в пуле потоков
+
+        Args:
+            func: Функция (обычно метод Database или репозитория)
+            timeout: Таймаут в секундах (None — DB_ASYNC_TIMEOUT)
+
+        Returns:
+            Результат func
+        """
+        return await self.executor.run(func, *args, timeout=timeout, **kwargs)
+
+    async def atransaction(self, work, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Выполнить work(*args, **kwargs) целиком внутри transaction()
+        в одном потоке пула
+
+        Async-вызовы aquery/aupdate могут попасть в разные потоки и
+        подключения, поэтому многошаговые сценарии собираются в синхронную
+        функцию и передаются сюда.
+
+        Returns:
+            Результат work
+        """
+        def run():
+            with self.transaction():
+                return work(*args, **kwargs)
+
+        return await self.run_async(run, timeout=timeout)
+
+    async def aquery(self, query: str, params: tuple = (),
+                     timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Асинхронный execute_query"""
+        return await self.run_async(self.execute_query, query, params, timeout=timeout)
+
+    async def aupdate(self, query: str, params: tuple = (), timeout: Optional[float] = None) -> int:
+        """Асинхронный execute_update"""
+        return await self.run_async(self.execute_update, query, params, timeout=timeout)
+
+    async def ainsert(self, query: str, params: tuple = (), timeout: Optional[float] = None) -> int:
+        """Асинхронный execute_insert"""
+        return await self.run_async(self.execute_insert, query, params, timeout=timeout)
+
+    async def aiter_query(self, query: str, params: tuple = (),
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, row_type=None) -> AsyncIterator[Any]:
+        """
+        Асинхронный iter_query
+
+        Запрос выполняется на отдельном подключении только для чтения
+        (не из пула), порции читаются в пуле потоков. Обработчик может
+        делать что угодно между строками (например, отправлять сообщения),
+        не занимая подключение пула. Всё время обхода держится снимок
+        чтения, поэтому обход лучше не растягивать на часы.
+
+        Example:
+            >>> async for recipient in db.aiter_query(query, row_type=RecipientRow):
+            ...     await bot.send_message(recipient.telegram_id, text)
+        """
+        profiler = self.profiler
+
+        def start():
+            conn = self.pool.connect_detached()
+            try:
+                conn.execute("PRAGMA query_only = 1")
+                started = time.perf_counter()
+                cursor = conn.execute(query, params)
+                cursor.row_factory = None
+                return conn, cursor, time.perf_counter() - started
+            except Exception:
+                conn.close()
+                raise
+
+        def fetch(cursor):
+            started = time.perf_counter()
+            rows = cursor.fetchmany(chunk_size)
+            return rows, time.perf_counter() - started
+
+        conn, cursor, spent = await self.run_async(start)
+        total = 0
+        try:
+            convert = _row_converter([column[0] for column in cursor.description], row_type)
+            while True:
+                rows, elapsed = await self.run_async(fetch, cursor)
+                spent += elapsed
+                if not rows:
+                    break
+                total += len(rows)
+                for row in rows:
+                    yield row if convert is None else convert(row)
+        finally:
+            if profiler:
+                profiler.record(conn, query, params, spent, total)
+            conn.close()
+
     # ============================================
     # ЛЕНИВАЯ ЗАГРУЗКА РЕПОЗИТОРИЕВ
     # ============================================
 
+    @property
+    def readonly(self) -> ReadOnlyReader:
+        """Маршрут только для чтения для отчётов и тяжёлой статистики"""
+        if self._readonly is None:
+            self._readonly = ReadOnlyReader(self, workers=self.report_workers,
+                                            timeout=self.report_timeout)
+        return self._readonly
+
     @property
     def registrations(self):
         """Репозиторий регистраций"""
@@ -1007,6 +1376,38 @@ class Database:
             self._reminders = ReminderRepository(self)
         return self._reminders
 
+    @property
+    def search(self):
+        """Репозиторий полнотекстового поиска"""
+        if self._search is None:
+            from .search import SearchRepository
+            self._search = SearchRepository(self)
+        return self._search
+
+    @property
+    def stats(self):
+        """Репозиторий статистики (счётчики stats_counters)"""
+        if self._stats is None:
+            from .stats import StatsRepository
+            self._stats = StatsRepository(self)
+        return self._stats
+
+    @property
+    def broadcasts(self):
+        """Репозиторий заданий рассылок"""
+        if self._broadcasts is None:
+            from .broadcasts import BroadcastRepository
+            self._broadcasts = BroadcastRepository(self)
+        return self._broadcasts
+
+    @property
+    def notifications(self):
+        """Репозиторий доставки уведомлений админам"""
+        if self._notifications is None:
+            from .notifications import AdminNotificationRepository
+            self._notifications = AdminNotificationRepository(self)
+        return self._notifications
+
     # ============================================
     # МЕТОДЫ СОВМЕСТИМОСТИ (для старого кода)
     # ============================================
@@ -1016,14 +1417,13 @@ class Database:
         return self.admins.get_all()
 
     def check_database_structure(self):
-        """Проверить структуру БД (совместимость)"""
+        """Проверить структуру БД (совместимость): схема не старее SCHEMA_VERSION"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [row[0] for row in cursor.fetchall()]
-                self.logger.info(f"database tables: {', '.join(tables)}")
-                return True
+            version = self.schema_version
+            if version < SCHEMA_VERSION and not (self._migration_thread and self._migration_thread.is_alive()):
+                self.logger.warning(f"database schema version {version} < {SCHEMA_VERSION}")
+                return False
+            return True
         except Exception as e:
             self.logger.error(f"Error checking database structure: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Broadcast Jobs
+Задания рассылок и состояние доставки каждому получателю
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .aio import AsyncRepositoryMixin
+from .timestamps import now_epoch
+
+logger = logging.getLogger(__name__)
+
+# Статусы задания
+JOB_RUNNING = 'running'
+JOB_PAUSED = 'paused'
+JOB_CANCELLED = 'cancelled'
+JOB_COMPLETED = 'completed'
+ACTIVE_JOB_STATUSES = (JOB_RUNNING, JOB_PAUSED)
+
+# Статусы доставки
+DELIVERY_PENDING = 'pending'
+DELIVERY_SENDING = 'sending'
+DELIVERY_SENT = 'sent'
+DELIVERY_FAILED = 'failed'
+DELIVERY_BLOCKED = 'blocked'
+
+
+class BroadcastRepository(AsyncRepositoryMixin):
+    """
+    Репозиторий рассылок
+
+    Получатели записываются в broadcast_deliveries при создании задания
+    одним INSERT ... SELECT. Отправка идёт пачками: claim() переводит
+    пачку в 'sending', record() — в итоговый статус. После падения
+    процесса пачка в 'sending' не отправляется повторно (см.
+    recover_interrupted): лучше недоставить, чем отправить дважды.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    # ============================================
+    # ЗАДАНИЯ
+    # ============================================
+
+    def create(self, text: str, status_code: Optional[str] = None,
+               created_by: Optional[int] = None) -> Optional[int]:
+        """
+        Создать задание и список получателей
+
+        Args:
+            text: Текст рассылки
+            status_code: Только студентам с этим статусом (None — всем)
+            created_by: Telegram ID админа
+
+        Returns:
+            Optional[int]: ID задания
+        """
+        where = "u.telegram_id IS NOT NULL AND u.blocked_at IS NULL"
+        params: tuple = ()
+        if status_code:
+            where += " AND r.status_code = ?"
+            params = (status_code,)
+
+        try:
+            with self.db.transaction():
+                job_id = self.db.execute_insert("""
+                    INSERT INTO broadcast_jobs (text, audience, status, created_by, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (text, status_code, JOB_RUNNING, created_by, now_epoch()))
+                total = self.db.execute_update(f"""
+                    INSERT OR IGNORE INTO broadcast_deliveries (job_id, telegram_id)
+                    SELECT DISTINCT ?, u.telegram_id
+                    FROM registrations r
+                             JOIN users u ON r.user_id = u.id
+                    WHERE {where}
+                """, (job_id,) + params)
+                self.db.execute_update("UPDATE broadcast_jobs SET total = ? WHERE id = ?", (total, job_id))
+            logger.info(f"Created broadcast job {job_id} for {total} recipients")
+            return job_id
+        except Exception as e:
+            logger.error(f"Error creating broadcast job: {e}")
+            return None
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Задание по ID"""
+        rows = self.db.execute_query("SELECT * FROM broadcast_jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def get_active(self) -> List[Dict]:
+        """Незавершённые задания (выполняются или на паузе)"""
+        return self.db.execute_query(
+            "SELECT * FROM broadcast_jobs WHERE status IN (?, ?) ORDER BY id", ACTIVE_JOB_STATUSES
+        )
+
+    def get_recent(self, limit: int = 5) -> List[Dict]:
+        """Последние задания"""
+        return self.db.execute_query("SELECT * FROM broadcast_jobs ORDER BY id DESC LIMIT ?", (limit,))
+
+    def set_status(self, job_id: int, status: str, from_statuses: Tuple[str, ...] = ACTIVE_JOB_STATUSES) -> bool:
+        """
+        Сменить статус задания, если он сейчас один из from_statuses
+
+        Продолжение (JOB_RUNNING) сбрасывает ошибку, из-за которой
+        задание было остановлено.
+
+        Returns:
+            bool: True если статус изменён
+        """
+        finished_at = now_epoch() if status in (JOB_CANCELLED, JOB_COMPLETED) else None
+        placeholders = ', '.join('?' for _ in from_statuses)
+        clear_error = ", error = NULL" if status == JOB_RUNNING else ""
+        affected = self.db.execute_update(f"""
+            UPDATE broadcast_jobs
+            SET status = ?, finished_at = COALESCE(?, finished_at){clear_error}
+            WHERE id = ? AND status IN ({placeholders})
+        """, (status, finished_at, job_id) + tuple(from_statuses))
+        return affected > 0
+
+    def pause_on_error(self, job_id: int, error: str) -> bool:
+        """
+        Поставить выполняющееся задание на паузу из-за ошибки
+
+        Админ видит причину в прогрессе и продолжает рассылку кнопкой.
+
+        Returns:
+            bool: True если задание было в статусе running
+        """
+        affected = self.db.execute_update(
+            "UPDATE broadcast_jobs SET status = ?, error = ? WHERE id = ? AND status = ?",
+            (JOB_PAUSED, error, job_id, JOB_RUNNING)
+        )
+        return affected > 0
+
+    def set_progress_message(self, job_id: int, chat_id: int, message_id: int):
+        """Сообщение админа, в котором показывается прогресс"""
+        self.db.execute_update(
+            "UPDATE broadcast_jobs SET progress_chat_id = ?, progress_message_id = ? WHERE id = ?",
+            (chat_id, message_id, job_id)
+        )
+
+    # ============================================
+    # ДОСТАВКИ
+    # ============================================
+
+    def recover_interrupted(self, job_id: int) -> int:
+        """
+        Пачку, которая отправлялась в момент падения, считать недоставленной
+
+        Returns:
+            int: Сколько получателей помечено
+        """
+        with self.db.transaction():
+            affected = self.db.execute_update("""
+                UPDATE broadcast_deliveries
+                SET status = ?, error = 'interrupted'
+                WHERE job_id = ? AND status = ?
+            """, (DELIVERY_FAILED, job_id, DELIVERY_SENDING))
+            if affected:
+                self.db.execute_update(
+                    "UPDATE broadcast_jobs SET failed = failed + ? WHERE id = ?", (affected, job_id)
+                )
+        if affected:
+            logger.warning(f"Broadcast job {job_id}: {affected} deliveries interrupted by restart")
+        return affected
+
+    def claim(self, job_id: int, limit: int) -> List[Tuple[int, int]]:
+        """
+        Забрать пачку получателей, которым пора отправлять
+
+        Returns:
+            List[Tuple[int, int]]: (telegram_id, попыток уже было)
+        """
+        with self.db.transaction() as conn:
+            rows = self.db.execute_query("""
+                SELECT telegram_id, attempts
+                FROM broadcast_deliveries
+                WHERE job_id = ? AND status = ? AND next_attempt_at <= ?
+                LIMIT ?
+            """, (job_id, DELIVERY_PENDING, now_epoch(), limit))
+            conn.executemany(
+                "UPDATE broadcast_deliveries SET status = ? WHERE job_id = ? AND telegram_id = ?",
+                [(DELIVERY_SENDING, job_id, row['telegram_id']) for row in rows]
+            )
+        return [(row['telegram_id'], row['attempts']) for row in rows]
+
+    def next_retry_at(self, job_id: int) -> Optional[int]:
+        """Когда следующий повтор (None — ждущих повтора нет)"""
+        rows = self.db.execute_query("""
+            SELECT MIN(next_attempt_at) AS next_at
+            FROM broadcast_deliveries
+            WHERE job_id = ? AND status = ?
+        """, (job_id, DELIVERY_PENDING))
+        return rows[0]['next_at'] if rows else None
+
+    def record(self, job_id: int, results: List[Tuple[int, str, Optional[str], int]]):
+        """
+        Записать итоги пачки одной транзакцией
+
+        Args:
+            job_id: Задание
+            results: (telegram_id, статус доставки, ошибка, следующая попытка epoch)
+        """
+        counts = {DELIVERY_SENT: 0, DELIVERY_FAILED: 0, DELIVERY_BLOCKED: 0}
+        for _, status, _, _ in results:
+            if status in counts:
+                counts[status] += 1
+        blocked_at = now_epoch()
+
+        with self.db.transaction() as conn:
+            conn.executemany("""
+                UPDATE broadcast_deliveries
+                SET status = ?, error = ?, next_attempt_at = ?, attempts = attempts + 1
+                WHERE job_id = ? AND telegram_id = ?
+            """, [(status, error, next_at, job_id, telegram_id)
+                  for telegram_id, status, error, next_at in results])
+            self.db.execute_update("""
+                UPDATE broadcast_jobs
+                SET sent = sent + ?, failed = failed + ?, blocked = blocked + ?
+                WHERE id = ?
+            """, (counts[DELIVERY_SENT], counts[DELIVERY_FAILED], counts[DELIVERY_BLOCKED], job_id))
+            if counts[DELIVERY_BLOCKED]:
+                # Следующие рассылки этих пользователей пропустят
+                conn.executemany(
+                    "UPDATE users SET blocked_at = ? WHERE telegram_id = ?",
+                    [(blocked_at, telegram_id) for telegram_id, status, _, _ in results
+                     if status == DELIVERY_BLOCKED]
+                )
+
+    def get_progress(self, job_id: int) -> Dict[str, int]:
+        """Сколько получателей в каждом статусе доставки"""
+        rows = self.db.execute_query("""
+            SELECT status, COUNT(*) AS count
+            FROM broadcast_deliveries
+            WHERE job_id = ?
+            GROUP BY status
+        """, (job_id,))
+        progress = {status: 0 for status in (DELIVERY_PENDING, DELIVERY_SENDING, DELIVERY_SENT,
+                                             DELIVERY_FAILED, DELIVERY_BLOCKED)}
+        progress.update({row['status']: row['count'] for row in rows})
+        return progress
+
+    # ============================================
+    # БЛОКИРОВКА БОТА
+    # ============================================
+
+    def unblock_user(self, telegram_id: int) -> bool:
+        """
+        Снять отметку о блокировке (пользователь снова написал боту)
+
+        Returns:
+            bool: True если отметка была
+        """
+        try:
+            return self.db.execute_update(
+                "UPDATE users SET blocked_at = NULL WHERE telegram_id = ? AND blocked_at IS NOT NULL",
+                (telegram_id,)
+            ) > 0
+        except Exception as e:
+            logger.error(f"Error unblocking user {telegram_id}: {e}")
+            return False
@@ -6,10 +6,12 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+
 logger = logging.getLogger(__name__)
 
 
-class CourseRepository:
+class CourseRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с курсами"""
 
     def __init__(self, db):
@@ -17,20 +19,15 @@ class CourseRepository:
 
     def get_all_active(self) -> List[Dict]:
         """Получить все активные курсы"""
-        query = "SELECT * FROM courses WHERE is_active = 1 ORDER BY name"
-        return self.db.execute_query(query)
+        return self.db.reference.all('courses', active_only=True)
 
     def get_by_id(self, course_id: int) -> Optional[Dict]:
         """Получить курс по ID"""
-        query = "SELECT * FROM courses WHERE id = ?"
-        rows = self.db.execute_query(query, (course_id,))
-        return rows[0] if rows else None
+        return self.db.reference.get('courses', course_id)
 
     def get_by_name(self, name: str) -> Optional[Dict]:
         """Получить курс по названию"""
-        query = "SELECT * FROM courses WHERE name = ?"
-        rows = self.db.execute_query(query, (name,))
-        return rows[0] if rows else None
+        return self.db.reference.get_by_name('courses', name)
 
     def create(self, name: str, description: Optional[str] = None,
                duration_months: Optional[int] = None, price_group: Optional[int] = None,
@@ -43,6 +40,7 @@ class CourseRepository:
                     """
             course_id = self.db.execute_insert(query, (name, description, duration_months,
                                                        price_group, price_individual))
+            self.db.reference.invalidate('courses')
             logger.info(f"Created course {course_id}: {name}")
             return course_id
         except Exception as e:
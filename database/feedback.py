@@ -6,10 +6,12 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+
 logger = logging.getLogger(__name__)
 
 
-class FeedbackRepository:
+class FeedbackRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с отзывами"""
 
     def __init__(self, db):
@@ -17,17 +19,17 @@ class FeedbackRepository:
 
     def create(self, user_id: int, rating: int, comment: Optional[str] = None,
                registration_id: Optional[int] = None, course_id: Optional[int] = None,
-               teacher_id: Optional[int] = None) -> Optional[int]:
-        """Создать отзыв"""
+               teacher_id: Optional[int] = None, feedback_type: str = 'review') -> Optional[int]:
+        """Создать отзыв (feedback_type: review, suggestion или issue)"""
         try:
             query = """
                     INSERT INTO feedback (user_id, registration_id, course_id, teacher_id,
-                                          rating, comment)
-                    VALUES (?, ?, ?, ?, ?, ?) 
+                                          rating, comment, type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?) 
                     """
             feedback_id = self.db.execute_insert(query, (user_id, registration_id,
                                                          course_id, teacher_id,
-                                                         rating, comment))
+                                                         rating, comment, feedback_type))
             logger.info(f"Created feedback {feedback_id} from user {user_id}")
             return feedback_id
         except Exception as e:
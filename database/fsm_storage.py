@@ -0,0 +1,292 @@
+"""
+SQLite FSM Storage
+Хранилище состояний aiogram (FSM) в основной БД вместо MemoryStorage
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from copy import copy
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from .timestamps import now_epoch
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    """Состояние и данные одного ключа в кэше"""
+
+    __slots__ = ('state', 'data', 'updated_at')
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None,
+                 updated_at: int = 0):
+        self.state = state
+        self.data = data if data is not None else {}
+        self.updated_at = updated_at
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в таблице fsm_states
+
+    Чтения обслуживает LRU-кэш (в том числе "состояния нет" — FSM
+    спрашивает его на каждый апдейт). Запись идёт в кэш сразу, а в БД:
+    смена состояния — немедленно, изменения данных — отложенно на
+    flush_delay, так что серия update_data превращается в одну запись.
+    Состояния, которые не менялись дольше ttl, считаются брошенными:
+    они не читаются и удаляются фоновой очисткой.
+
+    Example:
+        >>> storage = SQLiteStorage(get_db(), ttl=7 * 24 * 3600)
+        >>> dp = Dispatcher(storage=storage)
+    """
+
+    def __init__(self, db, ttl: float = 7 * 24 * 3600, max_entries: int = 10000,
+                 flush_delay: float = 0.5, cleanup_interval: float = 1800.0,
+                 key_builder: Optional[KeyBuilder] = None,
+                 json_dumps: Callable[..., str] = json.dumps,
+                 json_loads: Callable[..., Any] = json.loads):
+        """
+        Args:
+            db: Database
+            ttl: Сколько секунд хранить состояние без изменений (0 — бессрочно)
+            max_entries: Размер LRU-кэша
+            flush_delay: Задержка записи данных (сек), за неё изменения склеиваются
+            cleanup_interval: Период удаления просроченных состояний (сек)
+            key_builder: Построитель ключей (по умолчанию с bot_id и destiny)
+            json_dumps: Сериализация данных
+            json_loads: Десериализация данных
+        """
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.flush_delay = flush_delay
+        self.cleanup_interval = cleanup_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+        self.json_dumps = json_dumps
+        self.json_loads = json_loads
+
+        self._cache: "OrderedDict[str, _Record]" = OrderedDict()
+        # Ещё не записанные изменения: ключ -> (state, data JSON, updated_at)
+        self._pending: Dict[str, Tuple[Optional[str], str, int]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.coalesced = 0
+
+    # ============================================
+    # КЭШ
+    # ============================================
+
+    def _expired(self, updated_at: int) -> bool:
+        """Состояние брошено (0 — пустая запись кэша, не истекает)"""
+        return bool(self.ttl) and 0 < updated_at < now_epoch() - self.ttl
+
+    def _remember(self, key: str, record: _Record) -> _Record:
+        """Положить запись в кэш (самые давние вытесняются)"""
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return record
+
+    def _load(self, key: str) -> Optional[Tuple[Optional[str], str, int]]:
+        """Строка из БД (выполняется в пуле потоков)"""
+        rows = self.db.execute_query(
+            "SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (key,)
+        )
+        if not rows:
+            return None
+        return rows[0]['state'], rows[0]['data'], rows[0]['updated_at']
+
+    async def _record(self, storage_key: StorageKey) -> _Record:
+        """Запись ключа: кэш, затем ещё не записанное, затем БД"""
+        self._start_cleanup()
+        key = self.key_builder.build(storage_key)
+
+        record = self._cache.get(key)
+        if record is not None and not self._expired(record.updated_at):
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return record
+
+        self.misses += 1
+        row = self._pending.get(key)
+        if row is None:
+            row = await self.db.run_async(self._load, key)
+            # Пока шёл запрос, ключ мог быть записан в этом же процессе
+            record = self._cache.get(key)
+            if record is not None and not self._expired(record.updated_at):
+                return record
+
+        if row is None or self._expired(row[2]):
+            return self._remember(key, _Record())
+        state, data, updated_at = row
+        return self._remember(key, _Record(state, self.json_loads(data) if data else {}, updated_at))
+
+    def _mark_dirty(self, storage_key: StorageKey, record: _Record):
+        """Запомнить изменение для записи в БД"""
+        key = self.key_builder.build(storage_key)
+        record.updated_at = now_epoch()
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = (record.state, self.json_dumps(record.data), record.updated_at)
+        self._remember(key, record)
+
+    # ============================================
+    # ИНТЕРФЕЙС BaseStorage
+    # ============================================
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key, record)
+        # Переход между шагами пишем сразу: после рестарта пользователь продолжит с него
+        await self.flush()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        record = await self._record(key)
+        record.data = data.copy()
+        self._mark_dirty(key, record)
+        self._schedule_flush()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str,
+                        default: Optional[Any] = None) -> Optional[Any]:
+        return copy((await self._record(storage_key)).data.get(dict_key, default))
+
+    async def close(self) -> None:
+        """Остановить фоновые задачи и записать всё, что не записано"""
+        for task in (self._flush_task, self._cleanup_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flush_task = None
+        self._cleanup_task = None
+        await self.flush()
+        logger.info(f"FSM storage closed: {self.stats()}")
+
+    # ============================================
+    # ЗАПИСЬ В БД
+    # ============================================
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        # Отмена (close) не должна оборвать уже начатую запись
+        await asyncio.shield(self.flush())
+
+    def _write(self, rows: List[Tuple[str, Optional[str], str, int]]):
+        """Записать пачку изменений одной транзакцией (пустые состояния удаляются)"""
+        upserts = [row for row in rows if row[1] is not None or row[2] != '{}']
+        deletes = [(row[0],) for row in rows if row[1] is None and row[2] == '{}']
+        with self.db.transaction() as conn:
+            if upserts:
+                conn.executemany("""
+                    INSERT INTO fsm_states (key, state, data, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET state      = excluded.state,
+                                                   data       = excluded.data,
+                                                   updated_at = excluded.updated_at
+                """, upserts)
+            if deletes:
+                conn.executemany("DELETE FROM fsm_states WHERE key = ?", deletes)
+
+    async def flush(self):
+        """Записать накопленные изменения (записи идут строго по очереди)"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            rows = [(key, state, data, updated_at) for key, (state, data, updated_at) in pending.items()]
+            try:
+                await self.db.run_async(self._write, rows)
+                self.flushes += 1
+            except Exception as e:
+                logger.error(f"Failed to save {len(rows)} FSM states: {e}")
+                # Более свежие изменения, сделанные во время записи, не затираем
+                for key, value in pending.items():
+                    self._pending.setdefault(key, value)
+                self._schedule_flush()
+
+    # ============================================
+    # ОЧИСТКА
+    # ============================================
+
+    def _start_cleanup(self):
+        if self.ttl and self.cleanup_interval and (self._cleanup_task is None or self._cleanup_task.done()):
+            self._cleanup_task = asyncio.create_task(self._cleanup_periodically())
+
+    def cleanup(self, batch_size: int = 500) -> int:
+        """
+        Удалить состояния, не менявшиеся дольше ttl (пачками, короткими транзакциями)
+
+        Returns:
+            int: Удалено строк
+        """
+        if not self.ttl:
+            return 0
+        cutoff = now_epoch() - int(self.ttl)
+        removed = 0
+        while True:
+            affected = self.db.execute_update("""
+                DELETE FROM fsm_states
+                WHERE rowid IN (SELECT rowid FROM fsm_states WHERE updated_at < ? LIMIT ?)
+            """, (cutoff, batch_size))
+            removed += affected
+            if affected < batch_size:
+                break
+        return removed
+
+    async def _cleanup_periodically(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                removed = await self.db.run_async(self.cleanup)
+                for key in [key for key, record in self._cache.items() if self._expired(record.updated_at)]:
+                    del self._cache[key]
+                if removed:
+                    logger.info(f"Removed {removed} expired FSM states")
+            except Exception as e:
+                logger.error(f"FSM states cleanup failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша и записи"""
+        total = self.hits + self.misses
+        return {
+            'cached': len(self._cache),
+            'pending': len(self._pending),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'flushes': self.flushes,
+            'coalesced': self.coalesced,
+        }
@@ -6,10 +6,12 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+
 logger = logging.getLogger(__name__)
 
 
-class GroupRepository:
+class GroupRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с группами"""
 
     def __init__(self, db):
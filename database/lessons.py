@@ -6,28 +6,38 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+from .pagination import KeysetPage, KeysetPaginator, PageRequest
+from .timestamps import TimeValue, format_local, to_epoch, window
+
 logger = logging.getLogger(__name__)
 
 
-class LessonRepository:
+class LessonRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с уроками"""
 
     def __init__(self, db):
         self.db = db
 
     def create(self, group_id: int, teacher_id: int, topic: str,
-               lesson_date: str, duration_minutes: int = 60,
+               lesson_date: TimeValue, duration_minutes: int = 60,
                materials: Optional[str] = None, homework: Optional[str] = None) -> Optional[int]:
-        """Создать урок"""
+        """Создать урок (lesson_date — местное время или epoch)"""
         try:
+            lesson_ts = to_epoch(lesson_date)
+            lesson_time = ''
+            if lesson_ts is not None:
+                lesson_date = format_local(lesson_ts)
+                lesson_time = format_local(lesson_ts, "%H:%M")
+
             query = """
-                    INSERT INTO lessons (group_id, teacher_id, topic, lesson_date,
+                    INSERT INTO lessons (group_id, teacher_id, topic, lesson_date, lesson_time, lesson_ts,
                                          duration_minutes, materials, homework)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """
             lesson_id = self.db.execute_insert(query, (group_id, teacher_id, topic,
-                                                       lesson_date, duration_minutes,
-                                                       materials, homework))
+                                                       lesson_date, lesson_time, lesson_ts,
+                                                       duration_minutes, materials, homework))
             logger.info(f"Created lesson {lesson_id}: {topic}")
             return lesson_id
         except Exception as e:
@@ -45,6 +55,43 @@ class LessonRepository:
                 """
         return self.db.execute_query(query, (group_id,))
 
+    def get_page(self, prefix: str, request: Optional[PageRequest] = None,
+                 page_size: int = 10) -> KeysetPage:
+        """Страница всех уроков (последние по дате первыми)"""
+        paginator = KeysetPaginator(
+            self.db,
+            """
+            SELECT l.id,
+                   l.topic,
+                   l.lesson_date,
+                   l.duration_minutes,
+                   g.name as group_name,
+                   t.name as teacher_name
+            FROM lessons l
+                     LEFT JOIN groups g ON l.group_id = g.id
+                     LEFT JOIN teachers t ON l.teacher_id = t.id
+            """,
+            order_by=("l.lesson_date", "l.id"),
+            keys=("lesson_date", "id"),
+            prefix=prefix,
+            page_size=page_size
+        )
+        return paginator.fetch(request=request)
+
+    def get_upcoming(self, minutes: float, limit: int = 100) -> List[Dict]:
+        """Уроки в ближайшие N минут (диапазон по индексу (lesson_ts, id))"""
+        start, end = window(minutes)
+        query = """
+                SELECT l.*, g.name as group_name
+                FROM lessons l
+                         LEFT JOIN groups g ON l.group_id = g.id
+                WHERE l.lesson_ts >= ?
+                  AND l.lesson_ts < ?
+                ORDER BY l.lesson_ts, l.id
+                LIMIT ?
+                """
+        return self.db.execute_query(query, (start, end, limit))
+
     def mark_attendance(self, lesson_id: int, student_id: int,
                         status: str = 'present', notes: Optional[str] = None) -> bool:
         """Отметить посещаемость"""
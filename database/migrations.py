@@ -0,0 +1,859 @@
+"""
+Schema Migrations
+Версионированные идемпотентные миграции схемы (PRAGMA user_version)
+
+Версия схемы хранится в заголовке файла БД. Если она равна
+SCHEMA_VERSION, старт ограничивается одним чтением PRAGMA user_version.
+Шаги, которые только строят индексы (background=True), выполняются
+после старта в отдельном потоке.
+"""
+
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    """Есть ли таблица в БД"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+
+def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    """Есть ли колонка в таблице"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """
+    Добавить колонку, если её ещё нет
+
+    Returns:
+        bool: True если колонка была добавлена
+    """
+    if not table_exists(cursor, table) or column_exists(cursor, table, column):
+        return False
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    logger.info(f"Added column {table}.{column}")
+    return True
+
+
+# ============================================
+# ШАГИ
+# ============================================
+
+# Индексы для постраничных списков (keyset): таблица, индекс, колонки
+PAGINATION_INDEXES = (
+    ('registrations', 'idx_registrations_status_created', ('status_code', 'created_at', 'id')),
+    ('lessons', 'idx_lessons_date_id', ('lesson_date', 'id')),
+    ('admins', 'idx_admins_created', ('created_at', 'id')),
+)
+
+
+def _index_statements(cursor: sqlite3.Cursor, indexes) -> List[str]:
+    """CREATE INDEX для индексов, таблица и колонки которых уже есть"""
+    return [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})"
+        for table, name, columns in indexes
+        if table_exists(cursor, table) and all(column_exists(cursor, table, c) for c in columns)
+    ]
+
+
+def pagination_index_statements(cursor: sqlite3.Cursor) -> List[str]:
+    return _index_statements(cursor, PAGINATION_INDEXES)
+
+
+def ensure_pagination_indexes(cursor: sqlite3.Cursor):
+    """Индексы для постраничных списков (keyset)"""
+    for statement in pagination_index_statements(cursor):
+        try:
+            cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Index not created ({e}): {statement}")
+
+
+def ensure_registration_columns(cursor: sqlite3.Cursor):
+    """Колонки registrations, которые уже используют репозитории и обработчики"""
+    add_column(cursor, 'registrations', 'source', "TEXT DEFAULT 'telegram'")
+    add_column(cursor, 'registrations', 'notes', 'TEXT')
+    add_column(cursor, 'registrations', 'trial_lesson_time', 'TEXT')
+    add_column(cursor, 'registrations', 'consultation_time', 'TEXT')
+    add_column(cursor, 'registrations', 'reminder_sent', 'INTEGER DEFAULT 0')
+    add_column(cursor, 'registrations', 'notified', 'INTEGER DEFAULT 0')
+
+
+# Типы заметок к регистрации
+NOTE_TYPES = ('progress', 'manual', 'system')
+
+
+def ensure_registration_notes(cursor: sqlite3.Cursor):
+    """
+    Таблица registration_notes (append-only) вместо склейки registrations.notes
+
+    Существующие заметки разбиваются по строкам и переносятся; строки
+    "Прогресс: ..." получают тип progress. После переноса
+    registrations.notes очищается.
+    """
+    if not table_exists(cursor, 'registrations'):
+        return
+
+    created = not table_exists(cursor, 'registration_notes')
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS registration_notes
+        (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            registration_id INTEGER NOT NULL,
+            author_id       INTEGER,
+            note_type       TEXT    NOT NULL DEFAULT 'manual'
+                CHECK (note_type IN ({', '.join(f"'{t}'" for t in NOTE_TYPES)})),
+            text            TEXT    NOT NULL,
+            created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (registration_id) REFERENCES registrations (id) ON DELETE CASCADE
+        )
+    """)
+    # Последние N заметок регистрации — обратный проход по индексу
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_registration_notes_reg
+            ON registration_notes(registration_id, id)
+    """)
+
+    if not created or not column_exists(cursor, 'registrations', 'notes'):
+        return
+
+    cursor.execute("""
+        SELECT id, notes, COALESCE(updated_at, created_at)
+        FROM registrations
+        WHERE notes IS NOT NULL AND notes <> ''
+    """)
+    batch = []
+    for reg_id, notes, changed_at in cursor.fetchall():
+        for line in notes.split('\n'):
+            line = line.strip()
+            if line:
+                note_type = 'progress' if line.startswith('Прогресс:') else 'manual'
+                batch.append((reg_id, note_type, line, changed_at))
+
+    if batch:
+        cursor.executemany("""
+            INSERT INTO registration_notes (registration_id, note_type, text, created_at)
+            VALUES (?, ?, ?, ?)
+        """, batch)
+        cursor.execute("UPDATE registrations SET notes = NULL WHERE notes IS NOT NULL")
+        logger.info(f"Moved {len(batch)} registration notes to registration_notes")
+
+
+# Таблицы с нормализованным телефоном
+PHONE_TABLES = ('users', 'registrations')
+
+
+def ensure_phone_columns(cursor: sqlite3.Cursor):
+    """phone_e164 (цифры E.164) и phone_rev (те же цифры задом наперёд)"""
+    for table in PHONE_TABLES:
+        add_column(cursor, table, 'phone_e164', 'TEXT')
+        add_column(cursor, table, 'phone_rev', 'TEXT')
+
+
+def phone_index_statements(cursor: sqlite3.Cursor) -> List[str]:
+    return _index_statements(cursor, [
+        (table, f"idx_{table}_{column}", (column,))
+        for table in PHONE_TABLES
+        for column in ('phone_e164', 'phone_rev')
+    ])
+
+
+def ensure_phone_indexes(cursor: sqlite3.Cursor):
+    """Индексы телефонов: точный поиск и поиск по последним цифрам без LIKE '%...'"""
+    for statement in phone_index_statements(cursor):
+        cursor.execute(statement)
+
+
+def backfill_phones(cursor: sqlite3.Cursor, batch_size: int = 500):
+    """Заполнить phone_e164/phone_rev для строк, записанных до нормализации"""
+    from utils.validators import normalize_phone, reverse_phone
+
+    for table in PHONE_TABLES:
+        if not table_exists(cursor, table) or not column_exists(cursor, table, 'phone_e164'):
+            continue
+
+        last_id = 0
+        updated = 0
+        while True:
+            # phone_e164 = '' — номер не удалось нормализовать, повторно не проверяем
+            cursor.execute(f"""
+                SELECT id, phone FROM {table}
+                WHERE id > ? AND phone_e164 IS NULL AND phone IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            batch = []
+            for row_id, phone in rows:
+                normalized = normalize_phone(phone)
+                batch.append((normalized or '', reverse_phone(normalized), row_id))
+            cursor.executemany(f"UPDATE {table} SET phone_e164 = ?, phone_rev = ? WHERE id = ?", batch)
+            updated += len(batch)
+            last_id = rows[-1][0]
+
+        if updated:
+            logger.info(f"Backfilled normalized phones for {updated} rows in {table}")
+
+
+# Полнотекстовый поиск: rowid = id * 4 + код типа документа,
+# чтобы триггеры удаляли/обновляли документ по rowid без сканирования
+SEARCH_KINDS = {'note': 0, 'user': 1, 'registration': 2, 'feedback': 3}
+
+
+def _fold(expression: str) -> str:
+    """SQL-выражение: ё → е (регистр сворачивает токенизатор unicode61)"""
+    return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _search_sources(cursor: sqlite3.Cursor) -> dict:
+    """Документы поиска: тип -> (таблица, SQL-выражение текста по NEW/OLD)"""
+    sources = {}
+    if table_exists(cursor, 'users'):
+        sources['user'] = ('users', "{row}.full_name", ('full_name',))
+    if table_exists(cursor, 'registrations') and column_exists(cursor, 'registrations', 'notes'):
+        sources['registration'] = (
+            'registrations', "trim(coalesce({row}.full_name, '') || ' ' || coalesce({row}.notes, ''))",
+            ('full_name', 'notes')
+        )
+    if table_exists(cursor, 'feedback') and column_exists(cursor, 'feedback', 'comment'):
+        sources['feedback'] = ('feedback', "{row}.comment", ('comment',))
+    if table_exists(cursor, 'registration_notes'):
+        sources['note'] = ('registration_notes', "{row}.text", ('text',))
+    return sources
+
+
+def ensure_search_index(cursor: sqlite3.Cursor):
+    """
+    FTS5-индекс по именам, заметкам и отзывам с триггерами синхронизации
+
+    Новый источник (индекс или триггеры только что созданы) заполняется
+    из существующих строк.
+    """
+    created = not table_exists(cursor, 'search_index')
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            kind UNINDEXED,
+            ref_id UNINDEXED,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+
+    for kind, (table, text, columns) in _search_sources(cursor).items():
+        code = SEARCH_KINDS[kind]
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                       (f"trg_search_{table}_ai",))
+        populate = created or cursor.fetchone() is None
+
+        new_text = _fold(text.format(row='NEW'))
+        insert = (f"INSERT INTO search_index(rowid, kind, ref_id, body) "
+                  f"SELECT NEW.id * 4 + {code}, '{kind}', NEW.id, {new_text} WHERE {new_text} <> '';")
+        delete = f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {code};"
+
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_search_{table}_ai AFTER INSERT ON {table} "
+                       f"BEGIN {insert} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_search_{table}_au "
+                       f"AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN {delete} {insert} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_search_{table}_ad AFTER DELETE ON {table} "
+                       f"BEGIN {delete} END")
+
+        if populate:
+            row_text = _fold(text.format(row=table))
+            cursor.execute(f"""
+                INSERT INTO search_index(rowid, kind, ref_id, body)
+                SELECT id * 4 + {code}, '{kind}', id, {row_text}
+                FROM {table}
+                WHERE {row_text} <> ''
+            """)
+            logger.info(f"Search index populated from {table}")
+
+
+# Архив: горячая таблица -> таблица архива с теми же колонками
+ARCHIVE_TABLES = {
+    'registrations': 'registrations_archive',
+    'registration_notes': 'registration_notes_archive',
+    'feedback': 'feedback_archive',
+}
+
+# Счётчики статистики: метрика -> (таблица, выражения измерений dim1, dim2)
+# Выражения записаны относительно строки {row} (NEW/OLD в триггерах)
+STATS_METRICS = {
+    'registrations': ('registrations', "''", "''"),
+    'status': ('registrations', "coalesce({row}.status_code, '')", "''"),
+    'course': ('registrations', "coalesce(CAST({row}.course_id AS TEXT), '')", "''"),
+    'course_status': ('registrations', "coalesce(CAST({row}.course_id AS TEXT), '')",
+                      "coalesce({row}.status_code, '')"),
+    'feedback': ('feedback', "''", "''"),
+    'feedback_type': ('feedback', "coalesce({row}.type, '')", "''"),
+    'feedback_rating': ('feedback', "coalesce(CAST({row}.rating AS TEXT), '')", "''"),
+}
+
+# Колонки, изменение которых двигает счётчики
+STATS_COLUMNS = {
+    'registrations': ('status_code', 'course_id'),
+    'feedback': ('type', 'rating'),
+}
+
+
+def _stats_upsert(metric: str, dim1: str, dim2: str, delta: int) -> str:
+    """SQL: прибавить delta к счётчику (строка создаётся при первом обращении)"""
+    return (f"INSERT INTO stats_counters(metric, dim1, dim2, value) "
+            f"VALUES ('{metric}', {dim1}, {dim2}, {delta}) "
+            f"ON CONFLICT(metric, dim1, dim2) DO UPDATE SET value = value + {delta};")
+
+
+def rebuild_stats_counters(cursor: sqlite3.Cursor):
+    """Пересчитать stats_counters с нуля по registrations и feedback (вместе с архивом)"""
+    cursor.execute("DELETE FROM stats_counters")
+    for metric, (table, dim1, dim2) in STATS_METRICS.items():
+        if not table_exists(cursor, table):
+            continue
+        source = table
+        archive = ARCHIVE_TABLES.get(table)
+        if archive and table_exists(cursor, archive):
+            columns = ', '.join(STATS_COLUMNS[table])
+            source = (f"(SELECT {columns} FROM {table} "
+                      f"UNION ALL SELECT {columns} FROM {archive}) AS {table}")
+        dim1, dim2 = dim1.format(row=table), dim2.format(row=table)
+        cursor.execute(f"""
+            INSERT INTO stats_counters(metric, dim1, dim2, value)
+            SELECT '{metric}', {dim1}, {dim2}, COUNT(*)
+            FROM {source}
+            GROUP BY 2, 3
+        """)
+
+
+def _create_stats_triggers(cursor: sqlite3.Cursor, table: str, source: str) -> bool:
+    """
+    Триггеры stats_counters на таблице table по метрикам таблицы source
+
+    Returns:
+        bool: True если триггеров ещё не было (счётчики нужно пересчитать)
+    """
+    columns = STATS_COLUMNS[source]
+    metrics = [(metric, dim1, dim2) for metric, (metric_source, dim1, dim2) in STATS_METRICS.items()
+               if metric_source == source]
+    plus = ' '.join(_stats_upsert(m, d1.format(row='NEW'), d2.format(row='NEW'), 1)
+                    for m, d1, d2 in metrics)
+    minus = ' '.join(_stats_upsert(m, d1.format(row='OLD'), d2.format(row='OLD'), -1)
+                     for m, d1, d2 in metrics)
+    changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                   (f"trg_stats_{table}_ai",))
+    missing = cursor.fetchone() is None
+
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_ai AFTER INSERT ON {table} "
+                   f"BEGIN {plus} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_au "
+                   f"AFTER UPDATE OF {', '.join(columns)} ON {table} WHEN {changed} "
+                   f"BEGIN {minus} {plus} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_ad AFTER DELETE ON {table} "
+                   f"BEGIN {minus} END")
+    return missing
+
+
+def ensure_stats_counters(cursor: sqlite3.Cursor):
+    """
+    Таблица stats_counters, которую ведут триггеры registrations и feedback
+
+    Экраны статистики читают готовые числа одним запросом по первичному
+    ключу вместо COUNT(*) по каждому статусу. При создании таблицы
+    (или новых триггеров) счётчики пересчитываются.
+    """
+    add_column(cursor, 'feedback', 'type', "TEXT DEFAULT 'review'")
+
+    created = not table_exists(cursor, 'stats_counters')
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters
+        (
+            metric TEXT    NOT NULL,
+            dim1   TEXT    NOT NULL DEFAULT '',
+            dim2   TEXT    NOT NULL DEFAULT '',
+            value  INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (metric, dim1, dim2)
+        ) WITHOUT ROWID
+    """)
+
+    rebuild = created
+    for table in STATS_COLUMNS:
+        if not table_exists(cursor, table):
+            continue
+        rebuild = _create_stats_triggers(cursor, table, table) or rebuild
+
+    if rebuild:
+        rebuild_stats_counters(cursor)
+        logger.info("Statistics counters rebuilt")
+
+
+def ensure_status_events(cursor: sqlite3.Cursor):
+    """
+    Журнал смен статуса registration_status_events
+
+    Строку пишут триггеры registrations в той же транзакции, что и
+    саму смену статуса (old_status IS NULL — новая регистрация).
+    Для существующих регистраций при создании журнала записывается
+    одно начальное событие на дату создания: история до этого
+    момента не сохранилась.
+    """
+    if not table_exists(cursor, 'registrations'):
+        return
+
+    created = not table_exists(cursor, 'registration_status_events')
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registration_status_events
+        (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            registration_id INTEGER NOT NULL,
+            old_status      TEXT,
+            new_status      TEXT    NOT NULL,
+            changed_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Окна статистики: new_status IN (...) AND changed_at >= ? — покрывающий индекс
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_events_status_changed
+            ON registration_status_events(new_status, changed_at, old_status)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_status_events_reg
+            ON registration_status_events(registration_id, id)
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_status_events_ai AFTER INSERT ON registrations
+        WHEN NEW.status_code IS NOT NULL
+        BEGIN
+            INSERT INTO registration_status_events (registration_id, old_status, new_status)
+            VALUES (NEW.id, NULL, NEW.status_code);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_status_events_au AFTER UPDATE OF status_code ON registrations
+        WHEN OLD.status_code IS NOT NEW.status_code AND NEW.status_code IS NOT NULL
+        BEGIN
+            INSERT INTO registration_status_events (registration_id, old_status, new_status)
+            VALUES (NEW.id, OLD.status_code, NEW.status_code);
+        END
+    """)
+
+    if created:
+        cursor.execute("""
+            INSERT INTO registration_status_events (registration_id, old_status, new_status, changed_at)
+            SELECT id, NULL, status_code, COALESCE(created_at, CURRENT_TIMESTAMP)
+            FROM registrations
+            WHERE status_code IS NOT NULL
+            ORDER BY id
+        """)
+        logger.info(f"Status history started for {cursor.rowcount} registrations")
+
+
+# UTC epoch рядом с текстовым временем: (таблица, колонка *_ts, варианты исходного выражения)
+# Текстовая колонка остаётся для вывода, запросы по времени идут по *_ts
+EPOCH_COLUMNS = [
+    ('registrations', 'trial_lesson_ts', (('trial_lesson_time',),)),
+    ('registrations', 'consultation_ts', (('consultation_time',),)),
+    ('reminders', 'due_ts', (('remind_at',), ('due_date',))),
+    ('lessons', 'lesson_ts', (('lesson_date', 'lesson_time'), ('lesson_date',))),
+]
+
+EPOCH_INDEXES = [
+    # Напоминания о пробных уроках: reminder_sent = 0 AND trial_lesson_ts BETWEEN ? AND ?
+    ('registrations', 'idx_registrations_trial_due', ('reminder_sent', 'trial_lesson_ts', 'id')),
+    ('registrations', 'idx_registrations_consultation', ('consultation_ts', 'id')),
+    ('reminders', 'idx_reminders_due', ('is_sent', 'due_ts', 'id')),
+    ('lessons', 'idx_lessons_ts', ('lesson_ts', 'id')),
+]
+
+
+def _epoch_source(cursor: sqlite3.Cursor, table: str, variants) -> Optional[tuple]:
+    """Первый вариант исходных колонок, который есть в таблице"""
+    for columns in variants:
+        if all(column_exists(cursor, table, column) for column in columns):
+            return columns
+    return None
+
+
+def ensure_epoch_columns(cursor: sqlite3.Cursor):
+    """Колонки *_ts (INTEGER, UTC epoch)"""
+    for table, ts_column, _ in EPOCH_COLUMNS:
+        add_column(cursor, table, ts_column, 'INTEGER')
+
+
+def epoch_index_statements(cursor: sqlite3.Cursor) -> List[str]:
+    return _index_statements(cursor, EPOCH_INDEXES)
+
+
+def ensure_epoch_indexes(cursor: sqlite3.Cursor):
+    """Индексы по колонкам *_ts"""
+    for statement in epoch_index_statements(cursor):
+        cursor.execute(statement)
+
+
+def backfill_epoch_columns(cursor: sqlite3.Cursor, batch_size: int = 500):
+    """
+    Заполнить *_ts из текстового времени, записанного до перехода на epoch
+
+    Текст разбирается как местное время (Config.TIMEZONE). Строки,
+    которые не удалось разобрать, остаются с NULL.
+    """
+    from .timestamps import to_epoch
+
+    for table, ts_column, variants in EPOCH_COLUMNS:
+        if not table_exists(cursor, table) or not column_exists(cursor, table, ts_column):
+            continue
+        source = _epoch_source(cursor, table, variants)
+        if source is None:
+            continue
+
+        select = ", ".join(source)
+        last_id = 0
+        updated = 0
+        while True:
+            cursor.execute(f"""
+                SELECT id, {select} FROM {table}
+                WHERE id > ? AND {ts_column} IS NULL AND {source[0]} IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            batch = []
+            for row in rows:
+                text = ' '.join(str(part) for part in row[1:] if part not in (None, ''))
+                ts = to_epoch(text)
+                if ts is not None:
+                    batch.append((ts, row[0]))
+            cursor.executemany(f"UPDATE {table} SET {ts_column} = ? WHERE id = ?", batch)
+            updated += len(batch)
+            last_id = rows[-1][0]
+
+        if updated:
+            logger.info(f"Backfilled {table}.{ts_column} for {updated} rows")
+
+
+def sync_archive_columns(cursor: sqlite3.Cursor, table: str, archive: str) -> List[str]:
+    """
+    Добавить в архив колонки, появившиеся в горячей таблице после его создания
+
+    Returns:
+        List[str]: Колонки горячей таблицы (все они есть и в архиве)
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [(row[1], row[2]) for row in cursor.fetchall()]
+    for column, declared_type in columns:
+        add_column(cursor, archive, column, declared_type)
+    return [column for column, _ in columns]
+
+
+def ensure_registration_archive(cursor: sqlite3.Cursor):
+    """
+    Архив регистраций, их заметок и отзывов (см. database/archive.py)
+
+    Таблицы архива повторяют колонки горячих таблиц; у регистраций
+    добавлены archived_at и archive_reason. Триггеры stats_counters
+    на архиве делают перенос нейтральным для статистики: минус в
+    горячей таблице, плюс в архиве.
+    """
+    for table, archive in ARCHIVE_TABLES.items():
+        if not table_exists(cursor, table):
+            continue
+        if not table_exists(cursor, archive):
+            cursor.execute(f"CREATE TABLE {archive} AS SELECT * FROM {table} WHERE 0")
+            logger.info(f"Created archive table {archive}")
+        sync_archive_columns(cursor, table, archive)
+
+    add_column(cursor, 'registrations_archive', 'archived_at', 'TIMESTAMP')
+    add_column(cursor, 'registrations_archive', 'archive_reason', 'TEXT')
+
+    indexes = [
+        ('registrations_archive', 'idx_registrations_archive_id', 'UNIQUE ', ('id',)),
+        ('registrations_archive', 'idx_registrations_archive_user', '', ('user_id',)),
+        ('registrations_archive', 'idx_registrations_archive_phone_rev', '', ('phone_rev',)),
+        ('registration_notes_archive', 'idx_registration_notes_archive_reg', '', ('registration_id', 'id')),
+        ('feedback_archive', 'idx_feedback_archive_reg', '', ('registration_id',)),
+    ]
+    for archive, name, unique, columns in indexes:
+        if table_exists(cursor, archive) and all(column_exists(cursor, archive, c) for c in columns):
+            cursor.execute(f"CREATE {unique}INDEX IF NOT EXISTS {name} ON {archive}({', '.join(columns)})")
+
+    for table in STATS_COLUMNS:
+        archive = ARCHIVE_TABLES[table]
+        if table_exists(cursor, archive) and table_exists(cursor, 'stats_counters'):
+            _create_stats_triggers(cursor, archive, table)
+
+
+def ensure_fsm_storage(cursor: sqlite3.Cursor):
+    """Таблица состояний FSM aiogram (см. database/fsm_storage.py)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fsm_states
+        (
+            key        TEXT PRIMARY KEY,
+            state      TEXT,
+            data       TEXT    NOT NULL DEFAULT '{}',
+            updated_at INTEGER NOT NULL
+        )
+    """)
+    # Очистка брошенных состояний: updated_at < ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fsm_states_updated ON fsm_states(updated_at)")
+
+
+def ensure_broadcasts(cursor: sqlite3.Cursor):
+    """
+    Задания рассылок и состояние доставки каждому получателю
+    (см. database/broadcasts.py), отметка о блокировке бота в users
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS broadcast_jobs
+        (
+            id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+            text                TEXT    NOT NULL,
+            audience            TEXT,
+            status              TEXT    NOT NULL DEFAULT 'running',
+            created_by          INTEGER,
+            progress_chat_id    INTEGER,
+            progress_message_id INTEGER,
+            total               INTEGER NOT NULL DEFAULT 0,
+            sent                INTEGER NOT NULL DEFAULT 0,
+            failed              INTEGER NOT NULL DEFAULT 0,
+            blocked             INTEGER NOT NULL DEFAULT 0,
+            created_at          INTEGER NOT NULL,
+            finished_at         INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries
+        (
+            job_id          INTEGER NOT NULL,
+            telegram_id     INTEGER NOT NULL,
+            status          TEXT    NOT NULL DEFAULT 'pending',
+            attempts        INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL DEFAULT 0,
+            error           TEXT,
+            PRIMARY KEY (job_id, telegram_id)
+        ) WITHOUT ROWID
+    """)
+    # Выборка очередной пачки: job_id = ? AND status = 'pending' AND next_attempt_at <= ?
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_broadcast_deliveries_queue
+        ON broadcast_deliveries(job_id, status, next_attempt_at)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_status ON broadcast_jobs(status)")
+    add_column(cursor, 'users', 'blocked_at', 'INTEGER')
+
+
+def ensure_admin_notifications(cursor: sqlite3.Cursor):
+    """Доставка уведомлений админам: одна строка на (событие, админ)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS admin_notifications
+        (
+            kind       TEXT    NOT NULL,
+            ref        TEXT    NOT NULL,
+            admin_id   INTEGER NOT NULL,
+            status     TEXT    NOT NULL DEFAULT 'pending',
+            attempts   INTEGER NOT NULL DEFAULT 0,
+            error      TEXT,
+            created_at INTEGER NOT NULL,
+            sent_at    INTEGER,
+            PRIMARY KEY (kind, ref, admin_id)
+        ) WITHOUT ROWID
+    """)
+    # Последние ошибки доставки: status = 'failed' ORDER BY created_at DESC
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_notifications_status
+        ON admin_notifications(status, created_at)
+    """)
+
+
+def ensure_broadcast_job_errors(cursor: sqlite3.Cursor):
+    """Причина, по которой рассылка остановлена (показывается админу)"""
+    add_column(cursor, 'broadcast_jobs', 'error', 'TEXT')
+
+
+
+def ensure_lesson_columns(cursor: sqlite3.Cursor):
+    """Колонки lessons из optimized_schema.sql, которых нет во встроенной схеме"""
+    add_column(cursor, 'lessons', 'duration_minutes', 'INTEGER DEFAULT 60')
+    add_column(cursor, 'lessons', 'materials', 'TEXT')
+
+
+
+# ============================================
+# ВЕРСИИ
+# ============================================
+
+@dataclass(frozen=True)
+class Migration:
+    """Шаг миграции: версия схемы, которую он даёт"""
+    version: int
+    apply: Callable[[sqlite3.Cursor], None]
+    background: bool = False  # Только индексы — выполняется после старта в отдельном потоке
+    # Для фонового шага: список CREATE INDEX, каждый выполняется в своей короткой транзакции
+    statements: Optional[Callable[[sqlite3.Cursor], List[str]]] = None
+
+    @property
+    def name(self) -> str:
+        return self.apply.__name__
+
+
+# Порядок и номера не меняются: новые шаги только добавляются в конец.
+# Каждый шаг идемпотентен — его можно повторить после сбоя.
+MIGRATIONS: List[Migration] = [
+    Migration(1, ensure_registration_columns),
+    Migration(2, ensure_registration_notes),
+    Migration(3, ensure_phone_columns),
+    Migration(4, backfill_phones),
+    Migration(5, ensure_search_index),
+    Migration(6, ensure_stats_counters),
+    Migration(7, ensure_status_events),
+    Migration(8, ensure_epoch_columns),
+    Migration(9, backfill_epoch_columns),
+    Migration(10, ensure_pagination_indexes, background=True, statements=pagination_index_statements),
+    Migration(11, ensure_phone_indexes, background=True, statements=phone_index_statements),
+    Migration(12, ensure_epoch_indexes, background=True, statements=epoch_index_statements),
+    Migration(13, ensure_registration_archive),
+    Migration(14, ensure_fsm_storage),
+    Migration(15, ensure_broadcasts),
+    Migration(16, ensure_admin_notifications),
+    Migration(17, ensure_broadcast_job_errors),
+    Migration(18, ensure_lesson_columns),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_user_version(conn: sqlite3.Connection) -> int:
+    """Версия схемы из заголовка БД"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _apply(cursor: sqlite3.Cursor, migration: Migration) -> bool:
+    """Выполнить шаг в SAVEPOINT; при ошибке откатить только его"""
+    savepoint = f"migration_{migration.version}"
+    cursor.execute(f"SAVEPOINT {savepoint}")
+    try:
+        migration.apply(cursor)
+        cursor.execute(f"RELEASE {savepoint}")
+        logger.info(f"Migration {migration.version} ({migration.name}) applied")
+        return True
+    except Exception as e:
+        cursor.execute(f"ROLLBACK TO {savepoint}")
+        cursor.execute(f"RELEASE {savepoint}")
+        logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+        return False
+
+
+class MigrationRunner:
+    """
+    Применяет миграции с версией больше PRAGMA user_version
+
+    user_version поднимается только до последнего шага, перед которым
+    выполнены все предыдущие: если фоновый шаг не успел завершиться
+    (или какой-то шаг упал), при следующем старте невыполненные шаги
+    повторятся.
+    """
+
+    def __init__(self, migrations: Iterable[Migration] = MIGRATIONS):
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.target = self.migrations[-1].version if self.migrations else 0
+        self.applied: Set[int] = set()
+        self.deferred: List[Migration] = []
+
+    def _bump(self, cursor: sqlite3.Cursor):
+        """Поднять user_version до последнего непрерывно выполненного шага"""
+        current = cursor.execute("PRAGMA user_version").fetchone()[0]
+        version = current
+        for migration in self.migrations:
+            if migration.version <= current:
+                continue
+            if migration.version not in self.applied:
+                break
+            version = migration.version
+        if version != current:
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+    def run(self, conn: sqlite3.Connection, defer_background: bool = True) -> List[Migration]:
+        """
+        Выполнить ожидающие шаги (кроме фоновых, если defer_background)
+
+        Ошибка шага останавливает дальнейшие шаги: они могут от него зависеть.
+
+        Args:
+            conn: Подключение (внутри транзакции get_connection())
+            defer_background: Отложить фоновые шаги
+
+        Returns:
+            List[Migration]: Отложенные шаги для run_deferred()
+        """
+        current = get_user_version(conn)
+        if current >= self.target:
+            return []
+
+        cursor = conn.cursor()
+        self.deferred = []
+        for migration in self.migrations:
+            if migration.version <= current:
+                continue
+            if migration.background and defer_background:
+                self.deferred.append(migration)
+                continue
+            if not _apply(cursor, migration):
+                break
+            self.applied.add(migration.version)
+
+        self._bump(cursor)
+        return list(self.deferred)
+
+    def run_deferred(self, transaction: Callable, pause: float = 0.05):
+        """
+        Выполнить отложенные шаги
+
+        Построение индекса держит блокировку записи, поэтому каждый
+        CREATE INDEX идёт в своей короткой транзакции, а между ними —
+        пауза, чтобы ожидающие записи обработчиков успели пройти.
+        user_version поднимается после каждого шага.
+
+        Args:
+            transaction: Фабрика транзакций (Database.transaction)
+            pause: Пауза между индексами (сек)
+        """
+        for migration in self.deferred:
+            if migration.statements is None:
+                with transaction() as conn:
+                    cursor = conn.cursor()
+                    if _apply(cursor, migration):
+                        self.applied.add(migration.version)
+                        self._bump(cursor)
+                continue
+
+            with transaction(immediate=False) as conn:
+                statements = migration.statements(conn.cursor())
+            try:
+                for statement in statements:
+                    with transaction() as conn:
+                        conn.execute(statement)
+                    time.sleep(pause)
+            except sqlite3.Error as e:
+                # Шаг повторится при следующем запуске (CREATE INDEX IF NOT EXISTS)
+                logger.error(f"Migration {migration.version} ({migration.name}) failed: {e}")
+                continue
+
+            with transaction() as conn:
+                self.applied.add(migration.version)
+                self._bump(conn.cursor())
+            logger.info(f"Migration {migration.version} ({migration.name}) applied "
+                        f"({len(statements)} indexes)")
+        self.deferred = []
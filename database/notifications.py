@@ -0,0 +1,87 @@
+"""
+Admin Notifications
+Учёт доставки уведомлений администраторам
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .aio import AsyncRepositoryMixin
+from .timestamps import now_epoch
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_PENDING = 'pending'
+NOTIFY_SENT = 'sent'
+NOTIFY_FAILED = 'failed'
+
+
+class AdminNotificationRepository(AsyncRepositoryMixin):
+    """
+    Репозиторий уведомлений админам
+
+    Событие (kind, ref) — например ('registration', '42') — каждому
+    админу доставляется не больше одного раза: claim() выдаёт только
+    тех админов, кому это событие ещё не отправлялось.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def claim(self, kind: str, ref: str, admin_ids: Iterable[int]) -> List[int]:
+        """
+        Записать событие для админов, которым оно ещё не отправлялось
+
+        Returns:
+            List[int]: Кому отправлять
+        """
+        created_at = now_epoch()
+        claimed = []
+        with self.db.transaction() as conn:
+            for admin_id in admin_ids:
+                cursor = conn.execute("""
+                    INSERT OR IGNORE INTO admin_notifications (kind, ref, admin_id, created_at)
+                    VALUES (?, ?, ?, ?)
+                """, (kind, ref, admin_id, created_at))
+                if cursor.rowcount:
+                    claimed.append(admin_id)
+        return claimed
+
+    def record(self, kind: str, ref: str, results: List[Tuple[int, str, Optional[str], int]]):
+        """
+        Записать итоги отправки
+
+        Args:
+            kind: Тип события
+            ref: ID события
+            results: (admin_id, статус, ошибка, попыток)
+        """
+        sent_at = now_epoch()
+        with self.db.transaction() as conn:
+            conn.executemany("""
+                UPDATE admin_notifications
+                SET status = ?, error = ?, attempts = ?, sent_at = ?
+                WHERE kind = ? AND ref = ? AND admin_id = ?
+            """, [(status, error, attempts, sent_at if status == NOTIFY_SENT else None, kind, ref, admin_id)
+                  for admin_id, status, error, attempts in results])
+
+    def get_failures(self, limit: int = 10) -> List[Dict]:
+        """Последние недоставленные уведомления"""
+        query = """
+                SELECT kind, ref, admin_id, attempts, error, created_at
+                FROM admin_notifications
+                WHERE status = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+                """
+        return self.db.execute_query(query, (NOTIFY_FAILED, limit))
+
+    def get_summary(self, since: int = 0) -> Dict[str, int]:
+        """Сколько уведомлений в каждом статусе (начиная с since epoch)"""
+        rows = self.db.execute_query("""
+            SELECT status, COUNT(*) AS count
+            FROM admin_notifications
+            WHERE created_at >= ?
+            GROUP BY status
+        """, (since,))
+        return {row['status']: row['count'] for row in rows}
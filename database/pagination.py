@@ -0,0 +1,292 @@
+"""
+Keyset Pagination
+Постраничный вывод списков без OFFSET и COUNT(*)
+
+Страница выбирается условием (created_at, id) < (?, ?) по индексу,
+поэтому её стоимость не зависит от размера таблицы. Курсор
+(значения ключей последней/первой строки) кодируется в callback_data.
+"""
+
+import calendar
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram на callback_data (байт)
+MAX_CALLBACK_LENGTH = 64
+
+NEXT = 'n'
+PREV = 'p'
+
+_TIMESTAMP_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+_BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _to_base36(value: int) -> str:
+    if value < 0:
+        return '-' + _to_base36(-value)
+    digits = ''
+    while True:
+        value, digit = divmod(value, 36)
+        digits = _BASE36[digit] + digits
+        if not value:
+            return digits
+
+
+def _escape(text: str) -> str:
+    # Экранируются только разделители курсора и '%': кириллица остаётся
+    # 2 байтами UTF-8 вместо 6 в percent-encoding
+    return text.replace('%', '%25').replace(',', '%2C').replace(':', '%3A')
+
+
+def _timestamp_seconds(text: str) -> Optional[int]:
+    if not _TIMESTAMP_RE.match(text):
+        return None
+    try:
+        return calendar.timegm(time.strptime(text, _TIMESTAMP_FORMAT))
+    except ValueError:
+        return None  # Похоже на метку времени, но не дата — кодируется как строка
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Компактно закодировать значения ключей
+
+    Целые — в base36, метки времени SQLite ('2025-01-31 14:30:00') —
+    секунды в base36 (6 символов), остальные строки — как есть
+    с экранированием разделителей.
+
+    Args:
+        values: Значения колонок сортировки
+
+    Returns:
+        str: Курсор без символов ':' и ','
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append('n')
+        elif isinstance(value, int):
+            parts.append(f"b{_to_base36(value)}")
+        elif isinstance(value, float):
+            parts.append(f"f{value!r}")
+        else:
+            text = str(value)
+            seconds = _timestamp_seconds(text)
+            if seconds is not None:
+                parts.append('e' + _to_base36(seconds))
+            else:
+                parts.append('s' + _escape(text))
+    return ','.join(parts)
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ...]:
+    """
+    Раскодировать курсор, созданный encode_cursor()
+
+    Понимает и прежний формат ('i' — десятичные целые, 't' — 14 цифр):
+    такие курсоры остаются в уже отправленных клавиатурах.
+
+    Raises:
+        ValueError: Курсор повреждён
+    """
+    values = []
+    for part in cursor.split(','):
+        kind, raw = part[:1], part[1:]
+        if kind == 'n':
+            values.append(None)
+        elif kind == 'b':
+            values.append(int(raw, 36))
+        elif kind == 'i':
+            values.append(int(raw))
+        elif kind == 'f':
+            values.append(float(raw))
+        elif kind == 'e':
+            values.append(time.strftime(_TIMESTAMP_FORMAT, time.gmtime(int(raw, 36))))
+        elif kind == 't':
+            if len(raw) != 14 or not raw.isdigit():
+                raise ValueError(f"Bad timestamp in cursor: {part}")
+            values.append(f"{raw[0:4]}-{raw[4:6]}-{raw[6:8]} {raw[8:10]}:{raw[10:12]}:{raw[12:14]}")
+        elif kind == 's':
+            values.append(unquote(raw))
+        else:
+            raise ValueError(f"Bad cursor part: {part}")
+    return tuple(values)
+
+
+@dataclass
+class PageRequest:
+    """Запрос страницы, разобранный из callback_data"""
+    page: int = 1
+    direction: str = NEXT
+    cursor: Optional[Tuple[Any, ...]] = None
+
+
+def parse_page_callback(data: str, prefix: str) -> PageRequest:
+    """
+    Разобрать callback_data вида '{prefix}:{page}:{n|p}:{cursor}'
+
+    Голый prefix (без ':') — первая страница. Повреждённые данные
+    тоже дают первую страницу.
+
+    Args:
+        data: callback.data
+        prefix: Префикс списка
+
+    Returns:
+        PageRequest
+    """
+    if not data.startswith(prefix + ':'):
+        return PageRequest()
+    try:
+        page, direction, cursor = data[len(prefix) + 1:].split(':', 2)
+        if direction not in (NEXT, PREV):
+            raise ValueError(f"Bad direction: {direction}")
+        return PageRequest(page=max(1, int(page)), direction=direction, cursor=decode_cursor(cursor))
+    except ValueError as e:
+        logger.warning(f"Bad pagination callback {data!r}: {e}")
+        return PageRequest()
+
+
+@dataclass
+class KeysetPage:
+    """Одна страница списка"""
+    rows: List[Dict[str, Any]]
+    page: int
+    has_prev: bool
+    has_next: bool
+    prefix: str
+    page_size: int
+    keys: Sequence[str] = field(default_factory=tuple)
+
+    def _callback(self, page: int, direction: str, row: Dict[str, Any]) -> Optional[str]:
+        data = f"{self.prefix}:{page}:{direction}:{encode_cursor([row[key] for key in self.keys])}"
+        if len(data.encode('utf-8')) > MAX_CALLBACK_LENGTH:
+            # Telegram отклонит всю клавиатуру (BUTTON_DATA_INVALID) — лучше без кнопки
+            logger.warning(f"Pagination callback is longer than {MAX_CALLBACK_LENGTH} bytes, "
+                           f"button dropped: {data!r}")
+            return None
+        return data
+
+    @property
+    def next_callback(self) -> Optional[str]:
+        """callback_data следующей страницы (None если её нет или курсор не влезает в 64 байта)"""
+        if not self.has_next or not self.rows:
+            return None
+        return self._callback(self.page + 1, NEXT, self.rows[-1])
+
+    @property
+    def prev_callback(self) -> Optional[str]:
+        """callback_data предыдущей страницы (None если её нет или курсор не влезает в 64 байта)"""
+        if not self.has_prev or not self.rows:
+            return None
+        if self.page == 2:
+            return self.prefix  # Первая страница — без курсора
+        return self._callback(self.page - 1, PREV, self.rows[0])
+
+    @property
+    def start_index(self) -> int:
+        """Порядковый номер первой строки страницы (с 1)"""
+        return (self.page - 1) * self.page_size + 1
+
+
+class KeysetPaginator:
+    """
+    Постраничная выборка по ключу сортировки
+
+    Все колонки сортировки идут в одном направлении, последняя должна
+    быть уникальной (обычно id). Колонки не должны содержать NULL,
+    иначе такие строки выпадут из условия курсора. Для быстрой
+    выборки нужен индекс по (фильтр..., колонки сортировки).
+
+    Example:
+        >>> paginator = KeysetPaginator(
+        ...     db, "SELECT id, full_name, created_at FROM registrations r",
+        ...     order_by=("r.created_at", "r.id"), keys=("created_at", "id"),
+        ...     prefix="view_students_trial", page_size=10)
+        >>> page = paginator.fetch("r.status_code = ?", ("trial",), request)
+    """
+
+    def __init__(self, db, select: str, order_by: Sequence[str], keys: Sequence[str],
+                 prefix: str, page_size: int = 10, descending: bool = True):
+        """
+        Args:
+            db: Database
+            select: SELECT ... FROM ... JOIN ... без WHERE/ORDER BY/LIMIT
+            order_by: Выражения сортировки в SQL
+            keys: Имена этих же колонок в строках результата
+            prefix: Префикс callback_data списка
+            page_size: Строк на странице
+            descending: Сортировка по убыванию
+        """
+        if len(order_by) != len(keys):
+            raise ValueError("order_by and keys must have the same length")
+        self.db = db
+        self.select = select
+        self.order_by = tuple(order_by)
+        self.keys = tuple(keys)
+        self.prefix = prefix
+        self.page_size = max(1, page_size)
+        self.descending = descending
+
+    def _build(self, where: str, forward: bool, with_cursor: bool) -> str:
+        # forward=True — в порядке списка; False — обратный проход для "назад"
+        descending = self.descending if forward else not self.descending
+        conditions = [f"({where})"] if where else []
+        if with_cursor:
+            columns = ', '.join(self.order_by)
+            placeholders = ', '.join('?' for _ in self.order_by)
+            conditions.append(f"({columns}) {'<' if descending else '>'} ({placeholders})")
+
+        order = ', '.join(f"{column} {'DESC' if descending else 'ASC'}" for column in self.order_by)
+        query = self.select
+        if conditions:
+            query += "\nWHERE " + " AND ".join(conditions)
+        return f"{query}\nORDER BY {order}\nLIMIT ?"
+
+    def fetch(self, where: str = "", params: tuple = (),
+              request: Optional[PageRequest] = None) -> KeysetPage:
+        """
+        Получить страницу
+
+        Выбирается page_size + 1 строк: лишняя строка только
+        показывает, что дальше есть ещё.
+
+        Args:
+            where: Дополнительное условие (без WHERE)
+            params: Параметры условия
+            request: Запрошенная страница (None — первая)
+
+        Returns:
+            KeysetPage
+        """
+        request = request or PageRequest()
+        cursor = request.cursor
+        forward = request.direction == NEXT
+
+        query = self._build(where, forward, cursor is not None)
+        query_params = tuple(params) + (tuple(cursor) if cursor is not None else ()) + (self.page_size + 1,)
+        rows = self.db.execute_query(query, query_params)
+
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if forward:
+            return KeysetPage(rows=rows, page=request.page if cursor is not None else 1,
+                              has_prev=cursor is not None, has_next=more,
+                              prefix=self.prefix, page_size=self.page_size, keys=self.keys)
+
+        if not rows:
+            # Строки перед курсором удалены — начинаем сначала
+            return self.fetch(where, params)
+
+        rows.reverse()
+        return KeysetPage(rows=rows, page=request.page if more else 1,
+                          has_prev=more, has_next=True,
+                          prefix=self.prefix, page_size=self.page_size, keys=self.keys)
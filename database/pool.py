@@ -0,0 +1,254 @@
+"""
+Connection Pool
+Пул постоянных подключений к SQLite (WAL, busy_timeout, PRAGMA-профили)
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Готовые наборы PRAGMA. Профиль выбирается в Config.DB_PRAGMA_PROFILE,
+# отдельные значения можно переопределить через Config.DB_PRAGMAS
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Максимальная надёжность: fsync на каждый коммит
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'temp_store': 'MEMORY',
+    },
+    # Профиль по умолчанию: WAL + NORMAL (fsync только на checkpoint)
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,  # ~16 MB на подключение
+        'mmap_size': 134217728,  # 128 MB
+    },
+    # Для массовых импортов и пересборки БД
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'temp_store': 'MEMORY',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+    },
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Не удалось получить подключение из пула за отведённое время"""
+
+
+class ConnectionPool:
+    """
+    Пул переиспользуемых подключений к одной БД
+
+    Подключение закрепляется за владельцем на время аренды: повторный
+    acquire() того же владельца возвращает то же подключение (это нужно
+    для вложенных вызовов get_connection). Владелец — поток, а в потоке
+    с работающим event loop — текущая задача asyncio: обработчики,
+    которые держат синхронный transaction() через await, не делят одно
+    подключение и одну BEGIN IMMEDIATE. После release() подключение
+    возвращается в пул и может быть выдано другому владельцу.
+
+    Example:
+        >>> pool = ConnectionPool("education_center.db", max_size=4)
+        >>> conn = pool.acquire()
+        >>> try:
+        ...     conn.execute("SELECT 1")
+        ... finally:
+        ...     pool.release(conn)
+    """
+
+    def __init__(self, db_path: str, max_size: int = 8, busy_timeout_ms: int = 5000,
+                 pragma_profile: str = DEFAULT_PROFILE,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 acquire_timeout: float = 30.0):
+        if pragma_profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile: {pragma_profile}")
+
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self.pragma_profile = pragma_profile
+        self.pragmas = dict(PRAGMA_PROFILES[pragma_profile])
+        self.pragmas.update(pragmas or {})
+
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        self._cond = threading.Condition()
+        self._leases: Dict[Tuple[int, Optional[asyncio.Task]], List] = {}  # владелец -> [conn, depth]
+        self._closed = False
+
+        # Статистика
+        self._created = 0
+        self._reused = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._acquired = 0
+
+    # ============================================
+    # СОЗДАНИЕ ПОДКЛЮЧЕНИЙ
+    # ============================================
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть новое подключение и применить PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False  # Подключение переходит между потоками через пул
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"Failed to apply PRAGMA {name}={value}: {e}")
+        return conn
+
+    def connect_detached(self) -> sqlite3.Connection:
+        """
+        Отдельное подключение с теми же PRAGMA, не входящее в пул
+
+        Нужно для долгих чтений (потоковая выдача), которые не должны
+        занимать подключение пула. Закрывает вызывающий.
+        """
+        return self._connect()
+
+    # ============================================
+    # АРЕНДА
+    # ============================================
+
+    @staticmethod
+    def _owner() -> Tuple[int, Optional[asyncio.Task]]:
+        """Владелец аренды: поток и (в потоке event loop) текущая задача"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return threading.get_ident(), None
+        return threading.get_ident(), asyncio.current_task()
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Получить подключение для текущего потока (задачи asyncio)
+
+        Returns:
+            sqlite3.Connection: Подключение (повторный вызов того же
+            владельца до release() вернёт его же)
+
+        Raises:
+            PoolTimeoutError: Все подключения заняты дольше acquire_timeout
+        """
+        owner = self._owner()
+        lease = self._leases.get(owner)
+        if lease is not None:
+            lease[1] += 1
+            return lease[0]
+
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+
+            conn = None
+            started = None
+            while conn is None:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._reused += 1
+                elif len(self._all) < self.max_size:
+                    conn = self._connect()
+                    self._all.append(conn)
+                    self._created += 1
+                else:
+                    if started is None:
+                        started = time.monotonic()
+                        self._waits += 1
+                    remaining = self.acquire_timeout - (time.monotonic() - started)
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise PoolTimeoutError(
+                            f"No free connection in pool after {self.acquire_timeout}s"
+                        )
+
+            if started is not None:
+                self._wait_time += time.monotonic() - started
+            self._acquired += 1
+
+            self._leases[owner] = [conn, 1]
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Вернуть подключение в пул (учитывает вложенные acquire)"""
+        owner = self._owner()
+        lease = self._leases.get(owner)
+        if lease is None or lease[0] is not conn:
+            raise sqlite3.ProgrammingError("Connection is not leased by this thread or task")
+
+        lease[1] -= 1
+        if lease[1] > 0:
+            return
+
+        with self._cond:
+            del self._leases[owner]
+            if conn.in_transaction:
+                # Незавершённая транзакция не должна утечь к следующему потоку
+                conn.rollback()
+            if self._closed:
+                conn.close()
+                self._all.remove(conn)
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @property
+    def depth(self) -> int:
+        """Глубина вложенности аренды текущего владельца (0 — не арендовано)"""
+        lease = self._leases.get(self._owner())
+        return lease[1] if lease is not None else 0
+
+    # ============================================
+    # ОБСЛУЖИВАНИЕ
+    # ============================================
+
+    def close_all(self):
+        """Закрыть все свободные подключения; занятые закроются при release()"""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+                self._all.remove(conn)
+            self._idle.clear()
+            self._cond.notify_all()
+        logger.info("Connection pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Статистика пула
+
+        Returns:
+            Dict: size, idle, in_use, created, reused, waits, avg_wait_ms, ...
+        """
+        with self._cond:
+            size = len(self._all)
+            idle = len(self._idle)
+            return {
+                'db_path': self.db_path,
+                'profile': self.pragma_profile,
+                'max_size': self.max_size,
+                'size': size,
+                'idle': idle,
+                'in_use': size - idle,
+                'acquired': self._acquired,
+                'created': self._created,
+                'reused': self._reused,
+                'waits': self._waits,
+                'avg_wait_ms': round(self._wait_time / self._waits * 1000, 3) if self._waits else 0.0,
+            }
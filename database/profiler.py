@@ -0,0 +1,234 @@
+"""
+Query Profiler
+Статистика запросов по "форме" SQL, лог медленных запросов с EXPLAIN QUERY PLAN
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Форма запроса: литералы заменены на ?, списки IN (?, ?, ...) свёрнуты,
+    пробелы и переносы (включая '\\' из многострочных строк) схлопнуты
+
+    Example:
+        >>> normalize_query("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'")
+        'SELECT * FROM t WHERE id IN (?...) AND name = ?'
+    """
+    shape = query.replace('\\', ' ')
+    shape = _STRING_RE.sub('?', shape)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _SPACE_RE.sub(' ', shape).strip()
+    return _IN_LIST_RE.sub('(?...)', shape)
+
+
+def _is_full_scan(detail: str) -> bool:
+    """Строка плана — полный проход по таблице (не по индексу)"""
+    return (detail.startswith('SCAN ')
+            and 'USING' not in detail
+            and 'CONSTANT ROW' not in detail)
+
+
+class _ShapeStats:
+    """Накопленная статистика одной формы запроса"""
+
+    __slots__ = ('shape', 'count', 'total', 'max', 'rows', 'samples', 'slow',
+                 'plan', 'full_scan', 'last_query')
+
+    def __init__(self, shape: str, sample_size: int):
+        self.shape = shape
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=sample_size)  # Последние N длительностей — для p50/p99
+        self.slow = 0
+        self.plan: Optional[List[str]] = None
+        self.full_scan = False
+        self.last_query = ''
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'shape': self.shape,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows,
+            'slow': self.slow,
+            'full_scan': self.full_scan,
+            'plan': self.plan,
+        }
+
+
+class QueryProfiler:
+    """
+    Профилировщик запросов Database.execute_*
+
+    Включается явно (Config.DB_PROFILE или db.enable_profiling()).
+    Для медленного запроса (дольше slow_ms) один раз на форму
+    выполняется EXPLAIN QUERY PLAN на том же подключении; полный проход
+    по таблице помечается full_scan и пишется в лог.
+    """
+
+    def __init__(self, slow_ms: float = 50.0, sample_size: int = 512,
+                 max_shapes: int = 500, explain: bool = True):
+        """
+        Args:
+            slow_ms: Порог медленного запроса (мс)
+            sample_size: Сколько последних длительностей хранить на форму
+            max_shapes: Максимум форм (самые старые вытесняются)
+            explain: Снимать EXPLAIN QUERY PLAN для медленных запросов
+        """
+        self.slow_ms = slow_ms
+        self.sample_size = sample_size
+        self.max_shapes = max_shapes
+        self.explain = explain
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._shapes: "OrderedDict[str, _ShapeStats]" = OrderedDict()
+        self._normalized: "OrderedDict[str, str]" = OrderedDict()
+
+    def _shape(self, query: str) -> str:
+        """Форма запроса (нормализация кэшируется по тексту)"""
+        shape = self._normalized.get(query)
+        if shape is None:
+            shape = normalize_query(query)
+            self._normalized[query] = shape
+            if len(self._normalized) > self.max_shapes * 4:
+                self._normalized.popitem(last=False)
+        return shape
+
+    def record(self, conn: sqlite3.Connection, query: str, params: tuple,
+               elapsed: float, rows: int):
+        """
+        Учесть выполненный запрос
+
+        Args:
+            conn: Подключение, на котором выполнялся запрос (для EXPLAIN)
+            query: Текст запроса
+            params: Параметры
+            elapsed: Длительность (сек)
+            rows: Строк возвращено/изменено
+        """
+        with self._lock:
+            shape = self._shape(query)
+            stats = self._shapes.get(shape)
+            if stats is None:
+                stats = _ShapeStats(shape, self.sample_size)
+                self._shapes[shape] = stats
+                if len(self._shapes) > self.max_shapes:
+                    self._shapes.popitem(last=False)
+            else:
+                self._shapes.move_to_end(shape)
+
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.rows += max(rows, 0)
+            stats.samples.append(elapsed)
+
+            slow = elapsed * 1000 >= self.slow_ms
+            if slow:
+                stats.slow += 1
+                stats.last_query = query
+            need_plan = slow and self.explain and stats.plan is None
+
+        if not slow:
+            return
+
+        if need_plan:
+            plan = self._explain(conn, query, params)
+            with self._lock:
+                stats.plan = plan
+                stats.full_scan = any(_is_full_scan(line) for line in plan)
+
+        logger.warning(
+            f"Slow query {elapsed * 1000:.1f} ms, {rows} rows"
+            f"{' [FULL SCAN]' if stats.full_scan else ''}: {stats.shape}"
+            + (f"\n  plan: {' | '.join(stats.plan)}" if need_plan and stats.plan else "")
+        )
+
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, query: str, params: tuple) -> List[str]:
+        """EXPLAIN QUERY PLAN (ошибка плана не мешает работе)"""
+        try:
+            cursor = conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def report(self, top: int = 20, sort: str = 'total_ms') -> List[Dict[str, Any]]:
+        """
+        Самые тяжёлые формы запросов
+
+        Args:
+            top: Сколько форм вернуть
+            sort: Поле сортировки (total_ms, p99_ms, count, rows, ...)
+
+        Returns:
+            List[Dict]: shape, count, total_ms, avg_ms, p50_ms, p99_ms,
+            max_ms, rows, slow, full_scan, plan
+        """
+        with self._lock:
+            items = [stats.as_dict() for stats in self._shapes.values()]
+        items.sort(key=lambda item: item.get(sort) or 0, reverse=True)
+        return items[:top]
+
+    def summary(self) -> Dict[str, Any]:
+        """Общие цифры: запросов, время, медленных, форм с полным проходом"""
+        with self._lock:
+            shapes = list(self._shapes.values())
+        return {
+            'since': self.started_at,
+            'shapes': len(shapes),
+            'queries': sum(stats.count for stats in shapes),
+            'total_ms': round(sum(stats.total for stats in shapes) * 1000, 3),
+            'slow': sum(stats.slow for stats in shapes),
+            'full_scans': sum(1 for stats in shapes if stats.full_scan),
+            'slow_ms': self.slow_ms,
+        }
+
+    def dump(self, path: str, top: Optional[int] = None) -> str:
+        """
+        Сохранить статистику в JSON
+
+        Returns:
+            str: Путь к файлу
+        """
+        data = {
+            'summary': self.summary(),
+            'queries': self.report(top=top or self.max_shapes),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"Query profile saved to {path}")
+        return path
+
+    def reset(self):
+        """Очистить статистику"""
+        with self._lock:
+            self._shapes.clear()
+            self.started_at = time.time()
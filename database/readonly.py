@@ -0,0 +1,162 @@
+"""
+Read-only Reader
+Отдельный маршрут только для чтения для отчётов и тяжёлой статистики
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from urllib.request import pathname2url
+
+from .aio import AsyncExecutor
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA пула, которые имеют смысл для читающего подключения
+# (journal_mode и synchronous на mode=ro не меняются)
+READER_PRAGMAS = ('cache_size', 'mmap_size', 'temp_store')
+
+
+class ReadOnlyReader:
+    """
+    Подключения mode=ro + query_only на выделенных потоках
+
+    Отчёты выполняются в своём пуле потоков (по умолчанию один поток),
+    поэтому долгий GROUP BY не занимает потоки и подключения, через
+    которые идут регистрации. В WAL читатель работает со снимком БД
+    и не блокирует писателя; snapshot() растягивает один снимок на
+    несколько запросов, чтобы цифры отчёта были согласованы между собой.
+
+    Example:
+        >>> rows = await db.readonly.aquery("SELECT status_code, COUNT(*) FROM registrations GROUP BY 1")
+        >>> report = await db.readonly.areport(db.stats.get_overview)  # все запросы в одном снимке
+    """
+
+    def __init__(self, db, workers: int = 1, timeout: Optional[float] = 60.0):
+        """
+        Args:
+            db: Database (путь, PRAGMA пула, профилировщик)
+            workers: Потоков для отчётов
+            timeout: Таймаут одного async-вызова (сек)
+        """
+        self.db = db
+        self.executor = AsyncExecutor(max_workers=workers, default_timeout=timeout,
+                                      thread_name_prefix="db-report")
+        self._local = threading.local()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    # ============================================
+    # ПОДКЛЮЧЕНИЯ
+    # ============================================
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть подключение только для чтения"""
+        pool = self.db.pool
+        uri = f"file:{pathname2url(os.path.abspath(self.db.db_name))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=pool.busy_timeout_ms / 1000,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute(f"PRAGMA busy_timeout = {int(pool.busy_timeout_ms)}")
+        for name in READER_PRAGMAS:
+            if name in pool.pragmas:
+                try:
+                    conn.execute(f"PRAGMA {name} = {pool.pragmas[name]}")
+                except sqlite3.DatabaseError as e:
+                    logger.warning(f"Failed to apply PRAGMA {name} on reader: {e}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Подключение текущего потока (создаётся при первом обращении)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Read-only reader is closed")
+                conn = self._connect()
+                self._all.append(conn)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Один снимок БД на все запросы внутри блока
+
+        Вложенный snapshot() присоединяется к внешнему.
+
+        Yields:
+            sqlite3.Connection: Подключение только для чтения
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.rollback()  # Изменений нет: просто отпускаем снимок
+
+    # ============================================
+    # ЗАПРОСЫ
+    # ============================================
+
+    def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """
+        Выполнить SELECT на подключении только для чтения
+
+        Args:
+            query: SQL запрос
+            params: Параметры запроса
+
+        Returns:
+            List[Dict]: Список результатов
+        """
+        profiler = self.db.profiler
+        conn = self.connection()
+        started = time.perf_counter() if profiler else 0.0
+        rows = conn.execute(query, params).fetchall()
+        if profiler:
+            profiler.record(conn, query, params, time.perf_counter() - started, len(rows))
+        return [dict(row) for row in rows]
+
+    async def run_async(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Выполнить func в потоке отчётов"""
+        return await self.executor.run(func, *args, timeout=timeout, **kwargs)
+
+    async def aquery(self, query: str, params: tuple = (),
+                     timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Асинхронный execute_query (в потоке отчётов)"""
+        return await self.run_async(self.execute_query, query, params, timeout=timeout)
+
+    async def areport(self, work: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Выполнить work(*args, **kwargs) в потоке отчётов внутри snapshot()
+
+        Returns:
+            Результат work
+        """
+        def run():
+            with self.snapshot():
+                return work(*args, **kwargs)
+
+        return await self.run_async(run, timeout=timeout)
+
+    def close(self):
+        """Остановить потоки отчётов и закрыть подключения"""
+        self.executor.shutdown()
+        with self._lock:
+            self._closed = True
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all.clear()
@@ -0,0 +1,158 @@
+"""
+Reference Data Cache
+Кэш справочников (курсы, типы обучения, расписания, статусы, преподаватели)
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Таблица -> ключевая колонка
+REFERENCE_TABLES = {
+    'courses': 'id',
+    'training_types': 'id',
+    'schedules': 'id',
+    'student_statuses': 'code',
+    'teachers': 'id',
+}
+
+
+class _Snapshot:
+    """Загруженное содержимое одной таблицы"""
+
+    __slots__ = ('version', 'rows', 'by_key', 'by_name')
+
+    def __init__(self, version: int, rows: List[Dict], key_column: str):
+        self.version = version
+        self.rows = rows
+        self.by_key = {row[key_column]: row for row in rows}
+        self.by_name = {}
+        for row in rows:
+            name = row.get('name') or row.get('full_name')
+            if name is not None:
+                self.by_name.setdefault(name, row)
+
+
+class ReferenceCache:
+    """
+    Версионированный кэш справочников
+
+    Каждая таблица загружается целиком при первом обращении и дальше
+    отдаётся из памяти. invalidate() увеличивает версию таблицы —
+    следующее обращение перечитает её из БД. Снимок, загруженный
+    параллельно с инвалидацией, не сохраняется, поэтому устаревшие
+    данные в кэш не попадают. Ошибка загрузки пробрасывается
+    вызывающему, следующее обращение повторит чтение.
+    """
+
+    def __init__(self, db, tables: Optional[Dict[str, str]] = None):
+        self.db = db
+        self.tables = dict(tables or REFERENCE_TABLES)
+        self._lock = threading.Lock()
+        self._versions = {table: 0 for table in self.tables}
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _snapshot(self, table: str) -> _Snapshot:
+        """Снимок таблицы (из кэша или загруженный из БД)"""
+        if table not in self.tables:
+            raise KeyError(f"Unknown reference table: {table}")
+
+        with self._lock:
+            version = self._versions[table]
+            snapshot = self._snapshots.get(table)
+            if snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+
+        try:
+            rows = self.db.execute_query(f"SELECT * FROM {table}")
+        except Exception as e:
+            # Неудачная загрузка не кэшируется: пустой снимок подменил бы
+            # справочник до invalidate(), а get_id() отдавал бы default
+            logger.error(f"Error loading reference table {table}: {e}")
+            raise
+        snapshot = _Snapshot(version, rows, self.tables[table])
+
+        with self._lock:
+            if self._versions[table] == version:
+                self._snapshots[table] = snapshot
+        return snapshot
+
+    def all(self, table: str, active_only: bool = False) -> List[Dict]:
+        """
+        Все строки справочника
+
+        Args:
+            table: Название таблицы
+            active_only: Только записи с is_active = 1
+
+        Returns:
+            List[Dict]: Копии строк, отсортированные по названию
+        """
+        rows = self._snapshot(table).rows
+        if active_only:
+            rows = [row for row in rows if row.get('is_active', 1)]
+        return sorted((dict(row) for row in rows),
+                      key=lambda row: str(row.get('name') or row.get('full_name') or ''))
+
+    def get(self, table: str, key: Any) -> Optional[Dict]:
+        """Строка справочника по ключу (id или code)"""
+        row = self._snapshot(table).by_key.get(key)
+        return dict(row) if row is not None else None
+
+    def get_by_name(self, table: str, name: str) -> Optional[Dict]:
+        """Строка справочника по названию"""
+        row = self._snapshot(table).by_name.get(name)
+        return dict(row) if row is not None else None
+
+    def get_id(self, table: str, name: str, default: Any = None) -> Any:
+        """
+        Ключ записи по названию
+
+        Args:
+            table: Название таблицы
+            name: Название записи
+            default: Значение, если запись не найдена
+
+        Returns:
+            id (или code для student_statuses)
+        """
+        row = self._snapshot(table).by_name.get(name)
+        return row[self.tables[table]] if row is not None else default
+
+    def get_name(self, table: str, key: Any, default: Optional[str] = None) -> Optional[str]:
+        """Название записи по ключу"""
+        row = self._snapshot(table).by_key.get(key)
+        if row is None:
+            return default
+        return row.get('name') or row.get('full_name') or default
+
+    def invalidate(self, *tables: str):
+        """
+        Сбросить кэш таблиц (без аргументов — всех)
+
+        Вызывается после записи в справочник.
+        """
+        with self._lock:
+            for table in tables or self.tables:
+                if table in self._versions:
+                    self._versions[table] += 1
+                    self._snapshots.pop(table, None)
+        logger.debug(f"Reference cache invalidated: {', '.join(tables) or 'all'}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики попаданий/промахов и версии таблиц"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'versions': dict(self._versions),
+                'loaded': sorted(self._snapshots),
+            }
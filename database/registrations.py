@@ -3,13 +3,19 @@ Registration Repository
 Репозиторий для работы с регистрациями студентов
 """
 
+import csv
 import logging
 from typing import List, Dict, Optional
 
+from utils.validators import normalize_phone, reverse_phone
+from .aio import AsyncRepositoryMixin
+from .pagination import KeysetPage, KeysetPaginator, PageRequest
+from .timestamps import TimeValue, format_local, to_epoch, window
+
 logger = logging.getLogger(__name__)
 
 
-class RegistrationRepository:
+class RegistrationRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с регистрациями"""
 
     def __init__(self, db):
@@ -47,6 +53,153 @@ class RegistrationRepository:
             logger.error(f"Error creating registration: {e}")
             return None
 
+    def register_from_telegram(self, telegram_id: int, full_name: str, phone: str,
+                               course: str, training_type: str, schedule: str,
+                               status: str = 'trial') -> Optional[int]:
+        """
+        Зарегистрировать пользователя Telegram на курс одной транзакцией
+
+        Создаёт пользователя (если его нет), находит ID справочников по
+        названиям и создаёт регистрацию. При любой ошибке ничего не
+        сохраняется.
+
+        Args:
+            telegram_id: Telegram ID пользователя
+            full_name: Имя
+            phone: Телефон
+            course: Название курса
+            training_type: Название типа обучения
+            schedule: Название расписания
+            status: Статус регистрации
+
+        Returns:
+            int: ID новой регистрации или None при ошибке
+        """
+        phone_e164 = normalize_phone(phone)
+        phone_rev = reverse_phone(phone_e164)
+
+        try:
+            with self.db.transaction():
+                self.db.execute_update(
+                    "INSERT OR IGNORE INTO users (telegram_id, full_name, phone, phone_e164, phone_rev) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (telegram_id, full_name, phone, phone_e164, phone_rev)
+                )
+                user_rows = self.db.execute_query(
+                    "SELECT id FROM users WHERE telegram_id = ?", (telegram_id,)
+                )
+                if not user_rows:
+                    raise LookupError(f"User {telegram_id} was not created")
+                user_id = user_rows[0]['id']
+
+                # Справочники — из кэша, без запросов к БД
+                reference = self.db.reference
+                course_id = reference.get_id('courses', course, default=1)  # По умолчанию первый курс
+                training_type_id = reference.get_id('training_types', training_type, default=1)
+                schedule_id = reference.get_id('schedules', schedule, default=1)
+
+                reg_id = self.db.execute_insert("""
+                    INSERT INTO registrations
+                    (user_id, full_name, phone, phone_e164, phone_rev,
+                     course_id, training_type_id, schedule_id, status_code, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'telegram')
+                    """, (user_id, full_name, phone, phone_e164, phone_rev,
+                          course_id, training_type_id, schedule_id, status))
+
+            logger.info(f"Created registration {reg_id} for telegram user {telegram_id}")
+            return reg_id
+        except Exception as e:
+            logger.error(f"Error registering telegram user {telegram_id}: {e}")
+            return None
+
+    def find_by_phone(self, phone: str, limit: int = 10) -> List[Dict]:
+        """
+        Найти регистрации по телефону
+
+        Сначала точное совпадение нормализованного номера, затем (если
+        введено 7–9 цифр) совпадение по последним цифрам. Оба поиска идут
+        по индексам phone_e164 / phone_rev, без сканирования таблицы.
+
+        Args:
+            phone: Телефон в любом формате или его последние 7–9 цифр
+            limit: Максимум результатов
+
+        Returns:
+            List[Dict]: Регистрации, новые первыми
+        """
+        select = """
+                 SELECT r.id,
+                        r.user_id,
+                        r.status_code,
+                        r.created_at,
+                        r.full_name as name,
+                        r.phone,
+                        c.name      as course_name,
+                        tt.name     as training_type_name,
+                        s.name      as schedule_name
+                 FROM registrations r
+                          LEFT JOIN courses c ON r.course_id = c.id
+                          LEFT JOIN training_types tt ON r.training_type_id = tt.id
+                          LEFT JOIN schedules s ON r.schedule_id = s.id
+                 """
+
+        normalized = normalize_phone(phone)
+        if normalized:
+            rows = self.db.execute_query(
+                select + " WHERE r.phone_e164 = ? ORDER BY r.id DESC LIMIT ?", (normalized, limit)
+            )
+            if rows:
+                return rows
+
+        digits = ''.join(ch for ch in phone if ch.isdigit())
+        if 7 <= len(digits) <= 9:
+            # Последние цифры номера = начало перевёрнутого номера: диапазон по индексу
+            suffix = digits[::-1]
+            return self.db.execute_query(
+                select + " WHERE r.phone_rev >= ? AND r.phone_rev < ? ORDER BY r.id DESC LIMIT ?",
+                (suffix, suffix + ':', limit)  # ':' — следующий символ после '9'
+            )
+        return []
+
+    def get_page_by_status(self, status: str, prefix: str, request: Optional[PageRequest] = None,
+                           page_size: int = 1) -> KeysetPage:
+        """
+        Страница регистраций с заданным статусом (новые первыми)
+
+        Args:
+            status: Код статуса
+            prefix: Префикс callback_data списка
+            request: Запрошенная страница (None — первая)
+            page_size: Регистраций на странице
+
+        Returns:
+            KeysetPage
+        """
+        paginator = KeysetPaginator(
+            self.db,
+            """
+            SELECT r.id,
+                   r.user_id,
+                   r.status_code,
+                   r.created_at,
+                   r.updated_at,
+                   r.full_name as name,
+                   r.phone,
+                   c.name      as course_name,
+                   tt.name     as training_type_name,
+                   s.name      as schedule_name
+            FROM registrations r
+                     LEFT JOIN courses c ON r.course_id = c.id
+                     LEFT JOIN training_types tt ON r.training_type_id = tt.id
+                     LEFT JOIN schedules s ON r.schedule_id = s.id
+            """,
+            order_by=("r.created_at", "r.id"),
+            keys=("created_at", "id"),
+            prefix=prefix,
+            page_size=page_size
+        )
+        return paginator.fetch("r.status_code = ?", (status,), request)
+
     def get_by_id(self, reg_id: int) -> Optional[Dict]:
         """
         Получить регистрацию по ID
@@ -167,25 +320,32 @@ class RegistrationRepository:
             logger.error(f"Error updating registration status: {e}")
             return False
 
-    def set_trial_lesson_time(self, reg_id: int, lesson_time: str) -> bool:
+    def set_trial_lesson_time(self, reg_id: int, lesson_time: TimeValue) -> bool:
         """
         Назначить время пробного урока
 
         Args:
             reg_id: ID регистрации
-            lesson_time: Время урока (строка или datetime)
+            lesson_time: Время урока (строка или datetime в местном поясе, либо epoch)
 
         Returns:
             bool: True если успешно
         """
         try:
+            ts = to_epoch(lesson_time)
+            if ts is None:
+                logger.warning(f"Bad trial lesson time for registration {reg_id}: {lesson_time!r}")
+                return False
+
             query = """
                     UPDATE registrations
                     SET trial_lesson_time = ?,
+                        trial_lesson_ts   = ?,
+                        reminder_sent     = 0,
                         updated_at        = CURRENT_TIMESTAMP
                     WHERE id = ? 
                     """
-            affected = self.db.execute_update(query, (lesson_time, reg_id))
+            affected = self.db.execute_update(query, (format_local(ts), ts, reg_id))
 
             if affected > 0:
                 logger.info(f"Set trial lesson time for registration {reg_id}")
@@ -195,16 +355,65 @@ class RegistrationRepository:
             logger.error(f"Error setting trial lesson time: {e}")
             return False
 
-    def set_consultation_time(self, reg_id: int, consult_time: str) -> bool:
-        """Назначить время консультации"""
+    def schedule_trial(self, reg_id: int, lesson_time: TimeValue) -> bool:
+        """
+        Назначить пробный урок и перевести регистрацию в статус 'trial'
+        (оба изменения в одной транзакции)
+
+        Args:
+            reg_id: ID регистрации
+            lesson_time: Время урока (местное время или epoch)
+
+        Returns:
+            bool: True если успешно
+        """
+        try:
+            ts = to_epoch(lesson_time)
+            if ts is None:
+                logger.warning(f"Bad trial lesson time for registration {reg_id}: {lesson_time!r}")
+                return False
+
+            with self.db.transaction():
+                affected = self.db.execute_update("""
+                    UPDATE registrations
+                    SET trial_lesson_time = ?,
+                        trial_lesson_ts   = ?,
+                        reminder_sent     = 0,
+                        updated_at        = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    """, (format_local(ts), ts, reg_id))
+                if affected == 0:
+                    return False
+
+                self.db.execute_update("""
+                    UPDATE registrations
+                    SET status_code = 'trial',
+                        updated_at  = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    """, (reg_id,))
+
+            logger.info(f"Scheduled trial lesson for registration {reg_id} at {lesson_time}")
+            return True
+        except Exception as e:
+            logger.error(f"Error scheduling trial lesson: {e}")
+            return False
+
+    def set_consultation_time(self, reg_id: int, consult_time: TimeValue) -> bool:
+        """Назначить время консультации (местное время или epoch)"""
         try:
+            ts = to_epoch(consult_time)
+            if ts is None:
+                logger.warning(f"Bad consultation time for registration {reg_id}: {consult_time!r}")
+                return False
+
             query = """
                     UPDATE registrations
                     SET consultation_time = ?,
+                        consultation_ts   = ?,
                         updated_at        = CURRENT_TIMESTAMP
                     WHERE id = ? 
                     """
-            affected = self.db.execute_update(query, (consult_time, reg_id))
+            affected = self.db.execute_update(query, (format_local(ts), ts, reg_id))
             return affected > 0
         except Exception as e:
             logger.error(f"Error setting consultation time: {e}")
@@ -240,6 +449,22 @@ class RegistrationRepository:
         Returns:
             List[Dict]: Список регистраций с пробными уроками
         """
+        return self.get_trials_due(days * 24 * 60)
+
+    def get_trials_due(self, minutes: float, limit: int = 500) -> List[Dict]:
+        """
+        Пробные уроки в ближайшие N минут, по которым ещё не было напоминания
+
+        Диапазон по индексу (reminder_sent, trial_lesson_ts, id).
+
+        Args:
+            minutes: Ширина окна от текущего момента
+            limit: Максимум строк
+
+        Returns:
+            List[Dict]: Регистрации (trial_lesson_ts — UTC epoch)
+        """
+        start, end = window(minutes)
         query = """
                 SELECT r.*, 
                        u.full_name as name, 
@@ -249,28 +474,83 @@ class RegistrationRepository:
                 FROM registrations r
                          JOIN users u ON r.user_id = u.id
                          JOIN courses c ON r.course_id = c.id
-                WHERE r.trial_lesson_time IS NOT NULL
-                  AND r.trial_lesson_time BETWEEN datetime('now')
-                    AND datetime('now', '+' || ? || ' days')
-                  AND r.reminder_sent = 0
-                ORDER BY r.trial_lesson_time 
+                WHERE r.reminder_sent = 0
+                  AND r.trial_lesson_ts >= ?
+                  AND r.trial_lesson_ts < ?
+                ORDER BY r.trial_lesson_ts
+                LIMIT ?
                 """
-        return self.db.execute_query(query, (days,))
+        return self.db.execute_query(query, (start, end, limit))
+
+    def get_consultations_between(self, start: TimeValue, end: TimeValue) -> List[Dict]:
+        """
+        Консультации в интервале [start, end)
+
+        Args:
+            start: Начало (местное время или epoch)
+            end: Конец (местное время или epoch)
+
+        Returns:
+            List[Dict]: id, full_name, phone, consultation_time, consultation_ts
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if start_ts is None or end_ts is None:
+            return []
+        query = """
+                SELECT id, full_name, phone, consultation_time, consultation_ts
+                FROM registrations
+                WHERE consultation_ts >= ?
+                  AND consultation_ts < ?
+                ORDER BY consultation_ts, id
+                """
+        return self.db.execute_query(query, (start_ts, end_ts))
 
     def get_stats_by_status(self) -> Dict[str, int]:
         """
-        Получить статистику по статусам
+        Получить статистику по статусам (из stats_counters, без COUNT(*))
 
         Returns:
             Dict: Статистика {status: count}
         """
+        counters = self.db.stats.get_counters(('status',))['status']
+        return {status: value for (status, _), value in counters.items()}
+
+    def export_csv(self, path: str, status: Optional[str] = None) -> int:
+        """
+        Выгрузить регистрации в CSV потоком (память не растёт с числом строк)
+
+        Args:
+            path: Файл для записи
+            status: Только регистрации с этим статусом (None — все)
+
+        Returns:
+            int: Выгружено строк
+        """
         query = """
-                SELECT status_code, COUNT(*) as count
-                FROM registrations
-                GROUP BY status_code 
+                SELECT r.id,
+                       r.full_name,
+                       r.phone,
+                       c.name as course,
+                       r.status_code,
+                       r.trial_lesson_time,
+                       r.created_at
+                FROM registrations r
+                         LEFT JOIN courses c ON r.course_id = c.id
                 """
-        rows = self.db.execute_query(query)
-        return {row['status_code']: row['count'] for row in rows}
+        params = ()
+        if status:
+            query += " WHERE r.status_code = ?"
+            params = (status,)
+        query += " ORDER BY r.id"
+
+        count = 0
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(['id', 'name', 'phone', 'course', 'status', 'trial_lesson_time', 'created_at'])
+            for chunk in self.db.iter_chunks(query, params, row_type=tuple):
+                writer.writerows(chunk)
+                count += len(chunk)
+        return count
 
     def delete(self, reg_id: int) -> bool:
         """
@@ -283,8 +563,13 @@ class RegistrationRepository:
             bool: True если успешно
         """
         try:
-            query = "DELETE FROM registrations WHERE id = ?"
-            affected = self.db.execute_update(query, (reg_id,))
+            with self.db.transaction():
+                # PRAGMA foreign_keys не включён — каскад делаем сами
+                self.db.execute_update("DELETE FROM registration_notes WHERE registration_id = ?", (reg_id,))
+                self.db.execute_update("DELETE FROM registration_status_events WHERE registration_id = ?",
+                                       (reg_id,))
+                query = "DELETE FROM registrations WHERE id = ?"
+                affected = self.db.execute_update(query, (reg_id,))
 
             if affected > 0:
                 logger.info(f"Deleted registration {reg_id}")
@@ -294,23 +579,61 @@ class RegistrationRepository:
             logger.error(f"Error deleting registration: {e}")
             return False
 
-    def add_note(self, reg_id: int, note: str) -> bool:
-        """Добавить заметку к регистрации"""
-        try:
-            # Получаем существующие заметки
-            query = "SELECT notes FROM registrations WHERE id = ?"
-            rows = self.db.execute_query(query, (reg_id,))
+    def add_note(self, reg_id: int, note: str, note_type: str = 'manual',
+                 author_id: Optional[int] = None) -> bool:
+        """
+        Добавить заметку к регистрации
 
-            if not rows:
-                return False
+        Заметка дописывается отдельной строкой в registration_notes,
+        сама регистрация не переписывается (только updated_at).
 
-            existing_notes = rows[0].get('notes', '')
-            new_notes = f"{existing_notes}\n{note}" if existing_notes else note
+        Args:
+            reg_id: ID регистрации
+            note: Текст заметки
+            note_type: progress, manual или system
+            author_id: Telegram ID автора (None — система)
 
-            # Обновляем
-            query = "UPDATE registrations SET notes = ? WHERE id = ?"
-            affected = self.db.execute_update(query, (new_notes, reg_id))
-            return affected > 0
+        Returns:
+            bool: True если успешно
+        """
+        try:
+            with self.db.transaction():
+                affected = self.db.execute_update(
+                    "UPDATE registrations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (reg_id,)
+                )
+                if affected == 0:
+                    return False
+
+                self.db.execute_insert("""
+                    INSERT INTO registration_notes (registration_id, author_id, note_type, text)
+                    VALUES (?, ?, ?, ?)
+                    """, (reg_id, author_id, note_type, note))
+            return True
         except Exception as e:
             logger.error(f"Error adding note: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def get_notes(self, reg_id: int, limit: int = 5, note_type: Optional[str] = None) -> List[Dict]:
+        """
+        Последние заметки регистрации (новые первыми)
+
+        Args:
+            reg_id: ID регистрации
+            limit: Сколько заметок вернуть
+            note_type: Только заметки этого типа
+
+        Returns:
+            List[Dict]: id, author_id, note_type, text, created_at
+        """
+        query = """
+                SELECT id, author_id, note_type, text, created_at
+                FROM registration_notes
+                WHERE registration_id = ?
+                """
+        params = [reg_id]
+        if note_type:
+            query += " AND note_type = ?"
+            params.append(note_type)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return self.db.execute_query(query, tuple(params))
\ No newline at end of file
@@ -6,63 +6,85 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+from .timestamps import TimeValue, format_local, now_epoch, to_epoch, window
+
 logger = logging.getLogger(__name__)
 
 
-class ReminderRepository:
+class ReminderRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с напоминаниями"""
 
     def __init__(self, db):
         self.db = db
 
-    def create(self, user_id: int, text: str, due_date: str) -> Optional[int]:
-        """Создать напоминание"""
+    def create(self, user_id: int, text: str, due_date: TimeValue) -> Optional[int]:
+        """
+        Создать напоминание
+
+        Args:
+            user_id: ID пользователя
+            text: Текст напоминания
+            due_date: Когда напомнить (местное время или epoch)
+
+        Returns:
+            Optional[int]: ID напоминания
+        """
         try:
+            due_ts = to_epoch(due_date)
+            if due_ts is None:
+                logger.warning(f"Bad reminder time for user {user_id}: {due_date!r}")
+                return None
+
             query = """
-                    INSERT INTO reminders (user_id, text, due_date)
-                    VALUES (?, ?, ?)
+                    INSERT INTO reminders (user_id, message, remind_at, due_ts)
+                    VALUES (?, ?, ?, ?)
                     """
-            reminder_id = self.db.execute_insert(query, (user_id, text, due_date))
+            reminder_id = self.db.execute_insert(query, (user_id, text, format_local(due_ts), due_ts))
             logger.info(f"Created reminder {reminder_id} for user {user_id}")
             return reminder_id
         except Exception as e:
             logger.error(f"Error creating reminder: {e}")
             return None
 
-    def get_pending(self) -> List[Dict]:
+    def get_pending(self, limit: int = 500) -> List[Dict]:
         """Получить все неотправленные напоминания с наступившим сроком"""
         query = """
                 SELECT r.*, u.telegram_id, u.full_name
                 FROM reminders r
                          JOIN users u ON r.user_id = u.id
-                WHERE r.sent = 0 
-                  AND r.due_date <= datetime('now')
-                ORDER BY r.due_date 
+                WHERE r.is_sent = 0 
+                  AND r.due_ts <= ?
+                ORDER BY r.due_ts
+                LIMIT ?
+                """
+        return self.db.execute_query(query, (now_epoch(), limit))
+
+    def get_due(self, minutes: float, limit: int = 500) -> List[Dict]:
+        """
+        Неотправленные напоминания на ближайшие N минут
+
+        Диапазон по индексу (is_sent, due_ts, id).
+        """
+        start, end = window(minutes)
+        query = """
+                SELECT r.*, u.telegram_id, u.full_name
+                FROM reminders r
+                         JOIN users u ON r.user_id = u.id
+                WHERE r.is_sent = 0
+                  AND r.due_ts >= ?
+                  AND r.due_ts < ?
+                ORDER BY r.due_ts
+                LIMIT ?
                 """
-        return self.db.execute_query(query)
+        return self.db.execute_query(query, (start, end, limit))
 
     def mark_sent(self, reminder_id: int) -> bool:
         """Отметить напоминание как отправленное"""
         try:
-            query = "UPDATE reminders SET sent = 1 WHERE id = ?"
+            query = "UPDATE reminders SET is_sent = 1, sent_at = CURRENT_TIMESTAMP WHERE id = ?"
             affected = self.db.execute_update(query, (reminder_id,))
             return affected > 0
         except Exception as e:
             logger.error(f"Error marking reminder as sent: {e}")
             return False
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
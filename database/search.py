@@ -0,0 +1,118 @@
+"""
+Search Repository
+Полнотекстовый поиск студентов (FTS5) по именам, заметкам и отзывам
+"""
+
+import logging
+import re
+import sqlite3
+from typing import Dict, List
+
+from .aio import AsyncRepositoryMixin
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text: str, max_tokens: int = 8) -> str:
+    """
+    Превратить ввод пользователя в безопасный запрос FTS5
+
+    Каждое слово ищется по префиксу ("иван"* "петр"*), все слова
+    должны встретиться в документе. ё приводится к е.
+
+    Returns:
+        str: Выражение для MATCH или '' если слов нет
+    """
+    text = text.replace('ё', 'е').replace('Ё', 'Е').lower()
+    tokens = _TOKEN_RE.findall(text)[:max_tokens]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+class SearchRepository(AsyncRepositoryMixin):
+    """Полнотекстовый поиск (таблица search_index)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def search_students(self, text: str, limit: int = 10) -> List[Dict]:
+        """
+        Найти студентов по имени, заметкам и отзывам
+
+        Результаты ранжируются по bm25; совпадение в имени пользователя,
+        регистрации или отзыве приводится к регистрации студента.
+
+        Args:
+            text: Поисковая строка (слова ищутся по префиксу)
+            limit: Максимум результатов
+
+        Returns:
+            List[Dict]: registration_id, name, phone, status_code,
+            kind (где найдено), snippet, score
+        """
+        match = build_match_query(text)
+        if not match:
+            return []
+
+        query = """
+                WITH hits AS (SELECT kind,
+                                     ref_id,
+                                     bm25(search_index)                           AS score,
+                                     snippet(search_index, 2, '«', '»', '…', 10) AS snippet
+                              FROM search_index
+                              WHERE search_index MATCH ?
+                              ORDER BY score
+                              LIMIT ?)
+                SELECT h.kind,
+                       h.ref_id,
+                       h.score,
+                       h.snippet,
+                       r.id          AS registration_id,
+                       r.full_name   AS name,
+                       r.phone,
+                       r.status_code
+                FROM hits h
+                         LEFT JOIN feedback f ON h.kind = 'feedback' AND f.id = h.ref_id
+                         LEFT JOIN registration_notes n ON h.kind = 'note' AND n.id = h.ref_id
+                         LEFT JOIN registrations r ON r.id = CASE h.kind
+                    WHEN 'registration' THEN h.ref_id
+                    WHEN 'note' THEN n.registration_id
+                    WHEN 'user' THEN (SELECT MAX(id) FROM registrations WHERE user_id = h.ref_id)
+                    ELSE COALESCE(f.registration_id,
+                                  (SELECT MAX(id) FROM registrations WHERE user_id = f.user_id))
+                    END
+                WHERE r.id IS NOT NULL
+                ORDER BY h.score
+                """
+        try:
+            # Одного студента могут найти несколько документов — берём лучший
+            rows = self.db.execute_query(query, (match, limit * 5))
+        except sqlite3.OperationalError as e:
+            logger.error(f"Full-text search failed for {text!r}: {e}")
+            return []
+
+        results = []
+        seen = set()
+        for row in rows:
+            reg_id = row['registration_id']
+            if reg_id in seen:
+                continue
+            seen.add(reg_id)
+            results.append(row)
+            if len(results) >= limit:
+                break
+        return results
+
+    def rebuild(self) -> bool:
+        """Перестроить FTS-индекс (после ручных правок БД)"""
+        try:
+            from .migrations import ensure_search_index
+            with self.db.transaction() as conn:
+                conn.execute("DROP TABLE IF EXISTS search_index")
+                ensure_search_index(conn.cursor())
+            logger.info("Search index rebuilt")
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding search index: {e}")
+            return False
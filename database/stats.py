@@ -0,0 +1,173 @@
+"""
+Stats Repository
+Статистика из счётчиков stats_counters (ведутся триггерами)
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Sequence
+
+from .aio import AsyncRepositoryMixin
+
+logger = logging.getLogger(__name__)
+
+# Окна статистики смен статуса: название -> модификатор datetime('now', ...)
+DEFAULT_WINDOWS = {
+    'day': '-1 day',
+    'week': '-7 days',
+    'month': '-1 month',
+}
+
+
+class StatsRepository(AsyncRepositoryMixin):
+    """
+    Репозиторий статистики
+
+    Чтения идут через db.readonly (подключения только для чтения),
+    async-вызовы выполняются в потоке отчётов, а не в общем пуле.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _run_async(self, func, *args, timeout: Optional[float] = None, **kwargs):
+        return self.db.readonly.run_async(func, *args, timeout=timeout, **kwargs)
+
+    def get_counters(self, metrics: Sequence[str]) -> Dict[str, Dict[tuple, int]]:
+        """
+        Прочитать счётчики одним запросом (по первичному ключу)
+
+        Args:
+            metrics: Названия метрик (см. migrations.STATS_METRICS)
+
+        Returns:
+            Dict[str, Dict[tuple, int]]: метрика -> {(dim1, dim2): значение}
+        """
+        counters: Dict[str, Dict[tuple, int]] = {metric: {} for metric in metrics}
+        if not metrics:
+            return counters
+
+        placeholders = ', '.join('?' for _ in metrics)
+        query = f"""
+                SELECT metric, dim1, dim2, value
+                FROM stats_counters
+                WHERE metric IN ({placeholders})
+                  AND value <> 0
+                """
+        for row in self.db.readonly.execute_query(query, tuple(metrics)):
+            counters[row['metric']][(row['dim1'], row['dim2'])] = row['value']
+        return counters
+
+    def get_overview(self) -> Dict[str, Any]:
+        """
+        Общая статистика по регистрациям
+
+        Returns:
+            Dict: total, by_status {code: n}, by_course {название: n},
+            by_course_status {название: {code: n}}
+        """
+        counters = self.get_counters(('registrations', 'status', 'course', 'course_status'))
+
+        def course_name(course_id: str) -> str:
+            if not course_id:
+                return 'Не указан'
+            return self.db.reference.get_name('courses', int(course_id), f"Курс #{course_id}")
+
+        by_course_status = defaultdict(dict)
+        for (course_id, status), value in counters['course_status'].items():
+            by_course_status[course_name(course_id)][status] = value
+
+        return {
+            'total': counters['registrations'].get(('', ''), 0),
+            'by_status': {status: value for (status, _), value in counters['status'].items()},
+            'by_course': {course_name(course_id): value
+                          for (course_id, _), value in counters['course'].items()},
+            'by_course_status': dict(by_course_status),
+        }
+
+    def get_feedback_overview(self) -> Dict[str, Any]:
+        """
+        Статистика отзывов
+
+        Returns:
+            Dict: total, by_type {type: n}, by_rating {1..5: n}, avg_rating
+        """
+        counters = self.get_counters(('feedback', 'feedback_type', 'feedback_rating'))
+
+        by_rating = {int(rating): value for (rating, _), value in counters['feedback_rating'].items()
+                     if rating}
+        rated = sum(by_rating.values())
+        avg_rating = sum(rating * value for rating, value in by_rating.items()) / rated if rated else 0
+
+        return {
+            'total': counters['feedback'].get(('', ''), 0),
+            'by_type': {feedback_type: value
+                        for (feedback_type, _), value in counters['feedback_type'].items()},
+            'by_rating': by_rating,
+            'avg_rating': avg_rating,
+        }
+
+    def get_status_transitions(self, windows: Optional[Dict[str, str]] = None,
+                               statuses: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Смены статуса за несколько окон одним проходом по журналу
+
+        Запрос читает только индекс (new_status, changed_at, old_status)
+        в пределах самого широкого окна и считает все окна сразу.
+
+        Args:
+            windows: Название окна -> модификатор SQLite datetime('now', ...)
+                (по умолчанию день, неделя, месяц)
+            statuses: Статусы (по умолчанию все из student_statuses)
+
+        Returns:
+            Dict: окно -> {'new': новых регистраций, 'by_status': {code: переходов в статус}}
+
+        Example:
+            >>> db.stats.get_status_transitions({'week': '-7 days'})['week']['by_status'].get('completed', 0)
+        """
+        windows = dict(windows or DEFAULT_WINDOWS)
+        if statuses is None:
+            statuses = [row['code'] for row in self.db.reference.all('student_statuses')]
+        result = {name: {'new': 0, 'by_status': {}} for name in windows}
+        if not windows or not statuses:
+            return result
+
+        names = list(windows)
+        columns = ',\n'.join(
+            f"SUM(changed_at >= since{i}) AS moved{i}, "
+            f"SUM(changed_at >= since{i} AND old_status IS NULL) AS new{i}"
+            for i in range(len(names))
+        )
+        bounds = ', '.join(f"datetime('now', ?) AS since{i}" for i in range(len(names)))
+        # MIN() с одним аргументом — агрегат, поэтому для одного окна без него
+        since = 'since0' if len(names) == 1 else f"MIN({', '.join(f'since{i}' for i in range(len(names)))})"
+        placeholders = ', '.join('?' for _ in statuses)
+        query = f"""
+                WITH bounds AS (SELECT {bounds})
+                SELECT new_status,
+                       {columns}
+                FROM registration_status_events, bounds
+                WHERE new_status IN ({placeholders})
+                  AND changed_at >= {since}
+                GROUP BY new_status
+                """
+        params = tuple(windows[name] for name in names) + tuple(statuses)
+        for row in self.db.readonly.execute_query(query, params):
+            for i, name in enumerate(names):
+                if row[f'moved{i}']:
+                    result[name]['by_status'][row['new_status']] = row[f'moved{i}']
+                result[name]['new'] += row[f'new{i}'] or 0
+        return result
+
+    def rebuild(self) -> bool:
+        """Пересчитать счётчики заново (если они разошлись с данными)"""
+        try:
+            from .migrations import rebuild_stats_counters
+            with self.db.transaction() as conn:
+                rebuild_stats_counters(conn.cursor())
+            logger.info("Statistics counters rebuilt")
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding statistics counters: {e}")
+            return False
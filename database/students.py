@@ -2,9 +2,11 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+
 logger = logging.getLogger(__name__)
 
-class StudentRepository:
+class StudentRepository(AsyncRepositoryMixin):
     """Репозиторий для работы со студентами"""
 
     def __init__(self, db):
@@ -6,10 +6,13 @@
 import logging
 from typing import List, Dict, Optional
 
+from .aio import AsyncRepositoryMixin
+from .pagination import KeysetPage, KeysetPaginator, PageRequest
+
 logger = logging.getLogger(__name__)
 
 
-class TeacherRepository:
+class TeacherRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с преподавателями"""
 
     def __init__(self, db):
@@ -24,6 +27,7 @@ class TeacherRepository:
                     VALUES (?, ?, ?, ?, ?)
                     """
             teacher_id = self.db.execute_insert(query, (name, phone, email, specialization, experience))
+            self.db.reference.invalidate('teachers')
             logger.info(f"Created teacher {teacher_id}: {name}")
             return teacher_id
         except Exception as e:
@@ -32,14 +36,25 @@ class TeacherRepository:
 
     def get_all_active(self) -> List[Dict]:
         """Получить всех активных преподавателей"""
-        query = "SELECT * FROM teachers WHERE is_active = 1 ORDER BY name"
-        return self.db.execute_query(query)
+        return self.db.reference.all('teachers', active_only=True)
 
     def get_by_id(self, teacher_id: int) -> Optional[Dict]:
         """Получить преподавателя по ID"""
-        query = "SELECT * FROM teachers WHERE id = ?"
-        rows = self.db.execute_query(query, (teacher_id,))
-        return rows[0] if rows else None
+        return self.db.reference.get('teachers', teacher_id)
+
+    def get_page(self, prefix: str, request: Optional[PageRequest] = None,
+                 page_size: int = 10) -> KeysetPage:
+        """Страница всех преподавателей (в порядке добавления)"""
+        paginator = KeysetPaginator(
+            self.db,
+            "SELECT * FROM teachers",
+            order_by=("id",),
+            keys=("id",),
+            prefix=prefix,
+            page_size=page_size,
+            descending=False
+        )
+        return paginator.fetch(request=request)
 
     def update(self, teacher_id: int, **kwargs) -> bool:
         """Обновить данные преподавателя"""
@@ -59,6 +74,7 @@ class TeacherRepository:
             params.append(teacher_id)
             query = f"UPDATE teachers SET {', '.join(updates)} WHERE id = ?"
             affected = self.db.execute_update(query, tuple(params))
+            self.db.reference.invalidate('teachers')
             return affected > 0
         except Exception as e:
             logger.error(f"Error updating teacher: {e}")
@@ -69,6 +85,7 @@ class TeacherRepository:
         try:
             query = "UPDATE teachers SET is_active = 0 WHERE id = ?"
             affected = self.db.execute_update(query, (teacher_id,))
+            self.db.reference.invalidate('teachers')
             return affected > 0
         except Exception as e:
             logger.error(f"Error deactivating teacher: {e}")
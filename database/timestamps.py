@@ -0,0 +1,115 @@
+"""
+Timestamps
+Перевод времени между вводом админа (местное время) и UTC epoch в БД
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Формат текстовых колонок (trial_lesson_time, remind_at, ...) — местное время
+LOCAL_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+TimeValue = Union[str, datetime, int, float, None]
+
+
+# Постоянное смещение на случай, когда базы поясов нет (Windows без пакета
+# tzdata): в Узбекистане нет перехода на летнее время, UTC+5 круглый год
+FIXED_OFFSETS = {
+    'Asia/Tashkent': timezone(timedelta(hours=5), 'Asia/Tashkent'),
+    'Asia/Samarkand': timezone(timedelta(hours=5), 'Asia/Samarkand'),
+    'UTC': timezone.utc,
+}
+
+
+@lru_cache(maxsize=1)
+def local_timezone() -> tzinfo:
+    """
+    Часовой пояс из Config.TIMEZONE
+
+    Вызывается при запуске бота: неизвестный пояс — ошибка запуска, а не
+    тихий переход на UTC (время уроков и напоминаний сдвинулось бы на
+    несколько часов). Если базы поясов нет, для поясов из FIXED_OFFSETS
+    используется постоянное смещение; результат кэшируется, поэтому
+    предупреждение пишется один раз.
+
+    Raises:
+        ValueError: Пояс не найден и постоянного смещения для него нет
+    """
+    from config import Config
+
+    name = getattr(Config, 'TIMEZONE', 'UTC')
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception as e:
+        if name in FIXED_OFFSETS:
+            logger.warning(f"Timezone database unavailable ({e}), using fixed offset for {name!r}; "
+                           f"install tzdata")
+            return FIXED_OFFSETS[name]
+        raise ValueError(f"Unknown timezone {name!r} (Config.TIMEZONE): {e}") from e
+
+
+def now_epoch() -> int:
+    """Текущее время, UTC epoch (секунды)"""
+    return int(time.time())
+
+
+def to_epoch(value: TimeValue, tz: Optional[tzinfo] = None) -> Optional[int]:
+    """
+    Привести время к UTC epoch
+
+    Строка разбирается smart_parse_datetime(); время без пояса считается
+    местным (Config.TIMEZONE). Число считается уже готовым epoch.
+
+    Args:
+        value: Строка, datetime или epoch
+        tz: Пояс для времени без пояса (по умолчанию local_timezone())
+
+    Returns:
+        int или None, если значение пустое или не разбирается
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    if isinstance(value, str):
+        from models.data_models import smart_parse_datetime
+        value = smart_parse_datetime(value)
+        if value is None:
+            return None
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tz or local_timezone())
+    return int(value.timestamp())
+
+
+def from_epoch(ts: Optional[int], tz: Optional[tzinfo] = None) -> Optional[datetime]:
+    """UTC epoch -> datetime в местном поясе"""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz or local_timezone())
+
+
+def format_local(ts: Optional[int], fmt: str = LOCAL_FORMAT) -> Optional[str]:
+    """UTC epoch -> строка местного времени (для текстовых колонок и вывода)"""
+    dt = from_epoch(ts)
+    return dt.strftime(fmt) if dt is not None else None
+
+
+def window(minutes: float, start: Optional[int] = None) -> tuple:
+    """
+    Диапазон [start, start + minutes) для запросов "в ближайшие N минут"
+
+    Returns:
+        tuple: (from_ts, to_ts)
+    """
+    start = now_epoch() if start is None else start
+    return start, start + int(timedelta(minutes=minutes).total_seconds())
@@ -1,9 +1,12 @@
 import logging
 from typing import Dict, Optional
 
+from utils.validators import normalize_phone, reverse_phone
+from .aio import AsyncRepositoryMixin
+
 logger = logging.getLogger(__name__)
 
-class UserRepository:
+class UserRepository(AsyncRepositoryMixin):
     """Репозиторий для работы с пользователями"""
 
     def __init__(self, db):
@@ -13,16 +16,20 @@ class UserRepository:
                         full_name: Optional[str] = None, phone: Optional[str] = None) -> Optional[int]:
         """Создать или обновить пользователя"""
         try:
+            phone_e164 = normalize_phone(phone)
             query = """
-                    INSERT INTO users (telegram_id, username, full_name, phone)
-                    VALUES (?, ?, ?, ?)
+                    INSERT INTO users (telegram_id, username, full_name, phone, phone_e164, phone_rev)
+                    VALUES (?, ?, ?, ?, ?, ?)
                     ON CONFLICT(telegram_id) DO UPDATE SET
                         username = excluded.username,
                         full_name = excluded.full_name,
                         phone = COALESCE(excluded.phone, phone),
+                        phone_e164 = COALESCE(excluded.phone_e164, phone_e164),
+                        phone_rev = COALESCE(excluded.phone_rev, phone_rev),
                         updated_at = CURRENT_TIMESTAMP
                     """
-            user_id = self.db.execute_insert(query, (telegram_id, username, full_name, phone))
+            user_id = self.db.execute_insert(query, (telegram_id, username, full_name, phone,
+                                                     phone_e164, reverse_phone(phone_e164)))
             return user_id
         except Exception as e:
             logger.error(f"Error creating/updating user: {e}")
@@ -1,7 +1,8 @@
-import asyncio
 import logging
 
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
@@ -67,40 +68,34 @@ async def process_broadcast_text(message: Message, state: FSMContext):
     broadcast_text = message.text
 
     db = get_db()
-    recipients = []
+    where = "u.telegram_id IS NOT NULL AND u.blocked_at IS NULL"
+    params = ()
+    status = None
 
-    if group == "all":
-        # ✅ ИСПРАВЛЕНО: Прямой SQL запрос для получения всех пользователей
-        query = """
-            SELECT DISTINCT u.telegram_id, u.full_name
-            FROM registrations r
-            JOIN users u ON r.user_id = u.id
-            WHERE u.telegram_id IS NOT NULL
-        """
-        users = db.execute_query(query)
-        recipients = [{'telegram_id': u['telegram_id'], 'name': u.get('full_name', 'Пользователь')} for u in users]
-    else:
+    if group != "all":
         # Ищем статус по названию
-        status = None
         for key, value in config.STATUSES.items():
             if value == group:
                 status = key
                 break
-
         if status:
-            # ✅ ИСПРАВЛЕНО: Прямой SQL запрос с JOIN
-            query = """
-                SELECT r.*, u.telegram_id, u.full_name as name
-                FROM registrations r
-                JOIN users u ON r.user_id = u.id
-                WHERE r.status_code = ? AND u.telegram_id IS NOT NULL
-            """
-            registrations = db.execute_query(query, (status,))
-            recipients = [{'telegram_id': r['telegram_id'], 'name': r['name']} for r in registrations if
-                          r.get('telegram_id')]
-
-    if not recipients:
-        from keyboards.admin_kb import get_admin_main_keyboard
+            where += " AND r.status_code = ?"
+            params = (status,)
+        else:
+            where = None
+
+    total = 0
+    if where:
+        count_rows = await db.readonly.aquery(f"""
+            SELECT COUNT(DISTINCT u.telegram_id) AS total
+            FROM registrations r
+            JOIN users u ON r.user_id = u.id
+            WHERE {where}
+        """, params)
+        total = count_rows[0]['total'] if count_rows else 0
+
+    from keyboards.admin_kb import get_admin_main_keyboard
+    if not total:
         await message.answer(
             "❌ Нет студентов в выбранной группе.",
             reply_markup=get_admin_main_keyboard()
@@ -108,30 +103,78 @@ async def process_broadcast_text(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    from keyboards.admin_kb import get_admin_main_keyboard
-    await message.answer(
-        f"📤 Начинаю рассылку для {len(recipients)} студентов...",
-        reply_markup=get_admin_main_keyboard()
-    )
+    # Рассылка — задание в БД: выполняется в фоне и переживает перезапуск бота
+    job_id = await db.broadcasts.acreate(broadcast_text, status, message.from_user.id)
+    await state.clear()
+    if not job_id:
+        await message.answer("❌ Не удалось создать рассылку.", reply_markup=get_admin_main_keyboard())
+        return
 
-    success_count = 0
-    fail_count = 0
-
-    for recipient in recipients:
-        try:
-            telegram_id = recipient['telegram_id']
-            await message.bot.send_message(telegram_id, f"📢 {broadcast_text}")
-            success_count += 1
-            await asyncio.sleep(0.05)  # Задержка между сообщениями
-        except Exception as e:
-            logger.error(f"Ошибка отправки сообщения пользователю {recipient.get('name', 'Unknown')}: {e}")
-            fail_count += 1
-
-    report_text = (
-        f"✅ *Рассылка завершена!*\n\n"
-        f"✅ Успешно отправлено: {success_count}\n"
-        f"❌ Не отправлено: {fail_count}\n"
+    from keyboards.admin_kb import get_broadcast_job_keyboard
+    from utils.broadcaster import format_job_progress, get_broadcaster
+    job = await db.broadcasts.aget(job_id)
+    progress_message = await message.answer(
+        format_job_progress(job),
+        reply_markup=get_broadcast_job_keyboard(job_id, job['status'])
     )
+    await db.broadcasts.aset_progress_message(job_id, progress_message.chat.id, progress_message.message_id)
+    get_broadcaster().submit(job_id)
+    await message.answer("📤 Рассылка запущена, прогресс обновляется выше.",
+                         reply_markup=get_admin_main_keyboard())
+
 
-    await message.answer(report_text, parse_mode="Markdown", reply_markup=get_admin_main_keyboard())
-    await state.clear()
\ No newline at end of file
+@router.callback_query(F.data.regexp(r"^bcast_(pause|resume|cancel|refresh)_\d+$"))
+async def control_broadcast(callback: CallbackQuery):
+    """Пауза, продолжение, отмена и обновление прогресса рассылки"""
+    if not is_admin(callback.from_user.id):
+        return
+
+    _, action, job_id = callback.data.split("_")
+    job_id = int(job_id)
+    db = get_db()
+    from database.broadcasts import JOB_CANCELLED, JOB_PAUSED, JOB_RUNNING
+    from utils.broadcaster import get_broadcaster
+
+    if action == "pause":
+        changed = await db.broadcasts.aset_status(job_id, JOB_PAUSED, (JOB_RUNNING,))
+        await callback.answer("⏸ Рассылка приостановлена" if changed else "Рассылка уже не идёт")
+    elif action == "resume":
+        changed = await db.broadcasts.aset_status(job_id, JOB_RUNNING, (JOB_PAUSED,))
+        if changed:
+            get_broadcaster().submit(job_id)
+        await callback.answer("▶️ Рассылка продолжена" if changed else "Рассылка не на паузе")
+    elif action == "cancel":
+        changed = await db.broadcasts.aset_status(job_id, JOB_CANCELLED)
+        await callback.answer("⏹ Рассылка отменена" if changed else "Рассылка уже завершена")
+    else:
+        await callback.answer()
+
+    job = await db.broadcasts.aget(job_id)
+    if not job:
+        return
+    from keyboards.admin_kb import get_broadcast_job_keyboard
+    from utils.broadcaster import format_job_progress
+    try:
+        await callback.message.edit_text(
+            format_job_progress(job),
+            reply_markup=get_broadcast_job_keyboard(job_id, job['status'])
+        )
+    except TelegramBadRequest:
+        pass  # Прогресс не изменился
+
+
+@router.message(Command("broadcasts"))
+async def list_broadcasts(message: Message):
+    """Последние рассылки и их прогресс"""
+    if not is_admin(message.from_user.id):
+        return
+
+    from keyboards.admin_kb import get_broadcast_job_keyboard
+    from utils.broadcaster import format_job_progress
+    jobs = await get_db().broadcasts.aget_recent(5)
+    if not jobs:
+        await message.answer("📢 Рассылок пока не было")
+        return
+    for job in reversed(jobs):
+        await message.answer(format_job_progress(job),
+                             reply_markup=get_broadcast_job_keyboard(job['id'], job['status']))
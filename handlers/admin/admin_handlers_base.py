@@ -122,7 +122,7 @@ async def admin_admins_menu(callback: CallbackQuery):
             """
 
     try:
-        admins = db.execute_query(query)
+        admins = await db.aquery(query)
     except Exception as e:
         logger.error(f"Error fetching admins: {e}")
         admins = []
@@ -214,4 +214,11 @@ async def back_to_main(callback: CallbackQuery):
         "Выберите действие:",
         reply_markup=get_main_keyboard()
     )
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+# ============ ПАГИНАЦИЯ ============
+
+@router.callback_query(F.data == "noop")
+async def noop(callback: CallbackQuery):
+    """Кнопка-индикатор страницы (ничего не делает)"""
+    await callback.answer()
@@ -34,7 +34,7 @@ async def add_lesson_start(callback: CallbackQuery, state: FSMContext):
             WHERE g.is_active = 1
             ORDER BY g.name \
             """
-    groups = db.execute_query(query)
+    groups = await db.aquery(query)
 
     if not groups:
         from keyboards.admin_kb import get_lesson_management_keyboard
@@ -87,7 +87,7 @@ async def select_lesson_group(callback: CallbackQuery, state: FSMContext):
                      LEFT JOIN teachers t ON g.teacher_id = t.id
             WHERE g.id = ? \
             """
-    results = db.execute_query(query, (group_id,))
+    results = await db.aquery(query, (group_id,))
     group = results[0] if results else None
 
     if not group:
@@ -172,7 +172,7 @@ async def add_lesson_date_process(message: Message, state: FSMContext):
                      LEFT JOIN teachers t ON g.teacher_id = t.id
             WHERE g.id = ? \
             """
-    results = db.execute_query(query, (data['lesson_group_id'],))
+    results = await db.aquery(query, (data['lesson_group_id'],))
     group = results[0] if results else None
 
     if not group or not group.get('teacher_id'):
@@ -184,23 +184,14 @@ async def add_lesson_date_process(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL INSERT для создания урока
-    try:
-        query = """
-                INSERT INTO lessons (group_id, teacher_id, topic, lesson_date, duration_minutes, created_at)
-                VALUES (?, ?, ?, ?, ?, datetime('now')) \
-                """
-        lesson_id = db.execute_insert(query, (
-            data['lesson_group_id'],
-            group['teacher_id'],
-            data['lesson_topic'],
-            message.text,
-            60
-        ))
-        success = lesson_id is not None
-    except Exception as e:
-        logger.error(f"Error creating lesson: {e}", exc_info=True)
-        success = False
+    # Перевод местного времени в lesson_ts делает репозиторий
+    lesson_id = await db.lessons.acreate(
+        data['lesson_group_id'],
+        group['teacher_id'],
+        data['lesson_topic'],
+        message.text
+    )
+    success = lesson_id is not None
 
     if success:
         from keyboards.admin_kb import get_lesson_management_keyboard
@@ -237,30 +228,19 @@ async def cancel_lesson_add(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "list_lessons")
+@router.callback_query(F.data.startswith("list_lessons"))
 async def list_lessons(callback: CallbackQuery):
-    """Показать список всех уроков"""
+    """Показать список всех уроков (постранично)"""
     if not is_admin(callback.from_user.id):
         return
 
     db = get_db()
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL запрос для получения уроков
+    # Страница уроков по keyset-курсору из callback_data
+    from database.pagination import parse_page_callback
     try:
-        query = """
-                SELECT l.id, \
-                       l.topic, \
-                       l.lesson_date, \
-                       l.duration_minutes,
-                       g.name as group_name, \
-                       t.name as teacher_name
-                FROM lessons l
-                         LEFT JOIN groups g ON l.group_id = g.id
-                         LEFT JOIN teachers t ON l.teacher_id = t.id
-                ORDER BY l.lesson_date DESC
-                LIMIT 20 \
-                """
-        lessons = db.execute_query(query)
+        page = await db.lessons.aget_page("list_lessons", parse_page_callback(callback.data, "list_lessons"))
+        lessons = page.rows
     except Exception as e:
         logger.error(f"Error fetching lessons: {e}", exc_info=True)
         lessons = []
@@ -275,7 +255,7 @@ async def list_lessons(callback: CallbackQuery):
 
     lesson_list = "📖 *Список уроков:*\n\n"
 
-    for i, lesson in enumerate(lessons, 1):
+    for i, lesson in enumerate(lessons, page.start_index):
         lesson_date = lesson['lesson_date'][:16] if lesson.get('lesson_date') else 'Не указана'
         lesson_info = (
             f"{i}. *{lesson['topic']}*\n"
@@ -288,10 +268,15 @@ async def list_lessons(callback: CallbackQuery):
 
         lesson_list += lesson_info + "\n"
 
-    from keyboards.admin_kb import get_lesson_management_keyboard
+    from keyboards.admin_kb import get_pagination_keyboard
     await callback.message.edit_text(
         lesson_list,
         parse_mode="Markdown",
-        reply_markup=get_lesson_management_keyboard()
+        reply_markup=get_pagination_keyboard(
+            page.page,
+            back_callback="manage_lessons",
+            prev_callback=page.prev_callback,
+            next_callback=page.next_callback
+        )
     )
     await callback.answer()
\ No newline at end of file
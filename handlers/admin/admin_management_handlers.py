@@ -14,6 +14,51 @@ config = Config()
 
 # ============ УПРАВЛЕНИЕ ПРЕПОДАВАТЕЛЯМИ ============
 
+@router.callback_query(F.data.startswith("list_teachers"))
+async def list_teachers(callback: CallbackQuery):
+    """Показать список преподавателей (постранично)"""
+    if not is_admin(callback.from_user.id):
+        return
+
+    # Страница преподавателей по keyset-курсору из callback_data
+    from database.pagination import parse_page_callback
+    db = get_db()
+    page = await db.teachers.aget_page("list_teachers", parse_page_callback(callback.data, "list_teachers"))
+    teachers = page.rows
+
+    if not teachers:
+        from keyboards.admin_kb import get_admin_teachers_menu
+        await callback.message.edit_text(
+            "❌ Преподаватели ещё не добавлены.",
+            reply_markup=get_admin_teachers_menu()
+        )
+        await callback.answer()
+        return
+
+    text = "👨‍🏫 *Список преподавателей:*\n\n"
+    for i, teacher in enumerate(teachers, page.start_index):
+        text += f"{i}. *{teacher.get('name') or teacher.get('full_name') or 'Без имени'}*\n"
+        text += f"   🆔 ID: {teacher['id']}\n"
+        if teacher.get('phone'):
+            text += f"   📞 {teacher['phone']}\n"
+        if teacher.get('email'):
+            text += f"   📧 {teacher['email']}\n"
+        text += f"   🔹 {'✅ Активен' if teacher.get('is_active', 1) else '❌ Неактивен'}\n\n"
+
+    from keyboards.admin_kb import get_pagination_keyboard
+    await callback.message.edit_text(
+        text,
+        parse_mode="Markdown",
+        reply_markup=get_pagination_keyboard(
+            page.page,
+            back_callback="admin_teachers_menu",
+            prev_callback=page.prev_callback,
+            next_callback=page.next_callback
+        )
+    )
+    await callback.answer()
+
+
 @router.callback_query(F.data == "add_teacher")
 async def add_teacher_start(callback: CallbackQuery, state: FSMContext):
     """Начало добавления преподавателя"""
@@ -102,7 +147,8 @@ async def skip_teacher_email(callback: CallbackQuery, state: FSMContext):
             INSERT INTO teachers (name, phone, email, is_active, created_at)
             VALUES (?, ?, ?, 1, datetime('now'))
         """
-        teacher_id = db.execute_insert(query, (data['teacher_name'], data['teacher_phone'], None))
+        teacher_id = await db.ainsert(query, (data['teacher_name'], data['teacher_phone'], None))
+        db.reference.invalidate('teachers')
         success = teacher_id is not None
     except Exception as e:
         logger.error(f"Error adding teacher: {e}", exc_info=True)
@@ -148,7 +194,8 @@ async def add_teacher_email_process(message: Message, state: FSMContext):
             INSERT INTO teachers (name, phone, email, is_active, created_at)
             VALUES (?, ?, ?, 1, datetime('now'))
         """
-        teacher_id = db.execute_insert(query, (data['teacher_name'], data['teacher_phone'], message.text))
+        teacher_id = await db.ainsert(query, (data['teacher_name'], data['teacher_phone'], message.text))
+        db.reference.invalidate('teachers')
         success = teacher_id is not None
     except Exception as e:
         logger.error(f"Error adding teacher: {e}", exc_info=True)
@@ -220,15 +267,9 @@ async def add_group_name_process(message: Message, state: FSMContext):
 
     await state.update_data(group_name=message.text)
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT
+    # Курсы — из кэша справочников
     db = get_db()
-    query = """
-        SELECT id, name, description
-        FROM courses
-        WHERE is_active = 1
-        ORDER BY name
-    """
-    courses = db.execute_query(query)
+    courses = await db.courses.aget_all_active()
 
     if not courses:
         from keyboards.admin_kb import get_group_management_keyboard
@@ -267,30 +308,18 @@ async def select_group_course(callback: CallbackQuery, state: FSMContext):
 
     course_id = int(callback.data.replace("select_course_", ""))
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT
+    # Курс — из кэша справочников
     db = get_db()
-    query = """
-        SELECT id, name, description
-        FROM courses
-        WHERE id = ? AND is_active = 1
-    """
-    results = db.execute_query(query, (course_id,))
-    selected_course = results[0] if results else None
-
-    if not selected_course:
+    selected_course = await db.courses.aget_by_id(course_id)
+
+    if not selected_course or not selected_course.get('is_active'):
         await callback.answer("❌ Курс не найден.")
         return
 
     await state.update_data(group_course_id=course_id, group_course_name=selected_course['name'])
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT для преподавателей
-    query = """
-        SELECT id, name, phone, email
-        FROM teachers
-        WHERE is_active = 1
-        ORDER BY name
-    """
-    teachers = db.execute_query(query)
+    # Преподаватели — из кэша справочников
+    teachers = await db.teachers.aget_all_active()
 
     if not teachers:
         from keyboards.admin_kb import get_group_management_keyboard
@@ -332,17 +361,11 @@ async def select_group_teacher(callback: CallbackQuery, state: FSMContext):
 
     teacher_id = int(callback.data.replace("select_teacher_", ""))
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT
+    # Преподаватель — из кэша справочников
     db = get_db()
-    query = """
-        SELECT id, name, phone, email
-        FROM teachers
-        WHERE id = ? AND is_active = 1
-    """
-    results = db.execute_query(query, (teacher_id,))
-    selected_teacher = results[0] if results else None
-
-    if not selected_teacher:
+    selected_teacher = await db.teachers.aget_by_id(teacher_id)
+
+    if not selected_teacher or not selected_teacher.get('is_active'):
         await callback.answer("❌ Преподаватель не найден.")
         return
 
@@ -354,7 +377,7 @@ async def select_group_teacher(callback: CallbackQuery, state: FSMContext):
             INSERT INTO groups (name, course_id, teacher_id, is_active, created_at)
             VALUES (?, ?, ?, 1, datetime('now'))
         """
-        group_id = db.execute_insert(query, (data['group_name'], data['group_course_id'], teacher_id))
+        group_id = await db.ainsert(query, (data['group_name'], data['group_course_id'], teacher_id))
         success = group_id is not None
     except Exception as e:
         logger.error(f"Error adding group: {e}", exc_info=True)
@@ -454,7 +477,8 @@ async def skip_course_description(callback: CallbackQuery, state: FSMContext):
             INSERT INTO courses (name, description, is_active, created_at)
             VALUES (?, ?, 1, datetime('now'))
         """
-        course_id = db.execute_insert(query, (data['course_name'], None))
+        course_id = await db.ainsert(query, (data['course_name'], None))
+        db.reference.invalidate('courses')
         success = course_id is not None
     except Exception as e:
         logger.error(f"Error adding course: {e}", exc_info=True)
@@ -500,7 +524,8 @@ async def add_course_description_process(message: Message, state: FSMContext):
             INSERT INTO courses (name, description, is_active, created_at)
             VALUES (?, ?, 1, datetime('now'))
         """
-        course_id = db.execute_insert(query, (data['course_name'], message.text))
+        course_id = await db.ainsert(query, (data['course_name'], message.text))
+        db.reference.invalidate('courses')
         success = course_id is not None
     except Exception as e:
         logger.error(f"Error adding course: {e}", exc_info=True)
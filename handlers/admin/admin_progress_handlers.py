@@ -27,7 +27,6 @@ async def handle_update_progress(callback: CallbackQuery, state: FSMContext):
     query = """
             SELECT r.id, \
                    r.status_code, \
-                   r.notes,
                    r.full_name as name, \
                    r.phone,
                    c.name      as course_name
@@ -35,19 +34,23 @@ async def handle_update_progress(callback: CallbackQuery, state: FSMContext):
                      LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ? \
             """
-    results = db.execute_query(query, (registration_id,))
+    results = await db.aquery(query, (registration_id,))
     reg = results[0] if results else None
 
     if not reg:
         await callback.answer("Студент не найден", show_alert=True)
         return
 
+    # Последняя заметка о прогрессе
+    progress_notes = await db.registrations.aget_notes(registration_id, limit=1, note_type='progress')
+    current_progress = progress_notes[0]['text'] if progress_notes else 'Не указан'
+
     await state.update_data(registration_id=registration_id)
 
     from keyboards.admin_kb import get_progress_update_keyboard
     await callback.message.edit_text(
         f"📊 Обновление прогресса для {reg['name']}\n"
-        f"Текущий прогресс: {reg.get('notes', 'Не указан')}",
+        f"Текущий прогресс: {current_progress}",
         reply_markup=get_progress_update_keyboard(registration_id)
     )
     await callback.answer()
@@ -79,27 +82,16 @@ async def handle_progress_selection(callback: CallbackQuery, state: FSMContext):
 
         db = get_db()
 
-        # ✅ ИСПРАВЛЕНО: Прямой SQL UPDATE для добавления заметки
-        try:
-            query = """
-                    UPDATE registrations
-                    SET notes      = CASE \
-                                         WHEN notes IS NULL OR notes = '' THEN ? \
-                                         ELSE notes || '\n' || ?
-                        END,
-                        updated_at = datetime('now')
-                    WHERE id = ? \
-                    """
-            note_text = f"Прогресс: {progress_text}"
-            db.execute_update(query, (note_text, note_text, registration_id))
-        except Exception as e:
-            logger.error(f"Error adding note: {e}", exc_info=True)
+        # Заметка дописывается в registration_notes, регистрация не переписывается
+        await db.registrations.aadd_note(
+            registration_id, f"Прогресс: {progress_text}",
+            note_type='progress', author_id=callback.from_user.id
+        )
 
         # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT
         query = """
                 SELECT r.id, \
                        r.status_code, \
-                       r.notes,
                        r.full_name as name, \
                        r.phone,
                        c.name      as course_name
@@ -107,7 +99,7 @@ async def handle_progress_selection(callback: CallbackQuery, state: FSMContext):
                          LEFT JOIN courses c ON r.course_id = c.id
                 WHERE r.id = ? \
                 """
-        results = db.execute_query(query, (registration_id,))
+        results = await db.aquery(query, (registration_id,))
         reg = results[0] if results else None
 
         if reg:
@@ -135,27 +127,16 @@ async def handle_custom_progress_input(message: Message, state: FSMContext):
 
     db = get_db()
 
-    # ✅ ИСПРАВЛЕНО: Прямой SQL UPDATE для добавления заметки
-    try:
-        query = """
-                UPDATE registrations
-                SET notes      = CASE \
-                                     WHEN notes IS NULL OR notes = '' THEN ? \
-                                     ELSE notes || '\n' || ?
-                    END,
-                    updated_at = datetime('now')
-                WHERE id = ? \
-                """
-        note_text = f"Прогресс: {message.text}"
-        db.execute_update(query, (note_text, note_text, registration_id))
-    except Exception as e:
-        logger.error(f"Error adding note: {e}", exc_info=True)
+    # Заметка дописывается в registration_notes, регистрация не переписывается
+    await db.registrations.aadd_note(
+        registration_id, f"Прогресс: {message.text}",
+        note_type='progress', author_id=message.from_user.id
+    )
 
     # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT
     query = """
             SELECT r.id, \
                    r.status_code, \
-                   r.notes,
                    r.full_name as name, \
                    r.phone,
                    c.name      as course_name
@@ -163,7 +144,7 @@ async def handle_custom_progress_input(message: Message, state: FSMContext):
                      LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ? \
             """
-    results = db.execute_query(query, (registration_id,))
+    results = await db.aquery(query, (registration_id,))
     reg = results[0] if results else None
 
     if reg:
@@ -194,10 +175,9 @@ async def handle_student_contacts(callback: CallbackQuery):
     query = """
             SELECT r.id, \
                    r.status_code, \
-                   r.notes,
                    r.full_name as name, \
                    r.phone, \
-                   r.email,
+                   u.email,
                    u.telegram_id,
                    c.name      as course_name
             FROM registrations r
@@ -205,7 +185,7 @@ async def handle_student_contacts(callback: CallbackQuery):
                      LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ? \
             """
-    results = db.execute_query(query, (registration_id,))
+    results = await db.aquery(query, (registration_id,))
     reg = results[0] if results else None
 
     if not reg:
@@ -241,12 +221,11 @@ async def handle_full_info(callback: CallbackQuery):
     query = """
             SELECT r.id, \
                    r.status_code, \
-                   r.notes, \
                    r.created_at, \
                    r.updated_at,
                    r.full_name as name, \
                    r.phone, \
-                   r.email,
+                   u.email,
                    u.telegram_id,
                    c.name      as course_name
             FROM registrations r
@@ -254,13 +233,19 @@ async def handle_full_info(callback: CallbackQuery):
                      LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ? \
             """
-    results = db.execute_query(query, (registration_id,))
+    results = await db.aquery(query, (registration_id,))
     reg = results[0] if results else None
 
     if not reg:
         await callback.answer("Студент не найден", show_alert=True)
         return
 
+    # Последние заметки — по индексу (registration_id, id)
+    notes = await db.registrations.aget_notes(registration_id, limit=5)
+    notes_text = "\n".join(
+        f"- {note['created_at'][:16] if note.get('created_at') else ''} {note['text']}" for note in notes
+    ) or "- Нет заметок"
+
     full_info = f"""
 📋 Полная информация о студенте:
 
@@ -276,7 +261,9 @@ async def handle_full_info(callback: CallbackQuery):
 
 🎓 Обучение:
 - Курс: {reg.get('course_name', 'Не указан')}
-- Прогресс: {reg.get('notes', 'Не указан')}
+
+📝 Последние заметки:
+{notes_text}
 
 📅 Даты:
 - Зарегистрирован: {reg.get('created_at', 'Не указана')}
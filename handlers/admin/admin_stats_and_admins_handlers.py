@@ -1,6 +1,12 @@
+import asyncio
 import logging
+import os
+import tempfile
+from datetime import datetime
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
+from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from states.admin_states import AdminStates
@@ -24,56 +30,23 @@ async def show_general_stats(callback: CallbackQuery):
     try:
         db = get_db()
 
-        # ✅ ИСПРАВЛЕНО: Прямой SQL запрос для получения всех регистраций
-        query_all = """
-                    SELECT r.id, \
-                           r.status_code, \
-                           r.full_name, \
-                           r.phone,
-                           c.name as course_name
-                    FROM registrations r
-                             LEFT JOIN courses c ON r.course_id = c.id \
-                    """
-        all_students = db.execute_query(query_all)
-
-        # ✅ ИСПРАВЛЕНО: Считаем по статусам через SQL
-        stats_by_status = {}
-        for status_key, status_name in config.STATUSES.items():
-            query = """
-                    SELECT COUNT(*) as count
-                    FROM registrations
-                    WHERE status_code = ? \
-                    """
-            result = db.execute_query(query, (status_key,))
-            count = result[0]['count'] if result else 0
-            stats_by_status[status_name] = count
-
-        # Общая статистика
-        total_students = len(all_students)
+        # Счётчики stats_counters — один запрос вместо COUNT(*) по каждому статусу
+        overview = await db.stats.aget_overview()
+        total_students = overview['total']
 
         # Формируем текст
         text = "📊 *Общая статистика*\n\n"
         text += f"👥 *Всего студентов:* {total_students}\n\n"
 
         text += "📈 *По статусам:*\n"
-        for status_name, count in stats_by_status.items():
+        for status_key, status_name in config.STATUSES.items():
+            count = overview['by_status'].get(status_key, 0)
             percentage = (count / total_students * 100) if total_students > 0 else 0
             text += f"  • {status_name}: {count} ({percentage:.1f}%)\n"
 
-        # ✅ ИСПРАВЛЕНО: Статистика по курсам через SQL
         text += "\n📚 *По курсам:*\n"
-        query_courses = """
-                        SELECT c.name as course_name, COUNT(r.id) as count
-                        FROM registrations r
-                                 LEFT JOIN courses c ON r.course_id = c.id
-                        GROUP BY c.name
-                        ORDER BY count DESC \
-                        """
-        courses_stats = db.execute_query(query_courses)
-
-        for course in courses_stats:
-            if course.get('course_name'):
-                text += f"  • {course['course_name']}: {course['count']} чел.\n"
+        for course_name, count in sorted(overview['by_course'].items(), key=lambda item: -item[1]):
+            text += f"  • {course_name}: {count} чел.\n"
 
         from keyboards.admin_kb import get_admin_stats_menu
         await callback.message.edit_text(
@@ -99,45 +72,13 @@ async def show_weekly_stats(callback: CallbackQuery):
     try:
         db = get_db()
 
-        # ✅ ИСПРАВЛЕНО: Прямые SQL запросы для недельной статистики
-        # Новые регистрации за неделю
-        query_new = """
-                    SELECT COUNT(*) as count
-                    FROM registrations
-                    WHERE created_at >= datetime('now', '-7 days') \
-                    """
-        new_reg_result = db.execute_query(query_new)
-        new_registrations = new_reg_result[0]['count'] if new_reg_result else 0
-
-        # Завершили обучение за неделю
-        query_completed = """
-                          SELECT COUNT(*) as count
-                          FROM registrations
-                          WHERE status_code = 'completed'
-                            AND updated_at >= datetime('now', '-7 days') \
-                          """
-        completed_result = db.execute_query(query_completed)
-        completed = completed_result[0]['count'] if completed_result else 0
-
-        # Заморожено за неделю
-        query_frozen = """
-                       SELECT COUNT(*) as count
-                       FROM registrations
-                       WHERE status_code = 'frozen'
-                         AND updated_at >= datetime('now', '-7 days') \
-                       """
-        frozen_result = db.execute_query(query_frozen)
-        frozen = frozen_result[0]['count'] if frozen_result else 0
-
-        # Начали обучение за неделю
-        query_started = """
-                        SELECT COUNT(*) as count
-                        FROM registrations
-                        WHERE status_code = 'studying'
-                          AND updated_at >= datetime('now', '-7 days') \
-                        """
-        started_result = db.execute_query(query_started)
-        started_studying = started_result[0]['count'] if started_result else 0
+        # Журнал registration_status_events: updated_at сдвигается любой правкой,
+        # поэтому переходы считаем по самим событиям смены статуса
+        week = (await db.stats.aget_status_transitions({'week': '-7 days'}))['week']
+        new_registrations = week['new']
+        completed = week['by_status'].get('completed', 0)
+        frozen = week['by_status'].get('frozen', 0)
+        started_studying = week['by_status'].get('studying', 0)
 
         text = "📅 *Статистика за неделю*\n\n"
         text += f"📝 *Новых регистраций:* {new_registrations}\n"
@@ -169,53 +110,19 @@ async def show_feedback_stats(callback: CallbackQuery):
     try:
         db = get_db()
 
-        # ✅ ИСПРАВЛЕНО: Прямые SQL запросы для статистики отзывов
-        # Проверяем наличие таблицы feedback
-        check_table = """
-                      SELECT name \
-                      FROM sqlite_master
-                      WHERE type = 'table' \
-                        AND name = 'feedback' \
-                      """
-        table_exists = db.execute_query(check_table)
-
-        if not table_exists:
-            text = "💬 *Статистика обратной связи*\n\n"
-            text += "📝 Таблица отзывов не найдена.\n"
-            text += "Функция находится в разработке."
-        else:
-            # Общее количество
-            query_total = "SELECT COUNT(*) as count FROM feedback"
-            total_result = db.execute_query(query_total)
-            total = total_result[0]['count'] if total_result else 0
-
-            # По типам
-            query_reviews = "SELECT COUNT(*) as count FROM feedback WHERE type = 'review'"
-            reviews_result = db.execute_query(query_reviews)
-            reviews = reviews_result[0]['count'] if reviews_result else 0
-
-            query_suggestions = "SELECT COUNT(*) as count FROM feedback WHERE type = 'suggestion'"
-            suggestions_result = db.execute_query(query_suggestions)
-            suggestions = suggestions_result[0]['count'] if suggestions_result else 0
-
-            query_issues = "SELECT COUNT(*) as count FROM feedback WHERE type = 'issue'"
-            issues_result = db.execute_query(query_issues)
-            issues = issues_result[0]['count'] if issues_result else 0
-
-            # Средняя оценка
-            query_avg = "SELECT AVG(rating) as avg_rating FROM feedback WHERE rating IS NOT NULL"
-            avg_result = db.execute_query(query_avg)
-            avg_rating = avg_result[0]['avg_rating'] if avg_result and avg_result[0]['avg_rating'] else 0
-
-            text = "💬 *Статистика обратной связи*\n\n"
-            text += f"📝 *Всего отзывов:* {total}\n\n"
-            text += "📋 *По типам:*\n"
-            text += f"  ⭐ Отзывы: {reviews}\n"
-            text += f"  💡 Предложения: {suggestions}\n"
-            text += f"  🐞 Проблемы: {issues}\n\n"
-
-            if avg_rating > 0:
-                text += f"⭐ *Средняя оценка:* {avg_rating:.1f}/5\n"
+        # Счётчики stats_counters ведутся триггерами на feedback
+        feedback = await db.stats.aget_feedback_overview()
+        by_type = feedback['by_type']
+
+        text = "💬 *Статистика обратной связи*\n\n"
+        text += f"📝 *Всего отзывов:* {feedback['total']}\n\n"
+        text += "📋 *По типам:*\n"
+        text += f"  ⭐ Отзывы: {by_type.get('review', 0)}\n"
+        text += f"  💡 Предложения: {by_type.get('suggestion', 0)}\n"
+        text += f"  🐞 Проблемы: {by_type.get('issue', 0)}\n\n"
+
+        if feedback['avg_rating'] > 0:
+            text += f"⭐ *Средняя оценка:* {feedback['avg_rating']:.1f}/5\n"
 
         from keyboards.admin_kb import get_admin_stats_menu
         await callback.message.edit_text(
@@ -241,44 +148,33 @@ async def show_payment_stats(callback: CallbackQuery):
     try:
         db = get_db()
 
-        # ✅ ИСПРАВЛЕНО: Прямые SQL запросы для получения студентов по статусам
-        query_waiting = """
-                        SELECT r.id, \
-                               r.full_name as name, \
-                               r.phone,
-                               c.name      as course_name
-                        FROM registrations r
-                                 LEFT JOIN courses c ON r.course_id = c.id
-                        WHERE r.status_code = 'waiting_payment' \
-                        """
-        waiting_payment = db.execute_query(query_waiting)
-
-        query_studying = """
-                         SELECT COUNT(*) as count
-                         FROM registrations
-                         WHERE status_code = 'studying' \
-                         """
-        studying_result = db.execute_query(query_studying)
-        studying_count = studying_result[0]['count'] if studying_result else 0
-
-        query_completed = """
-                          SELECT COUNT(*) as count
-                          FROM registrations
-                          WHERE status_code = 'completed' \
-                          """
-        completed_result = db.execute_query(query_completed)
-        completed_count = completed_result[0]['count'] if completed_result else 0
+        by_status = (await db.stats.aget_counters(('status',)))['status']
+        waiting_count = by_status.get(('waiting_payment', ''), 0)
+        studying_count = by_status.get(('studying', ''), 0)
+        completed_count = by_status.get(('completed', ''), 0)
 
         text = "💰 *Статистика по оплатам*\n\n"
-        text += f"🟠 *Ожидают оплаты:* {len(waiting_payment)} чел.\n"
+        text += f"🟠 *Ожидают оплаты:* {waiting_count} чел.\n"
         text += f"🔵 *Оплатили и обучаются:* {studying_count} чел.\n"
         text += f"🟣 *Завершили курс:* {completed_count} чел.\n\n"
 
-        # Список ожидающих оплату
-        if waiting_payment and len(waiting_payment) <= 10:
+        # Список ожидающих оплату — только если он короткий
+        if 0 < waiting_count <= 10:
+            query_waiting = """
+                            SELECT r.id, \
+                                   r.full_name as name, \
+                                   c.name      as course_name
+                            FROM registrations r
+                                     LEFT JOIN courses c ON r.course_id = c.id
+                            WHERE r.status_code = 'waiting_payment'
+                            ORDER BY r.created_at DESC, r.id DESC
+                            LIMIT 10 \
+                            """
+            waiting_payment = await db.readonly.aquery(query_waiting)
+
             text += "👥 *Список ожидающих:*\n"
-            for student in waiting_payment[:10]:
-                course = student.get('course_name', 'Не указан')
+            for student in waiting_payment:
+                course = student.get('course_name') or 'Не указан'
                 name = student.get('name', 'Не указано')
                 text += f"  • {name} - {course}\n"
 
@@ -296,6 +192,312 @@ async def show_payment_stats(callback: CallbackQuery):
     await callback.answer()
 
 
+@router.message(Command("rebuild_stats"))
+async def rebuild_stats_counters(message: Message):
+    """Пересчитать счётчики статистики (если они разошлись с данными)"""
+    if not is_admin(message.from_user.id):
+        return
+
+    db = get_db()
+    if await db.stats.arebuild():
+        await message.answer("✅ Счётчики статистики пересчитаны")
+    else:
+        await message.answer("❌ Не удалось пересчитать счётчики")
+
+
+@router.message(Command("db_queries"))
+async def show_query_profile(message: Message):
+    """
+    Статистика запросов к БД
+
+    /db_queries — самые тяжёлые запросы
+    /db_queries on [мс] | off | reset | dump
+    """
+    if not is_admin(message.from_user.id):
+        return
+
+    db = get_db()
+    args = (message.text or "").split()[1:]
+    action = args[0].lower() if args else ""
+
+    if action == "on":
+        try:
+            slow_ms = float(args[1]) if len(args) > 1 else config.DB_SLOW_QUERY_MS
+        except ValueError:
+            await message.answer("❌ Порог укажите числом (мс): /db_queries on 50")
+            return
+        db.enable_profiling(slow_ms)
+        await message.answer(f"✅ Профилирование запросов включено (медленные > {slow_ms:g} мс)")
+        return
+
+    if action == "off":
+        db.disable_profiling()
+        await message.answer("⏹ Профилирование запросов выключено")
+        return
+
+    if db.profiler is None:
+        await message.answer("ℹ️ Профилирование выключено. Включить: /db_queries on [мс]")
+        return
+
+    if action == "reset":
+        db.profiler.reset()
+        await message.answer("🧹 Статистика запросов очищена")
+        return
+
+    if action == "dump":
+        from aiogram.types import FSInputFile
+        path = await db.run_async(db.profiler.dump, config.DB_PROFILE_DUMP)
+        await message.answer_document(FSInputFile(path), caption="📄 Статистика запросов")
+        return
+
+    summary = db.profiler.summary()
+    text = (
+        f"🗄 Запросы к БД\n\n"
+        f"Запросов: {summary['queries']}, форм: {summary['shapes']}\n"
+        f"Время: {summary['total_ms']:.0f} мс, медленных (> {summary['slow_ms']:g} мс): {summary['slow']}\n"
+        f"Форм с полным проходом таблицы: {summary['full_scans']}\n"
+    )
+    for i, item in enumerate(db.profiler.report(top=10), 1):
+        shape = item['shape'] if len(item['shape']) <= 160 else item['shape'][:160] + "…"
+        text += (
+            f"\n{i}. {'⚠️ SCAN ' if item['full_scan'] else ''}"
+            f"{item['count']}× · всего {item['total_ms']:.1f} мс · "
+            f"p50 {item['p50_ms']:.2f} · p99 {item['p99_ms']:.2f} мс · строк {item['rows']}\n"
+            f"{shape}\n"
+        )
+
+    # Без parse_mode: в SQL встречаются * и _
+    await message.answer(text[:4000])
+
+
+@router.message(Command("send_queue"))
+async def show_send_queue(message: Message):
+    """Очереди исходящих сообщений и срабатывания flood control"""
+    if not is_admin(message.from_user.id):
+        return
+
+    from utils.send_scheduler import get_send_scheduler
+    stats = get_send_scheduler().stats()
+    queued = stats['queued']
+    sent = stats['sent']
+    text = (
+        f"📮 Исходящие сообщения\n\n"
+        f"В очереди: ответы {queued['interactive']}, уведомления {queued['notify']}, "
+        f"рассылки {queued['bulk']}\n"
+        f"Ждут лимита чата: {stats['chat_waiting']}\n"
+        f"Отправлено: ответы {sent['interactive']}, уведомления {sent['notify']}, рассылки {sent['bulk']}\n"
+        f"Ожидание: в среднем {stats['avg_wait_ms']} мс, максимум {stats['max_wait_ms']} мс\n"
+        f"429 (retry after): {stats['retry_after']}"
+    )
+    if stats['bulk_paused_s']:
+        text += f"\n⏸ Рассылки на паузе ещё {stats['bulk_paused_s']} с"
+    await message.answer(text)
+
+
+@router.message(Command("handler_stats"))
+async def show_handler_stats(message: Message):
+    """Самые медленные обработчики (p99) и вызовы Telegram API"""
+    if not is_admin(message.from_user.id):
+        return
+
+    if not config.METRICS_ENABLED:
+        await message.answer("ℹ️ Метрики выключены (METRICS_ENABLED=0)")
+        return
+
+    from utils.metrics import get_metrics
+    snapshot = get_metrics().snapshot()
+    text = f"⏱ Обработчики за {snapshot['uptime_s'] // 60} мин\n\n"
+    for i, item in enumerate(snapshot['handlers'][:10], 1):
+        text += (
+            f"{i}. {item['router']}.{item['handler']}: {item['count']}× · "
+            f"p50 {item['p50_ms']:.0f} · p99 {item['p99_ms']:.0f} · max {item['max_ms']:.0f} мс"
+        )
+        if item['errors']:
+            text += f" · ошибок {item['errors']}"
+        text += "\n"
+    if not snapshot['handlers']:
+        text += "Вызовов ещё не было\n"
+
+    api = sorted(snapshot['telegram_api'].items(), key=lambda pair: pair[1]['count'], reverse=True)
+    if api:
+        text += "\n📡 Telegram API:\n"
+        for method, item in api[:8]:
+            text += f"• {method}: {item['count']}× · p99 {item['p99_ms']:.0f} мс · ошибок {item['errors']}\n"
+
+    # Без parse_mode: в именах обработчиков встречается _
+    await message.answer(text[:4000])
+
+
+@router.message(Command("notifications"))
+async def show_notification_failures(message: Message):
+    """Недоставленные уведомления админам (новые регистрации, отзывы)"""
+    if not is_admin(message.from_user.id):
+        return
+
+    db = get_db()
+    failures = await db.notifications.aget_failures(10)
+    summary = await db.notifications.aget_summary(int(datetime.now().timestamp()) - 7 * 86400)
+    text = (
+        f"🔔 Уведомления админам за 7 дней\n\n"
+        f"Доставлено: {summary.get('sent', 0)}, не доставлено: {summary.get('failed', 0)}, "
+        f"в работе: {summary.get('pending', 0)}\n"
+    )
+    if failures:
+        text += "\nПоследние ошибки:\n"
+        for item in failures:
+            created = datetime.fromtimestamp(item['created_at']).strftime('%d.%m %H:%M')
+            text += (f"• {created} {item['kind']} #{item['ref']} → {item['admin_id']} "
+                     f"({item['attempts']} попыт.): {item['error']}\n")
+    await message.answer(text[:4000])
+
+
+@router.message(Command("backup"))
+async def create_backup(message: Message):
+    """Снять резервную копию БД сейчас (/backup list — список копий)"""
+    if not is_admin(message.from_user.id):
+        return
+
+    from database.backup import get_backup_service
+    service = get_backup_service()
+    args = (message.text or "").split()[1:]
+
+    if args and args[0].lower() == "list":
+        backups = service.list_backups()
+        if not backups:
+            await message.answer("📦 Резервных копий пока нет")
+            return
+        text = "📦 Резервные копии:\n\n"
+        for backup in backups:
+            created = datetime.fromtimestamp(backup['created']).strftime('%d.%m.%Y %H:%M')
+            text += f"• {os.path.basename(backup['path'])} — {backup['size'] / 1024:.0f} КБ, {created}\n"
+        await message.answer(text)
+        return
+
+    await message.answer("⏳ Создаю резервную копию...")
+    try:
+        info = await service.acreate()
+    except Exception as e:
+        logger.error(f"Error creating backup: {e}", exc_info=True)
+        await message.answer("❌ Не удалось создать резервную копию")
+        return
+
+    verified = info['verified']
+    if verified is None:
+        check = "не проверялась"
+    elif verified['ok']:
+        check = f"✅ integrity_check ok, схема v{verified['schema_version']}"
+    else:
+        check = f"❌ ошибки: {'; '.join(verified['errors'][:3])}"
+
+    await message.answer(
+        f"📦 Копия создана: {os.path.basename(info['path'])}\n"
+        f"Размер: {info['size'] / 1024:.0f} КБ, время: {info['seconds']} с\n"
+        f"Проверка: {check}"
+    )
+
+
+@router.message(Command("export"))
+async def export_registrations(message: Message):
+    """Выгрузить регистрации в CSV (/export [статус])"""
+    if not is_admin(message.from_user.id):
+        return
+
+    args = (message.text or "").split()[1:]
+    status = args[0] if args else None
+    if status and status not in config.STATUSES:
+        await message.answer(f"❌ Неизвестный статус. Доступные: {', '.join(config.STATUSES)}")
+        return
+
+    db = get_db()
+    fd, path = tempfile.mkstemp(prefix="registrations_", suffix=".csv")
+    os.close(fd)
+    try:
+        # Отдельный поток, а не пул AsyncExecutor: выгрузка может идти дольше таймаута запросов
+        count = await asyncio.to_thread(db.registrations.export_csv, path, status)
+        if not count:
+            await message.answer("📭 Нет регистраций для выгрузки")
+            return
+
+        from aiogram.types import FSInputFile
+        filename = f"registrations_{status or 'all'}_{datetime.now():%Y%m%d_%H%M}.csv"
+        await message.answer_document(
+            FSInputFile(path, filename=filename),
+            caption=f"📄 Регистрации: {count}"
+        )
+    except Exception as e:
+        logger.error(f"Error exporting registrations: {e}", exc_info=True)
+        await message.answer("❌ Не удалось выгрузить регистрации")
+    finally:
+        os.remove(path)
+
+
+@router.message(Command("archive"))
+async def manage_archive(message: Message):
+    """
+    Архив регистраций
+
+    /archive — сколько в архиве
+    /archive run — перенести подходящие регистрации сейчас
+    /archive find <имя, телефон или текст заметки>
+    /archive restore <id>
+    """
+    if not is_admin(message.from_user.id):
+        return
+
+    from database.archive import get_archiver
+    archiver = get_archiver()
+    args = (message.text or "").split(maxsplit=2)[1:]
+    action = args[0].lower() if args else ""
+
+    if action == "run":
+        await message.answer("⏳ Переношу старые регистрации в архив...")
+        try:
+            moved = await asyncio.to_thread(archiver.run)
+        except Exception as e:
+            logger.error(f"Error archiving registrations: {e}", exc_info=True)
+            await message.answer("❌ Архивация не удалась")
+            return
+        lines = [f"• {reason}: {count}" for reason, count in moved.items()]
+        await message.answer("📦 Перенесено в архив:\n" + ("\n".join(lines) or "ничего"))
+        return
+
+    if action == "find":
+        if len(args) < 2:
+            await message.answer("❌ Укажите, что искать: /archive find Иванов")
+            return
+        results = await archiver.asearch(args[1])
+        if not results:
+            await message.answer("🔍 В архиве ничего не найдено")
+            return
+        text = "🔍 Найдено в архиве:\n\n"
+        for row in results:
+            status = config.STATUSES.get(row['status_code'], row['status_code'])
+            text += (f"#{row['id']} {row['name']} — {row.get('course_name') or 'Курс не указан'}\n"
+                     f"   {row['phone']}, {status}, в архиве с {row['archived_at']}\n")
+        text += "\nВернуть: /archive restore <id>"
+        await message.answer(text)
+        return
+
+    if action == "restore":
+        if len(args) < 2 or not args[1].strip().isdigit():
+            await message.answer("❌ Укажите ID регистрации: /archive restore 123")
+            return
+        reg_id = int(args[1].strip())
+        if await archiver.arestore(reg_id):
+            await message.answer(f"✅ Регистрация #{reg_id} возвращена из архива")
+        else:
+            await message.answer(f"❌ Регистрации #{reg_id} нет в архиве")
+        return
+
+    summary = await archiver.aget_summary()
+    total = sum(summary.values())
+    text = f"📦 В архиве регистраций: {total}\n"
+    for reason, count in summary.items():
+        text += f"• {reason or 'без причины'}: {count}\n"
+    text += "\n/archive run | find <текст> | restore <id>"
+    await message.answer(text)
+
+
 # ============ УПРАВЛЕНИЕ АДМИНИСТРАТОРАМИ ============
 
 @router.callback_query(F.data == "add_admin")
@@ -345,7 +547,7 @@ async def process_admin_id(message: Message, state: FSMContext):
         # ✅ ИСПРАВЛЕНО: Проверка что администратор ещё не добавлен через SQL
         db = get_db()
         query_check = "SELECT user_id FROM admins WHERE user_id = ?"
-        existing = db.execute_query(query_check, (admin_id,))
+        existing = await db.aquery(query_check, (admin_id,))
 
         if existing:
             await message.answer(f"⚠️ Пользователь {admin_id} уже является администратором!")
@@ -357,7 +559,8 @@ async def process_admin_id(message: Message, state: FSMContext):
                            INSERT INTO admins (user_id, is_active, created_at)
                            VALUES (?, 1, datetime('now')) \
                            """
-            db.execute_insert(query_insert, (admin_id,))
+            await db.ainsert(query_insert, (admin_id,))
+            db.admin_cache.add(admin_id)
             success = True
         except Exception as e:
             logger.error(f"Error adding admin: {e}", exc_info=True)
@@ -415,7 +618,7 @@ async def remove_admin_start(callback: CallbackQuery, state: FSMContext):
             WHERE is_active = 1
             ORDER BY created_at DESC \
             """
-    admins = db.execute_query(query)
+    admins = await db.aquery(query)
 
     if len(admins) <= 1:
         await callback.answer(
@@ -473,7 +676,7 @@ async def process_remove_admin_id(message: Message, state: FSMContext):
         # ✅ ИСПРАВЛЕНО: Проверка что это администратор через SQL
         db = get_db()
         query_check = "SELECT user_id FROM admins WHERE user_id = ?"
-        existing = db.execute_query(query_check, (admin_id,))
+        existing = await db.aquery(query_check, (admin_id,))
 
         if not existing:
             await message.answer(f"⚠️ Пользователь {admin_id} не является администратором!")
@@ -482,7 +685,8 @@ async def process_remove_admin_id(message: Message, state: FSMContext):
         # ✅ ИСПРАВЛЕНО: Удаляем администратора через SQL
         try:
             query_delete = "DELETE FROM admins WHERE user_id = ?"
-            db.execute_update(query_delete, (admin_id,))
+            await db.aupdate(query_delete, (admin_id,))
+            db.admin_cache.remove(admin_id)
             success = True
         except Exception as e:
             logger.error(f"Error removing admin: {e}", exc_info=True)
@@ -525,27 +729,24 @@ async def process_remove_admin_id(message: Message, state: FSMContext):
         )
 
 
-@router.callback_query(F.data == "list_admins")
+@router.callback_query(F.data.startswith("list_admins"))
 async def list_admins(callback: CallbackQuery):
-    """Показать список администраторов"""
+    """Показать список администраторов (постранично)"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Доступ запрещён")
         return
 
-    # ✅ ИСПРАВЛЕНО: Получаем список администраторов через SQL
+    # Страница администраторов по keyset-курсору из callback_data
+    from database.pagination import parse_page_callback
     db = get_db()
-    query = """
-            SELECT user_id, username, full_name, created_at, is_active
-            FROM admins
-            ORDER BY created_at DESC \
-            """
-    admins = db.execute_query(query)
+    page = await db.admins.aget_page("list_admins", parse_page_callback(callback.data, "list_admins"))
+    admins = page.rows
 
     if not admins:
         text = "📋 Список администраторов пуст"
     else:
         text = "📋 *Список администраторов:*\n\n"
-        for i, admin in enumerate(admins, 1):
+        for i, admin in enumerate(admins, page.start_index):
             text += f"{i}. 👤 ID: `{admin['user_id']}`\n"
             if admin.get('username'):
                 text += f"   📱 @{admin['username']}\n"
@@ -554,10 +755,21 @@ async def list_admins(callback: CallbackQuery):
             text += f"   📅 Добавлен: {admin['created_at'][:10]}\n"
             text += f"   🔹 Статус: {'✅ Активен' if admin['is_active'] else '❌ Неактивен'}\n\n"
 
-    from keyboards.admin_kb import get_admin_admins_menu
+    if page.has_prev or page.has_next:
+        from keyboards.admin_kb import get_pagination_keyboard
+        reply_markup = get_pagination_keyboard(
+            page.page,
+            back_callback="admin_admins_menu",
+            prev_callback=page.prev_callback,
+            next_callback=page.next_callback
+        )
+    else:
+        from keyboards.admin_kb import get_admin_admins_menu
+        reply_markup = get_admin_admins_menu()
+
     await callback.message.edit_text(
         text,
         parse_mode="Markdown",
-        reply_markup=get_admin_admins_menu()
+        reply_markup=reply_markup
     )
     await callback.answer()
\ No newline at end of file
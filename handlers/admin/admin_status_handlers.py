@@ -53,7 +53,7 @@ async def quick_status_change(callback: CallbackQuery, state: FSMContext):
             LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ?
         """
-        results = db.execute_query(query, (registration_id,))
+        results = await db.aquery(query, (registration_id,))
         reg = results[0] if results else None
 
         if not reg:
@@ -131,20 +131,9 @@ async def confirm_status_change(callback: CallbackQuery):
             await callback.answer("❌ Неверный ID студента")
             return
 
-        # ✅ ИСПРАВЛЕНО: Прямой SQL UPDATE
+        # Смена статуса и запись в журнал registration_status_events — одна транзакция
         db = get_db()
-        try:
-            query = """
-                UPDATE registrations
-                SET status_code = ?,
-                    updated_at = datetime('now')
-                WHERE id = ?
-            """
-            db.execute_update(query, (new_status, registration_id))
-            success = True
-        except Exception as e:
-            logger.error(f"Error updating status: {e}", exc_info=True)
-            success = False
+        success = await db.registrations.aupdate_status(registration_id, new_status)
 
         if success:
             # ✅ ИСПРАВЛЕНО: Прямой SQL SELECT для получения обновлённых данных
@@ -156,7 +145,7 @@ async def confirm_status_change(callback: CallbackQuery):
                 LEFT JOIN courses c ON r.course_id = c.id
                 WHERE r.id = ?
             """
-            results = db.execute_query(query, (registration_id,))
+            results = await db.aquery(query, (registration_id,))
             reg = results[0] if results else None
 
             if not reg:
@@ -198,7 +187,7 @@ async def confirm_status_change(callback: CallbackQuery):
                 LEFT JOIN courses c ON r.course_id = c.id
                 WHERE r.id = ?
             """
-            results = db.execute_query(query, (registration_id,))
+            results = await db.aquery(query, (registration_id,))
             reg = results[0] if results else None
 
             if reg:
@@ -235,7 +224,7 @@ async def cancel_status_change(callback: CallbackQuery):
             LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ?
         """
-        results = db.execute_query(query, (registration_id,))
+        results = await db.aquery(query, (registration_id,))
         reg = results[0] if results else None
 
         if reg:
@@ -275,7 +264,7 @@ async def back_to_student(callback: CallbackQuery):
             LEFT JOIN courses c ON r.course_id = c.id
             WHERE r.id = ?
         """
-        results = db.execute_query(query, (registration_id,))
+        results = await db.aquery(query, (registration_id,))
         reg = results[0] if results else None
 
         if reg:
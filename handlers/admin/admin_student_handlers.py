@@ -2,7 +2,7 @@ import logging
 
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 
 from config import Config
 from helpers import is_admin, get_db
@@ -22,7 +22,9 @@ async def view_students_by_status(callback: CallbackQuery):
         await callback.answer("❌ Доступ запрещён")
         return
 
-    status = callback.data.replace("view_students_", "")
+    # view_students_{status} или view_students_{status}:{page}:{n|p}:{cursor}
+    status = callback.data.replace("view_students_", "").split(":", 1)[0]
+    prefix = f"view_students_{status}"
 
     # Маппинг статусов
     status_map = {
@@ -36,27 +38,13 @@ async def view_students_by_status(callback: CallbackQuery):
 
     db_status = status_map.get(status, status)
 
-    # ✅ ИСПРАВЛЕНО: Используем прямой SQL с JOIN для получения course_name
+    # Одна регистрация на страницу, keyset-курсор в callback_data
+    from database.pagination import parse_page_callback
     db = get_db()
-    query = """
-            SELECT r.id, \
-                   r.user_id, \
-                   r.status_code, \
-                   r.created_at, \
-                   r.updated_at, \
-                   r.full_name as name, \
-                   r.phone, \
-                   c.name      as course_name, \
-                   tt.name     as training_type_name, \
-                   s.name      as schedule_name
-            FROM registrations r
-                     LEFT JOIN courses c ON r.course_id = c.id
-                     LEFT JOIN training_types tt ON r.training_type_id = tt.id
-                     LEFT JOIN schedules s ON r.schedule_id = s.id
-            WHERE r.status_code = ?
-            ORDER BY r.created_at DESC \
-            """
-    registrations = db.execute_query(query, (db_status,))
+    page = await db.registrations.aget_page_by_status(
+        db_status, prefix, parse_page_callback(callback.data, prefix)
+    )
+    registrations = page.rows
 
     status_names = {
         'active': '🟢 Активные',
@@ -79,15 +67,14 @@ async def view_students_by_status(callback: CallbackQuery):
         await callback.answer()
         return
 
-    # Показываем первого студента
+    # Показываем студента текущей страницы
     reg = registrations[0]
     status_text = config.STATUSES.get(reg['status_code'], reg['status_code'])
 
     # ✅ ИСПРАВЛЕНО: Используем .get() для безопасного доступа
     info_text = (
-        f"📋 *Студенты: {status_name}*\n"
-        f"Всего: {len(registrations)}\n\n"
-        f"👤 *Студент 1/{len(registrations)}*\n\n"
+        f"📋 *Студенты: {status_name}*\n\n"
+        f"👤 *Студент {page.start_index}*\n\n"
         f"📛 Имя: {reg.get('name', 'Не указано')}\n"
         f"📞 Телефон: {reg.get('phone', 'Не указан')}\n"
         f"🎯 Курс: {reg.get('course_name', 'Не указан')}\n"
@@ -95,11 +82,15 @@ async def view_students_by_status(callback: CallbackQuery):
         f"🆔 ID: {reg['id']}\n"
     )
 
-    from keyboards.admin_kb import get_student_actions_keyboard
+    from keyboards.admin_kb import get_student_actions_keyboard, get_pagination_row
+    pagination_row = None
+    if page.has_prev or page.has_next:
+        pagination_row = get_pagination_row(page.page, prev_callback=page.prev_callback,
+                                            next_callback=page.next_callback)
     await callback.message.edit_text(
         info_text,
         parse_mode="Markdown",
-        reply_markup=get_student_actions_keyboard(reg['id'], reg['status_code'])
+        reply_markup=get_student_actions_keyboard(reg['id'], reg['status_code'], pagination_row)
     )
     await callback.answer()
 
@@ -156,7 +147,7 @@ async def find_student_by_id_process(message: Message, state: FSMContext):
                          LEFT JOIN schedules s ON r.schedule_id = s.id
                 WHERE r.id = ? \
                 """
-        results = db.execute_query(query, (student_id,))
+        results = await db.aquery(query, (student_id,))
         reg = results[0] if results else None
 
         if not reg:
@@ -204,7 +195,7 @@ async def find_student_by_phone_start(callback: CallbackQuery, state: FSMContext
     from keyboards.admin_kb import get_cancel_keyboard
     await callback.message.edit_text(
         "🔍 *Поиск студента по телефону*\n\n"
-        "Введите номер телефона:",
+        "Введите номер телефона или его последние 7–9 цифр:",
         parse_mode="Markdown",
         reply_markup=get_cancel_keyboard()
     )
@@ -225,25 +216,9 @@ async def find_student_by_phone_process(message: Message, state: FSMContext):
 
     phone = message.text.strip()
 
-    # ✅ ИСПРАВЛЕНО: SQL с JOIN уже был правильным
+    # Точный номер или последние 7–9 цифр — поиск по индексу
     db = get_db()
-    query = """
-            SELECT r.id, \
-                   r.user_id, \
-                   r.status_code, \
-                   r.created_at, \
-                   r.full_name as name, \
-                   r.phone, \
-                   c.name      as course_name, \
-                   tt.name     as training_type_name, \
-                   s.name      as schedule_name
-            FROM registrations r
-                     LEFT JOIN courses c ON r.course_id = c.id
-                     LEFT JOIN training_types tt ON r.training_type_id = tt.id
-                     LEFT JOIN schedules s ON r.schedule_id = s.id
-            WHERE r.phone LIKE ? \
-            """
-    registrations = db.execute_query(query, (f'%{phone}%',))
+    registrations = await db.registrations.afind_by_phone(phone)
 
     if not registrations:
         from keyboards.admin_kb import get_cancel_keyboard
@@ -275,6 +250,72 @@ async def find_student_by_phone_process(message: Message, state: FSMContext):
     await state.clear()
 
 
+# ============ ПОЛНОТЕКСТОВЫЙ ПОИСК ============
+
+@router.callback_query(F.data == "search_students")
+async def search_students_start(callback: CallbackQuery, state: FSMContext):
+    """Начать поиск студента по имени, заметкам и отзывам"""
+    if not is_admin(callback.from_user.id):
+        return
+
+    await state.set_state(AdminStates.waiting_for_search_query)
+    from keyboards.admin_kb import get_cancel_keyboard
+    await callback.message.edit_text(
+        "🔎 *Поиск студента*\n\n"
+        "Введите имя или слова из заметок/отзывов.\n"
+        "Можно начало слова: `иван пет`",
+        parse_mode="Markdown",
+        reply_markup=get_cancel_keyboard()
+    )
+    await callback.answer()
+
+
+@router.message(AdminStates.waiting_for_search_query)
+async def search_students_process(message: Message, state: FSMContext):
+    """Обработка полнотекстового поиска"""
+    if not is_admin(message.from_user.id):
+        return
+
+    if message.text in ["❌ Отмена", "◀️ Назад"]:
+        await state.clear()
+        from keyboards.admin_kb import get_admin_students_menu
+        await message.answer("❌ Поиск отменён", reply_markup=get_admin_students_menu())
+        return
+
+    db = get_db()
+    results = await db.search.asearch_students(message.text or "", limit=10)
+
+    if not results:
+        from keyboards.admin_kb import get_cancel_keyboard
+        await message.answer(
+            "❌ Ничего не найдено\n\n"
+            "Попробуйте другой запрос:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return
+
+    kind_names = {'user': '👤 имя', 'registration': '📝 заметки', 'feedback': '💬 отзыв'}
+
+    # Без Markdown: в найденных фрагментах произвольный текст пользователей
+    text = f"🔎 Найдено: {len(results)}\n\n"
+    buttons = []
+    for i, row in enumerate(results, 1):
+        status_text = config.STATUSES.get(row['status_code'], row['status_code'])
+        text += (
+            f"{i}. {row.get('name') or 'Без имени'} (ID {row['registration_id']})\n"
+            f"   📊 {status_text} · {kind_names.get(row['kind'], row['kind'])}\n"
+            f"   {row['snippet']}\n\n"
+        )
+        buttons.append([InlineKeyboardButton(
+            text=f"📋 {i}. {row.get('name') or row['registration_id']}",
+            callback_data=f"full_info_{row['registration_id']}"
+        )])
+    buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="admin_students_menu")])
+
+    await message.answer(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+    await state.clear()
+
+
 # ============ НАЗНАЧЕНИЕ ПРОБНОГО УРОКА ============
 
 @router.callback_query(F.data.startswith("schedule_trial_"))
@@ -304,7 +345,7 @@ async def schedule_trial_start(callback: CallbackQuery, state: FSMContext):
                          LEFT JOIN schedules s ON r.schedule_id = s.id
                 WHERE r.id = ? \
                 """
-        results = db.execute_query(query, (reg_id,))
+        results = await db.aquery(query, (reg_id,))
         reg = results[0] if results else None
 
         if not reg:
@@ -368,25 +409,10 @@ async def set_trial_time(message: Message, state: FSMContext):
 
     db = get_db()
 
-    # ✅ ИСПРАВЛЕНО: Прямые SQL запросы вместо методов репозитория
-    # Устанавливаем время пробного урока
+    # Время урока и статус 'trial' — одной транзакцией
     try:
-        query_time = """
-                     UPDATE registrations
-                     SET trial_lesson_time = ?,
-                         updated_at        = datetime('now')
-                     WHERE id = ? \
-                     """
-        db.execute_update(query_time, (message.text, reg_id))
-
-        # Меняем статус на 'trial'
-        query_status = """
-                       UPDATE registrations
-                       SET status_code = 'trial',
-                           updated_at  = datetime('now')
-                       WHERE id = ? \
-                       """
-        db.execute_update(query_status, (reg_id,))
+        if not await db.registrations.aschedule_trial(reg_id, message.text):
+            raise RuntimeError(f"Registration {reg_id} was not updated")
 
         from keyboards.admin_kb import get_admin_students_menu
         await message.answer(
@@ -1,5 +1,6 @@
 import asyncio
 import datetime
+import hashlib
 import logging
 import os
 import sys
@@ -300,52 +301,23 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext):
         print(f"🔍 DEBUG: Starting registration confirmation for user {callback.from_user.id}")
         print(f"🔍 DEBUG: Registration data: {data}")
 
-        # ✅ Создаем пользователя (если не существует)
-        user_query = """
-                     INSERT OR IGNORE
-                     INTO users (telegram_id, full_name, phone)
-                     VALUES (?, ?, ?)
-                     """
-        db.execute_update(user_query, (
-            callback.from_user.id,
-            data['name'],
-            data['phone']
-        ))
-
-        # Получаем user_id
-        user_query = "SELECT id FROM users WHERE telegram_id = ?"
-        user_rows = db.execute_query(user_query, (callback.from_user.id,))
-        user_id = user_rows[0]['id'] if user_rows else None
+        # ✅ Пользователь, справочники и регистрация — одной транзакцией
+        # Статус 'trial' (пробный урок) для новых регистраций
+        reg_id = await db.registrations.aregister_from_telegram(
+            telegram_id=callback.from_user.id,
+            full_name=data['name'],
+            phone=data['phone'],
+            course=data['course'],
+            training_type=data['training_type'],
+            schedule=data['schedule'],
+            status='trial'
+        )
 
-        if not user_id:
-            await callback.message.edit_text("❌ Ошибка создания пользователя")
+        if not reg_id:
+            await callback.message.edit_text("❌ Ошибка создания регистрации")
             await callback.answer()
             return
 
-        # Получаем ID курса по названию
-        course_query = "SELECT id FROM courses WHERE name = ?"
-        course_rows = db.execute_query(course_query, (data['course'],))
-        course_id = course_rows[0]['id'] if course_rows else 1  # По умолчанию первый курс
-
-        # Получаем ID типа обучения
-        training_query = "SELECT id FROM training_types WHERE name = ?"
-        training_rows = db.execute_query(training_query, (data['training_type'],))
-        training_type_id = training_rows[0]['id'] if training_rows else 1
-
-        # Получаем ID расписания
-        schedule_query = "SELECT id FROM schedules WHERE name = ?"
-        schedule_rows = db.execute_query(schedule_query, (data['schedule'],))
-        schedule_id = schedule_rows[0]['id'] if schedule_rows else 1
-
-        # ✅ Создаем регистрацию со статусом 'trial' (пробный урок)
-        reg_id = db.registrations.create(
-            user_id=user_id,
-            course_id=course_id,
-            training_type_id=training_type_id,
-            schedule_id=schedule_id,
-            status='trial'  # ✅ ИСПРАВЛЕНО: правильный статус для новых регистраций
-        )
-
         print(f"✅ DEBUG: Registration created with ID: {reg_id}")
 
         # ✅ ДОБАВЛЕНО: Отправляем подтверждение пользователю
@@ -368,9 +340,8 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext):
             reply_markup=get_main_keyboard()
         )
 
-        # ✅ ДОБАВЛЕНО: Отправляем уведомление администраторам
-        bot = callback.bot  # Получаем экземпляр бота из callback
-        await send_registration_to_admins(bot, data, callback.from_user)
+        # Уведомление администраторам уходит в фоне, пользователь его не ждёт
+        send_registration_to_admins(callback.bot, data, callback.from_user, reg_id)
 
         # ✅ ДОБАВЛЕНО: Очищаем состояние
         await state.clear()
@@ -390,74 +361,8 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Ошибка регистрации")
 
 
-async def send_registration_to_admins(bot, data, user):
-    """Отправка уведомления о новой регистрации администраторам"""
-    try:
-        message_text = (
-            "🆕 *НОВАЯ РЕГИСТРАЦИЯ!*\n\n"
-            f"👤 *Имя:* {data['name']}\n"
-            f"📞 *Телефон:* {data['phone']}\n"
-            f"🆔 *Telegram ID:* `{user.id}`\n"  # ✅ Форматирование для копирования
-            f"📝 *Username:* @{user.username or 'не указан'}\n\n"
-            f"🎓 *Курс:* {data['course']}\n"
-            f"📊 *Тип обучения:* {data['training_type']}\n"
-            f"⏰ *Расписание:* {data['schedule']}\n"
-            f"💰 *Стоимость:* {data['price']}\n\n"
-            f"🕒 *Время:* {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        )
-
-        # ✅ ДОБАВЛЕНО: Счетчик успешных отправок
-        sent_count = 0
-
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, message_text, parse_mode="Markdown")
-                sent_count += 1
-                logger.info(f"✅ Notification sent to admin {admin_id}")
-            except Exception as e:
-                logger.error(f"❌ Ошибка отправки администратору {admin_id}: {e}")
-
-        logger.info(f"✅ Registration notification sent to {sent_count}/{len(config.ADMIN_IDS)} admins")
-
-    except Exception as e:
-        logger.error(f"❌ Ошибка send_registration_to_admins: {e}", exc_info=True)
-
-
-async def send_registration_to_admins(bot, data, user):
-    """Отправка уведомления о новой регистрации администраторам"""
-    try:
-        message_text = (
-            "🆕 *НОВАЯ РЕГИСТРАЦИЯ!*\n\n"
-            f"👤 *Имя:* {data['name']}\n"
-            f"📞 *Телефон:* {data['phone']}\n"
-            f"🆔 *Telegram ID:* `{user.id}`\n"  # ✅ Форматирование для копирования
-            f"📝 *Username:* @{user.username or 'не указан'}\n\n"
-            f"🎓 *Курс:* {data['course']}\n"
-            f"📊 *Тип обучения:* {data['training_type']}\n"
-            f"⏰ *Расписание:* {data['schedule']}\n"
-            f"💰 *Стоимость:* {data['price']}\n\n"
-            f"🕒 *Время:* {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        )
-
-        # ✅ ДОБАВЛЕНО: Счетчик успешных отправок
-        sent_count = 0
-
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, message_text, parse_mode="Markdown")
-                sent_count += 1
-                logger.info(f"✅ Notification sent to admin {admin_id}")
-            except Exception as e:
-                logger.error(f"❌ Ошибка отправки администратору {admin_id}: {e}")
-
-        logger.info(f"✅ Registration notification sent to {sent_count}/{len(config.ADMIN_IDS)} admins")
-
-    except Exception as e:
-        logger.error(f"❌ Ошибка send_registration_to_admins: {e}", exc_info=True)
-
-
-async def send_registration_to_admins(bot, data, user, reg_id):
-    """Отправка уведомления о новой регистрации администраторам"""
+def send_registration_to_admins(bot, data, user, reg_id):
+    """Уведомить администраторов о новой регистрации (отправка в фоне, один раз на регистрацию)"""
     try:
         message_text = (
             f"🆕 *НОВАЯ РЕГИСТРАЦИЯ #{reg_id}*\n\n"
@@ -472,34 +377,11 @@ async def send_registration_to_admins(bot, data, user, reg_id):
             f"🕒 *Время:* {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
         )
 
-        sent_count = 0
-        failed_count = 0
-
-        for admin_id in config.ADMIN_IDS:
-            try:
-                print(f"  📤 Отправка администратору {admin_id}...")
-                await bot.send_message(admin_id, message_text, parse_mode="Markdown")
-                sent_count += 1
-                print(f"  ✅ Уведомление отправлено админу {admin_id}")
-                logger.info(f"✅ Notification sent to admin {admin_id}")
-            except aiogram.exceptions.TelegramForbiddenError:
-                failed_count += 1
-                print(f"  ❌ Админ {admin_id} заблокировал бота")
-                logger.error(f"❌ Admin {admin_id} blocked the bot")
-            except Exception as e:
-                failed_count += 1
-                print(f"  ❌ Ошибка отправки админу {admin_id}: {e}")
-                logger.error(f"❌ Error sending to admin {admin_id}: {e}")
-
-        print(f"\n📊 Статистика отправки администраторам:")
-        print(f"  ✅ Успешно: {sent_count}/{len(config.ADMIN_IDS)}")
-        print(f"  ❌ Ошибок: {failed_count}/{len(config.ADMIN_IDS)}")
-
-        logger.info(f"✅ Registration notification sent to {sent_count}/{len(config.ADMIN_IDS)} admins")
+        from utils.admin_notifier import get_admin_notifier
+        get_admin_notifier().notify(bot, 'registration', reg_id, message_text)
 
     except Exception as e:
-        print(f"❌ КРИТИЧЕСКАЯ ОШИБКА в send_registration_to_admins: {e}")
-        logger.error(f"❌ Critical error in send_registration_to_admins: {e}", exc_info=True)
+        logger.error(f"❌ Ошибка send_registration_to_admins: {e}", exc_info=True)
 
 
 @user_router.callback_query(F.data == "leave_feedback")
@@ -612,26 +494,35 @@ async def send_feedback(callback: CallbackQuery, state: FSMContext):
     try:
         data = await state.get_data()
 
+        # В состоянии хранится Telegram ID, в feedback.user_id — users.id
+        user_rows = await db.aquery("SELECT id FROM users WHERE telegram_id = ?", (data['user_id'],))
+        if not user_rows:
+            await callback.message.edit_text(
+                "❌ Вы еще не зарегистрированы.",
+                reply_markup=get_main_keyboard()
+            )
+            await state.clear()
+            await callback.answer()
+            return
+
         # Сохраняем в БД
-        success = db.save_feedback(
-            user_id=data['user_id'],
-            user_name=data['user_name'],
-            feedback_type=data['feedback_type'],
-            feedback_text=data['feedback_text'],
-            rating=data.get('rating'),
-            created_at=datetime.datetime.now()
+        feedback_id = await db.feedback_repo.acreate(
+            user_rows[0]['id'],
+            data.get('rating'),
+            comment=data['feedback_text'],
+            feedback_type=data['feedback_type']
         )
 
-        if success:
-            # Отправляем администраторам
-            await send_feedback_to_admins(callback.bot, data)
-
+        if feedback_id:
             await callback.message.edit_text(
                 "✅ *Спасибо за вашу обратную связь!*\n\n"
                 "Мы ценим ваше мнение и обязательно рассмотрим ваше обращение.",
                 parse_mode="Markdown",
                 reply_markup=get_main_keyboard()
             )
+
+            # Администраторам — в фоне, после ответа пользователю
+            send_feedback_to_admins(callback.bot, data)
         else:
             await callback.message.edit_text(
                 "❌ *Произошла ошибка*\n\nПопробуйте позже.",
@@ -666,8 +557,8 @@ async def edit_feedback(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-async def send_feedback_to_admins(bot, feedback_data):
-    """Отправка уведомления о feedback администраторам"""
+def send_feedback_to_admins(bot, feedback_data):
+    """Уведомить администраторов о новой обратной связи (отправка в фоне)"""
     try:
         type_names = {
             "review": "📝 НОВЫЙ ОТЗЫВ",
@@ -689,11 +580,10 @@ async def send_feedback_to_admins(bot, feedback_data):
             f"🕒 *Время:* {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
         )
 
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, message_text, parse_mode="Markdown")
-            except Exception as e:
-                logger.error(f"Ошибка отправки администратору {admin_id}: {e}")
+        # Повторная отправка того же текста (двойное нажатие) админам не дублируется
+        digest = hashlib.sha1(feedback_data['feedback_text'].encode('utf-8')).hexdigest()[:16]
+        from utils.admin_notifier import get_admin_notifier
+        get_admin_notifier().notify(bot, 'feedback', f"{feedback_data['user_id']}:{digest}", message_text)
 
     except Exception as e:
         logger.error(f"Ошибка send_feedback_to_admins: {e}")
@@ -715,7 +605,7 @@ async def show_cabinet(callback: CallbackQuery):
         # ============================================
         print("\n📌 ШАГ 1: Поиск пользователя в БД...")
         query_user = "SELECT id, full_name, phone FROM users WHERE telegram_id = ?"
-        user_rows = db.execute_query(query_user, (callback.from_user.id,))
+        user_rows = await db.aquery(query_user, (callback.from_user.id,))
 
         if not user_rows:
             print("❌ Пользователь не найден в БД")
@@ -765,7 +655,7 @@ async def show_cabinet(callback: CallbackQuery):
                                   ORDER BY r.created_at DESC \
                                   """
 
-            registrations = db.execute_query(query_registrations, (user_id,))
+            registrations = await db.aquery(query_registrations, (user_id,))
 
             print(f"✅ Найдено регистраций: {len(registrations) if registrations else 0}")
 
@@ -886,7 +776,7 @@ async def show_materials(callback: CallbackQuery):
     try:
         # Получаем user_id
         query_user = "SELECT id FROM users WHERE telegram_id = ?"
-        user_rows = db.execute_query(query_user, (callback.from_user.id,))
+        user_rows = await db.aquery(query_user, (callback.from_user.id,))
 
         if not user_rows:
             await callback.message.edit_text(
@@ -906,7 +796,7 @@ async def show_materials(callback: CallbackQuery):
                 WHERE r.user_id = ?
                 ORDER BY r.created_at DESC \
                 """
-        registrations = db.execute_query(query, (user_id,))
+        registrations = await db.aquery(query, (user_id,))
 
         if not registrations:
             await callback.message.edit_text(
@@ -988,7 +878,7 @@ async def show_progress(callback: CallbackQuery):
     try:
         # Получаем user_id
         query_user = "SELECT id FROM users WHERE telegram_id = ?"
-        user_rows = db.execute_query(query_user, (callback.from_user.id,))
+        user_rows = await db.aquery(query_user, (callback.from_user.id,))
 
         if not user_rows:
             await callback.message.edit_text(
@@ -1008,7 +898,7 @@ async def show_progress(callback: CallbackQuery):
                 WHERE r.user_id = ?
                 ORDER BY r.created_at DESC \
                 """
-        registrations = db.execute_query(query, (user_id,))
+        registrations = await db.aquery(query, (user_id,))
 
         if not registrations:
             await callback.message.edit_text(
@@ -1058,7 +948,7 @@ async def start_quiz(callback: CallbackQuery, state: FSMContext):
     try:
         # Получаем user_id
         query_user = "SELECT id FROM users WHERE telegram_id = ?"
-        user_rows = db.execute_query(query_user, (callback.from_user.id,))
+        user_rows = await db.aquery(query_user, (callback.from_user.id,))
 
         if not user_rows:
             await callback.message.edit_text(
@@ -1078,7 +968,7 @@ async def start_quiz(callback: CallbackQuery, state: FSMContext):
                 WHERE r.user_id = ?
                 ORDER BY r.created_at DESC \
                 """
-        registrations = db.execute_query(query, (user_id,))
+        registrations = await db.aquery(query, (user_id,))
 
         if not registrations:
             await callback.message.edit_text(
@@ -1237,7 +1127,7 @@ async def start_feedback(callback: CallbackQuery, state: FSMContext):
     """Начало процесса обратной связи"""
     # Получаем user_id по telegram_id
     query_user = "SELECT id FROM users WHERE telegram_id = ?"
-    user_rows = db.execute_query(query_user, (callback.from_user.id,))
+    user_rows = await db.aquery(query_user, (callback.from_user.id,))
     if not user_rows:
         await callback.message.edit_text("Вы еще не зарегистрированы.", reply_markup=get_main_keyboard())
         return
@@ -1245,7 +1135,7 @@ async def start_feedback(callback: CallbackQuery, state: FSMContext):
     user_id = user_rows[0]['id']
 
     # Получаем регистрации пользователя
-    db.execute_query("""
+    await db.aquery("""
                      SELECT r.*, c.name as course_name
                      FROM registrations r
                               LEFT JOIN courses c ON r.course_id = c.id
@@ -1372,41 +1262,6 @@ async def get_feedback_text(message: Message, state: FSMContext):
     )
 
 
-@user_router.callback_query(F.data == "feedback_send")
-async def send_feedback(callback: CallbackQuery, state: FSMContext):
-    """Отправка обратной связи"""
-    data = await state.get_data()
-
-    success = db.save_feedback(
-        user_id=data['user_id'],
-        user_name=data['user_name'],
-        feedback_type=data['feedback_type'],
-        feedback_text=data['feedback_text'],
-        rating=data.get('rating', None),
-        created_at=datetime.datetime.now()
-    )
-
-    if success:
-        await send_feedback_to_admins(callback.bot, data)
-
-        await callback.message.edit_text(
-            "✅ *Спасибо за вашу обратную связь!*\n\n"
-            "Мы ценим ваше мнение и обязательно рассмотрим ваше обращение.",
-            parse_mode="Markdown",
-            reply_markup=get_main_keyboard()
-        )
-    else:
-        await callback.message.edit_text(
-            "❌ *Произошла ошибка при отправке отзыва.*\n\n"
-            "Пожалуйста, попробуйте позже.",
-            parse_mode="Markdown",
-            reply_markup=get_main_keyboard()
-        )
-
-    await state.clear()
-    await callback.answer()
-
-
 @user_router.callback_query(F.data.in_(["feedback_review", "feedback_suggestion", "feedback_issue"]))
 async def handle_feedback_type_selection(callback: CallbackQuery, state: FSMContext):
     feedback_types = {
@@ -1444,43 +1299,6 @@ async def edit_feedback(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-async def send_feedback_to_admins(bot, feedback_data):
-    """Отправка уведомления о новой обратной связи администраторам"""
-    try:
-        type_names = {
-            "review": "📝 НОВЫЙ ОТЗЫВ",
-            "suggestion": "💡 НОВОЕ ПРЕДЛОЖЕНИЕ",
-            "issue": "🐞 СООБЩЕНИЕ О ПРОБЛЕМЕ"
-        }
-
-        message_text = (
-            f"{type_names[feedback_data['feedback_type']]}\n\n"
-            f"👤 *Пользователь:* {feedback_data['user_name']}\n"
-            f"🆔 *ID:* {feedback_data['user_id']}\n"
-        )
-
-        if feedback_data['feedback_type'] == 'review':
-            message_text += f"⭐ *Оценка:* {feedback_data['rating']}/5\n"
-
-        message_text += f"📄 *Текст:*\n{feedback_data['feedback_text']}\n\n"
-        message_text += f"🕒 *Время:* {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
-
-        for admin_id in config.ADMIN_IDS:
-            try:
-                await bot.send_message(admin_id, message_text, parse_mode="Markdown")
-            except aiogram.exceptions.TelegramBadRequest as e:
-                logger.error(f"❌ Ошибка отправки администратору {admin_id}: {e}")
-            except aiogram.exceptions.TelegramForbiddenError as e:
-                logger.warning(f"❌ Бот заблокирован администратором {admin_id}: {e}")
-            except Exception as e:
-                logger.error(f"❌ Неожиданная ошибка при отправке администратору {admin_id}: {e}")
-
-    except KeyError as e:
-        logger.error(f"❌ Ошибка в данных обратной связи: {e}")
-    except Exception as e:
-        logger.error(f"❌ Неожиданная ошибка при отправке уведомления: {e}")
-
-
 # Общие обработчики
 @user_router.callback_query(F.data == "cancel")
 async def cancel_action(callback: CallbackQuery, state: FSMContext):
@@ -1563,7 +1381,7 @@ async def show_courses(callback: CallbackQuery):
         try:
             # Получаем user_id по telegram_id
             query_user = "SELECT id FROM users WHERE telegram_id = ?"
-            user_rows = db.execute_query(query_user, (callback.from_user.id,))
+            user_rows = await db.aquery(query_user, (callback.from_user.id,))
 
             if not user_rows:
                 await callback.message.edit_text(
@@ -1576,7 +1394,7 @@ async def show_courses(callback: CallbackQuery):
             user_id = user_rows[0]['id']
 
             # Получаем регистрации пользователя
-            db.execute_query("""
+            await db.aquery("""
                              SELECT r.*, c.name as course_name
                              FROM registrations r
                                       LEFT JOIN courses c ON r.course_id = c.id
@@ -1844,7 +1662,7 @@ async def show_my_schedule(callback: CallbackQuery):
     try:
         # ✅ ИСПРАВЛЕНО: Прямой SQL запрос
         query = "SELECT * FROM users WHERE telegram_id = ?"
-        users = db.execute_query(query, (callback.from_user.id,))
+        users = await db.aquery(query, (callback.from_user.id,))
         user = users[0] if users else None
 
         if not user:
@@ -1870,7 +1688,7 @@ async def show_my_schedule(callback: CallbackQuery):
                     WHERE r.user_id = ?
                     ORDER BY r.created_at DESC \
                     """
-        registrations = db.execute_query(query_reg, (user_id,))
+        registrations = await db.aquery(query_reg, (user_id,))
 
         if not registrations:
             await callback.message.edit_text(
@@ -22,8 +22,9 @@ def get_db():
     global _db_instance
 
     if _db_instance is None:
-        from database import Database
-        _db_instance = Database(config.DB_NAME)
+        # Общий экземпляр с database.get_db(), чтобы не держать два пула на один файл
+        from database import get_db as get_database
+        _db_instance = get_database()
         logger.info("✅ Database singleton created")
 
     return _db_instance
@@ -32,16 +33,8 @@ def get_db():
 def is_admin(user_id: int) -> bool:
     """Проверяет, является ли пользователь администратором"""
     try:
-        # Проверяем в БД
-        db = get_db()
-        query = "SELECT 1 FROM admins WHERE user_id = ? AND is_active = 1 LIMIT 1"
-        result = db.execute_query(query, (user_id,))
-
-        if result:
-            return True
-
-        # Fallback на статический список
-        return user_id in config.ADMIN_IDS
+        # Кэш admins + ADMIN_IDS; внутри апдейта — результат AdminMiddleware
+        return get_db().admin_cache.is_admin(user_id)
 
     except Exception as e:
         logger.error(f"Error checking admin: {e}")
@@ -128,18 +121,14 @@ def format_phone(phone: str) -> str:
     if not phone:
         return ""
 
-    # Убираем все кроме цифр
-    digits = re.sub(r'\D', '', phone)
+    # Те же правила, что и при записи в БД (E.164)
+    from utils.validators import normalize_phone
+    digits = normalize_phone(phone) or ''
 
     # Форматируем для Узбекистана
     if digits.startswith('998') and len(digits) == 12:
         return f"+{digits[0:3]} ({digits[3:5]}) {digits[5:8]}-{digits[8:10]}-{digits[10:12]}"
 
-    # Если начинается без кода страны
-    if len(digits) == 9:
-        digits = '998' + digits
-        return f"+{digits[0:3]} ({digits[3:5]}) {digits[5:8]}-{digits[8:10]}-{digits[10:12]}"
-
     # Возвращаем как есть если не подходит
     return phone if phone.startswith('+') else f"+{phone}"
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from config import Config
 
@@ -88,13 +90,15 @@ def get_admin_students_menu():
             InlineKeyboardButton(text="🔍 По ID", callback_data="find_student_by_id"),
             InlineKeyboardButton(text="📞 По телефону", callback_data="find_student_by_phone")
         ],
+        [InlineKeyboardButton(text="🔎 Поиск по имени и заметкам", callback_data="search_students")],
         # Назад
         [_create_back_button("back_to_admin_main")[0]]
     ])
     return keyboard
 
 
-def get_student_actions_keyboard(registration_id: int, current_status: str):
+def get_student_actions_keyboard(registration_id: int, current_status: str,
+                                 pagination_row: Optional[list] = None):
     """Меню действий со студентом - улучшенное"""
     buttons = []
 
@@ -131,10 +135,15 @@ def get_student_actions_keyboard(registration_id: int, current_status: str):
         [
             InlineKeyboardButton(text="📞 Контакты", callback_data=f"student_contacts_{registration_id}"),
             InlineKeyboardButton(text="📋 Подробнее", callback_data=f"full_info_{registration_id}")
-        ],
-        [_create_back_button("admin_students_menu")[0]]
+        ]
     ])
 
+    # Навигация по списку студентов
+    if pagination_row:
+        buttons.append(pagination_row)
+
+    buttons.append([_create_back_button("admin_students_menu")[0]])
+
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
@@ -274,6 +283,24 @@ def get_broadcast_group_keyboard():
     return keyboard
 
 
+def get_broadcast_job_keyboard(job_id: int, status: str):
+    """Управление заданием рассылки"""
+    if status == 'running':
+        buttons = [[
+            InlineKeyboardButton(text="⏸ Пауза", callback_data=f"bcast_pause_{job_id}"),
+            InlineKeyboardButton(text="⏹ Отменить", callback_data=f"bcast_cancel_{job_id}")
+        ]]
+    elif status == 'paused':
+        buttons = [[
+            InlineKeyboardButton(text="▶️ Продолжить", callback_data=f"bcast_resume_{job_id}"),
+            InlineKeyboardButton(text="⏹ Отменить", callback_data=f"bcast_cancel_{job_id}")
+        ]]
+    else:
+        buttons = []
+    buttons.append([InlineKeyboardButton(text="🔄 Обновить", callback_data=f"bcast_refresh_{job_id}")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 # ============ ОТМЕНА ============
 
 def get_cancel_keyboard():
@@ -296,36 +323,52 @@ def get_cancel_and_back_keyboard(back_callback: str):
 
 # ============ НАВИГАЦИЯ ============
 
-def get_pagination_keyboard(
+def get_pagination_row(
         current_page: int,
-        total_pages: int,
-        callback_prefix: str,
-        back_callback: str = "back_to_admin_main"
-):
-    """Клавиатура с пагинацией"""
-    buttons = []
+        total_pages: Optional[int] = None,
+        callback_prefix: str = "",
+        prev_callback: Optional[str] = None,
+        next_callback: Optional[str] = None
+) -> list:
+    """
+    Ряд кнопок навигации по страницам
+
+    Для keyset-списков передаются готовые prev_callback/next_callback
+    (курсор внутри), total_pages тогда не нужен.
+    """
+    if prev_callback is None and current_page > 1 and total_pages is not None:
+        prev_callback = f"{callback_prefix}_page_{current_page - 1}"
+    if next_callback is None and total_pages is not None and current_page < total_pages:
+        next_callback = f"{callback_prefix}_page_{current_page + 1}"
 
-    # Навигация по страницам
     nav_buttons = []
-    if current_page > 1:
-        nav_buttons.append(InlineKeyboardButton(
-            text="⬅️",
-            callback_data=f"{callback_prefix}_page_{current_page - 1}"
-        ))
+    if prev_callback:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=prev_callback))
 
     nav_buttons.append(InlineKeyboardButton(
-        text=f"📄 {current_page}/{total_pages}",
+        text=f"📄 {current_page}/{total_pages}" if total_pages else f"📄 {current_page}",
         callback_data="noop"
     ))
 
-    if current_page < total_pages:
-        nav_buttons.append(InlineKeyboardButton(
-            text="➡️",
-            callback_data=f"{callback_prefix}_page_{current_page + 1}"
-        ))
+    if next_callback:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=next_callback))
+
+    return nav_buttons
 
-    buttons.append(nav_buttons)
-    buttons.append([_create_back_button(back_callback)[0]])
+
+def get_pagination_keyboard(
+        current_page: int,
+        total_pages: Optional[int] = None,
+        callback_prefix: str = "",
+        back_callback: str = "back_to_admin_main",
+        prev_callback: Optional[str] = None,
+        next_callback: Optional[str] = None
+):
+    """Клавиатура с пагинацией"""
+    buttons = [
+        get_pagination_row(current_page, total_pages, callback_prefix, prev_callback, next_callback),
+        [_create_back_button(back_callback)[0]]
+    ]
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import secrets
 import sys
 
 sys.path.append(os.path.dirname(__file__))
@@ -14,6 +15,7 @@ from config import Config
 from keyboards.user_kb import get_main_keyboard
 from keyboards.admin_kb import get_admin_main_keyboard
 from helpers import is_admin, get_db
+from middlewares import AdminMiddleware, HandlerMetricsMiddleware, ThrottlingMiddleware
 
 # Настройка логирования
 logging.basicConfig(
@@ -26,26 +28,93 @@ logger = logging.getLogger(__name__)
 async def main():
     """Главная функция запуска бота"""
     config = Config()
+
+    # Неизвестный TIMEZONE — ошибка запуска, а не время уроков со сдвигом на часы
+    from database.timestamps import local_timezone
+    logger.info(f"Local timezone: {local_timezone()}")
+
     bot_instance = Bot(token=config.BOT_TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+
+    # Все исходящие сообщения проходят через общие лимиты Telegram
+    from utils.send_scheduler import get_send_scheduler
+    send_scheduler = get_send_scheduler()
+    bot_instance.session.middleware(send_scheduler)
+
+    # Метрики вызовов API — после планировщика: ожидание лимитов в задержку не входит
+    from utils.metrics import ApiMetricsMiddleware, MetricsServer, get_metrics
+    metrics = get_metrics() if config.METRICS_ENABLED else None
+    if metrics is not None:
+        bot_instance.session.middleware(ApiMetricsMiddleware(metrics))
+        metrics.add_collector('send_scheduler', send_scheduler.stats)
+
+    if config.FSM_STORAGE == 'sqlite':
+        # Состояния мастеров регистрации и админских сценариев переживают перезапуск
+        from database.fsm_storage import SQLiteStorage
+        storage = SQLiteStorage(
+            get_db(),
+            ttl=config.FSM_TTL_HOURS * 3600,
+            max_entries=config.FSM_CACHE_SIZE,
+            flush_delay=config.FSM_FLUSH_DELAY
+        )
+    else:
+        storage = MemoryStorage()
+    dp = Dispatcher(storage=storage, name="main")
+
+    # Права администратора проверяются один раз на апдейт
+    dp.update.outer_middleware(AdminMiddleware())
+
+    # Ограничение частоты сообщений и нажатий (после AdminMiddleware: админов не трогаем)
+    throttling = None
+    if config.THROTTLE_ENABLED:
+        throttling = ThrottlingMiddleware(
+            message_limit=config.THROTTLE_MESSAGE_LIMIT,
+            callback_limit=config.THROTTLE_CALLBACK_LIMIT,
+            window=config.THROTTLE_WINDOW,
+            duplicate_window=config.THROTTLE_DUPLICATE_WINDOW,
+            max_users=config.THROTTLE_MAX_USERS
+        )
+        dp.message.outer_middleware(throttling)
+        dp.callback_query.outer_middleware(throttling)
+        if metrics is not None:
+            metrics.add_collector('throttling', throttling.stats)
+
+    # Задержка, ошибки и выполняющиеся вызовы по каждому обработчику всех роутеров
+    if metrics is not None:
+        handler_metrics = HandlerMetricsMiddleware(metrics)
+        for event_name, observer in dp.observers.items():
+            if event_name not in ('update', 'error'):
+                observer.middleware(handler_metrics)
 
     # ✅ ИНИЦИАЛИЗАЦИЯ БД (упрощенная версия)
     try:
         # Получаем экземпляр БД (это автоматически инициализирует схему)
         db = get_db()
 
-        # Проверяем структуру
+        # Версия схемы (PRAGMA user_version) вместо обхода sqlite_master
         if db.check_database_structure():
-            logger.info("✅ Database initialized successfully")
+            logger.info(f"✅ Database initialized successfully (schema v{db.schema_version})")
         else:
-            logger.warning("⚠️ Database structure check failed")
+            logger.warning("⚠️ Database schema is behind, see migration errors above")
 
     except Exception as e:
         logger.error(f"❌ Error initializing database: {e}", exc_info=True)
         # Не прерываем запуск - БД может быть уже инициализирована
         logger.info("Continuing with existing database...")
 
+    # Резервные копии по расписанию
+    backup_service = None
+    if config.BACKUP_ENABLED:
+        from database.backup import get_backup_service
+        backup_service = get_backup_service()
+        backup_service.start(config.BACKUP_INTERVAL_HOURS * 3600)
+
+    # Архивация старых регистраций по расписанию
+    archiver = None
+    if config.ARCHIVE_ENABLED:
+        from database.archive import get_archiver
+        archiver = get_archiver()
+        archiver.start(config.ARCHIVE_INTERVAL_HOURS * 3600)
+
     # ✅ КОМАНДА /start
     @dp.message(Command("start"))
     async def start_command(message: Message):
@@ -57,6 +126,8 @@ async def main():
                 reply_markup=get_main_keyboard()
             )
             logger.info(f"User {message.from_user.id} started the bot")
+            # Пользователь, заблокировавший бота, после разблокировки снова пишет /start
+            await get_db().broadcasts.aunblock_user(message.from_user.id)
         except Exception as e:
             logger.error(f"Error in start_command: {e}")
             await message.answer("Произошла ошибка. Попробуйте позже.")
@@ -96,26 +167,85 @@ async def main():
         return
 
     # ✅ ЗАПУСК БОТА
+    broadcaster = None
+    metrics_server = None
     try:
+        if metrics is not None:
+            from utils.admin_notifier import get_admin_notifier
+            metrics.add_collector('admin_notifier', get_admin_notifier().stats)
+            if config.METRICS_PORT:
+                try:
+                    metrics_server = MetricsServer(metrics, config.METRICS_HOST, config.METRICS_PORT)
+                    await metrics_server.start()
+                except OSError as e:
+                    # Занятый порт не должен мешать запуску бота
+                    logger.error(f"Metrics server not started: {e}")
+                    metrics_server = None
+
+        # Рассылки, прерванные перезапуском, продолжаются
+        from utils.broadcaster import get_broadcaster
+        broadcaster = get_broadcaster()
+        await broadcaster.start(bot_instance)
+
         logger.info("🚀 Bot starting...")
         logger.info(f"Bot token: {config.BOT_TOKEN[:10]}...")
         logger.info(f"Admin IDs: {config.ADMIN_IDS}")
+        logger.info(f"Update mode: {config.BOT_MODE}")
 
-        # Удаляем вебхук если был установлен
-        await bot_instance.delete_webhook(drop_pending_updates=True)
+        if config.BOT_MODE == 'webhook':
+            from utils.webhook import run_webhook
+            await run_webhook(
+                dp, bot_instance,
+                url=config.WEBHOOK_URL,
+                path=config.WEBHOOK_PATH,
+                host=config.WEBHOOK_HOST,
+                port=config.WEBHOOK_PORT,
+                secret_token=config.WEBHOOK_SECRET or secrets.token_urlsafe(32),
+                max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+                reply_in_webhook=config.WEBHOOK_REPLY_IN_RESPONSE,
+                drain_timeout=config.WEBHOOK_DRAIN_TIMEOUT,
+                drop_pending_updates=config.DROP_PENDING_UPDATES
+            )
+        else:
+            # Polling не работает при установленном вебхуке; накопившиеся
+            # за время остановки апдейты по умолчанию не теряем
+            await bot_instance.delete_webhook(drop_pending_updates=config.DROP_PENDING_UPDATES)
 
-        # Запускаем polling
-        await dp.start_polling(
-            bot_instance,
-            allowed_updates=dp.resolve_used_update_types()
-        )
+            await dp.start_polling(
+                bot_instance,
+                allowed_updates=dp.resolve_used_update_types()
+            )
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
         logger.error(f"Critical error: {e}", exc_info=True)
     finally:
         # Закрываем соединения
+        if backup_service is not None:
+            await backup_service.stop()
+        if archiver is not None:
+            await archiver.stop()
+        if broadcaster is not None:
+            await broadcaster.stop()
+        from utils.admin_notifier import get_admin_notifier
+        await get_admin_notifier().close()
+        await send_scheduler.close()
+        logger.info(f"Send scheduler stats: {send_scheduler.stats()}")
+        if throttling is not None:
+            logger.info(f"Throttling stats: {throttling.stats()}")
+        if metrics_server is not None:
+            await metrics_server.stop()
+        if metrics is not None:
+            try:
+                metrics.dump(config.METRICS_DUMP)
+            except Exception as e:
+                logger.error(f"Error saving handler metrics: {e}")
         await bot_instance.session.close()
+        logger.info(f"DB pool stats: {get_db().pool_stats()}")
+        logger.info(f"Reference cache stats: {get_db().reference_stats()}")
+        if get_db().profiler:
+            get_db().profiler.dump(config.DB_PROFILE_DUMP)
+        get_db().close()
         logger.info("Bot stopped")
 
 
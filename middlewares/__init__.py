@@ -0,0 +1,5 @@
+from .admin import AdminMiddleware, IsAdmin
+from .metrics import HandlerMetricsMiddleware
+from .throttling import ThrottlingMiddleware, ThrottleGroup
+
+__all__ = ['AdminMiddleware', 'IsAdmin', 'HandlerMetricsMiddleware', 'ThrottlingMiddleware', 'ThrottleGroup']
@@ -0,0 +1,68 @@
+"""
+Admin Middleware
+Проверка прав администратора один раз на апдейт
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.filters import BaseFilter
+from aiogram.types import TelegramObject, User
+
+from helpers import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class AdminMiddleware(BaseMiddleware):
+    """
+    Кладёт в данные обработчика флаг is_admin
+
+    Регистрируется как outer-middleware на dp.update (после
+    UserContextMiddleware, которое определяет event_from_user).
+    Результат запоминается в AdminCache на время апдейта, поэтому
+    helpers.is_admin() в обработчиках не ходит ни в БД, ни в кэш.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get('event_from_user')
+        if user is None:
+            data['is_admin'] = False
+            return await handler(event, data)
+
+        cache = get_db().admin_cache
+        if not cache.is_fresh:
+            # Истёк TTL — перечитываем admins в пуле потоков, не блокируя loop
+            try:
+                await get_db().run_async(cache.refresh)
+            except Exception as e:
+                logger.error(f"Error refreshing admin cache: {e}")
+
+        result = cache.is_admin(user.id)
+        data['is_admin'] = result
+
+        token = cache.remember(user.id, result)
+        try:
+            return await handler(event, data)
+        finally:
+            cache.forget(token)
+
+
+class IsAdmin(BaseFilter):
+    """
+    Фильтр: только администраторы
+
+    Использует флаг, выставленный AdminMiddleware.
+
+    Example:
+        >>> router.callback_query.filter(IsAdmin())
+    """
+
+    async def __call__(self, event: TelegramObject, is_admin: bool = False) -> bool:
+        return is_admin
@@ -0,0 +1,54 @@
+"""
+Metrics Middleware
+Задержка, ошибки и выполняющиеся сейчас вызовы по каждому обработчику
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.metrics import MetricsRegistry
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner-middleware: вызывается уже для выбранного обработчика
+
+    Регистрируется на наблюдателях диспетчера (dp.message.middleware(...)
+    и т.д.) и действует во всех вложенных роутерах. Имя роутера —
+    Router.name, имя обработчика — имя его функции.
+
+    Example:
+        >>> metrics_middleware = HandlerMetricsMiddleware(get_metrics())
+        >>> dp.callback_query.middleware(metrics_middleware)
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get('handler')
+        router = data.get('event_router')
+        callback = getattr(handler_object, 'callback', None)
+        series = self.registry.handler_series(
+            getattr(router, 'name', None) or 'unknown',
+            getattr(callback, '__name__', None) or 'unknown'
+        )
+
+        series.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            series.errors += 1
+            raise
+        finally:
+            series.in_flight -= 1
+            series.latency.observe(time.perf_counter() - started)
@@ -0,0 +1,189 @@
+"""
+Throttling Middleware
+Ограничение частоты апдейтов от одного пользователя
+"""
+
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ThrottleGroup:
+    """Группа обработчиков со своим лимитом: limit апдейтов за window секунд"""
+    name: str
+    prefixes: Tuple[str, ...]
+    limit: int
+    window: float
+
+
+# Экраны, которые на каждое нажатие читают БД и перерисовывают сообщение
+DEFAULT_GROUPS = (
+    ThrottleGroup('cabinet', ('show_cabinet', 'my_registrations', 'my_schedule', 'show_progress',
+                              'show_reminders', 'registration_detail_'), limit=6, window=5.0),
+    ThrottleGroup('quiz', ('start_quiz', 'quiz_'), limit=10, window=5.0),
+)
+
+
+class _UserState:
+    """Окна одного пользователя"""
+
+    __slots__ = ('hits', 'inflight', 'last_callback', 'warned_until')
+
+    def __init__(self):
+        self.hits: Dict[str, Deque[float]] = {}
+        self.inflight: Set[Tuple[Optional[int], str]] = set()
+        self.last_callback: Optional[Tuple[Tuple[Optional[int], str], float]] = None
+        self.warned_until = 0.0
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Скользящее окно на пользователя и на группу обработчиков
+
+    Регистрируется как outer-middleware на dp.message и dp.callback_query
+    (после AdminMiddleware: администраторы не ограничиваются). Каждый
+    апдейт учитывается в общем окне своего типа и, если callback_data
+    относится к группе (DEFAULT_GROUPS), в окне группы. Сверх лимита
+    апдейт не доходит до обработчика: на callback сразу отвечаем, чтобы
+    у пользователя не крутились часики, на сообщение — предупреждаем
+    не чаще раза за окно.
+
+    Повторное нажатие той же кнопки того же сообщения, пока предыдущее
+    ещё обрабатывается или в пределах duplicate_window, отбрасывается.
+
+    Окна хранятся в LRU на max_users пользователей.
+
+    Example:
+        >>> throttling = ThrottlingMiddleware(message_limit=20, callback_limit=30, window=10)
+        >>> dp.message.outer_middleware(throttling)
+        >>> dp.callback_query.outer_middleware(throttling)
+    """
+
+    def __init__(self, message_limit: int = 20, callback_limit: int = 30, window: float = 10.0,
+                 duplicate_window: float = 1.0, groups=DEFAULT_GROUPS, max_users: int = 10000):
+        """
+        Args:
+            message_limit: Сообщений от пользователя за window
+            callback_limit: Нажатий кнопок от пользователя за window
+            window: Окно общих лимитов (сек)
+            duplicate_window: Окно отсева повторных нажатий одной кнопки (сек)
+            groups: Группы обработчиков со своими лимитами
+            max_users: Сколько пользователей держать в памяти
+        """
+        self.limits = {'message': (message_limit, window), 'callback': (callback_limit, window)}
+        self.duplicate_window = duplicate_window
+        self.groups = tuple(groups)
+        for group in self.groups:
+            self.limits[group.name] = (group.limit, group.window)
+        self.max_users = max(1, max_users)
+        self._users: "OrderedDict[int, _UserState]" = OrderedDict()
+
+        # Статистика
+        self.passed = 0
+        self.throttled = 0
+        self.duplicates = 0
+
+    def _state(self, user_id: int) -> _UserState:
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState()
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return state
+
+    def _group(self, callback_data: str) -> Optional[str]:
+        for group in self.groups:
+            if callback_data.startswith(group.prefixes):
+                return group.name
+        return None
+
+    def _hit(self, state: _UserState, key: str, now: float) -> bool:
+        """Учесть апдейт в окне key; False если лимит исчерпан"""
+        limit, window = self.limits[key]
+        hits = state.hits.get(key)
+        if hits is None:
+            hits = state.hits[key] = deque(maxlen=limit)
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return False
+        hits.append(now)
+        return True
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get('event_from_user')
+        if user is None or data.get('is_admin'):
+            return await handler(event, data)
+
+        now = time.monotonic()
+        state = self._state(user.id)
+
+        if isinstance(event, CallbackQuery):
+            callback_key = (event.message.message_id if event.message else None, event.data or '')
+            last = state.last_callback
+            if callback_key in state.inflight or (
+                    last is not None and last[0] == callback_key and now - last[1] < self.duplicate_window):
+                self.duplicates += 1
+                await self._answer_silently(event)
+                return None
+
+            group = self._group(event.data or '')
+            allowed = self._hit(state, 'callback', now) and (group is None or self._hit(state, group, now))
+            if not allowed:
+                self.throttled += 1
+                await self._answer_silently(event, "⏳ Слишком часто, подождите пару секунд")
+                return None
+
+            state.last_callback = (callback_key, now)
+            state.inflight.add(callback_key)
+            self.passed += 1
+            try:
+                return await handler(event, data)
+            finally:
+                state.inflight.discard(callback_key)
+
+        if isinstance(event, Message) and not self._hit(state, 'message', now):
+            self.throttled += 1
+            if now >= state.warned_until:
+                state.warned_until = now + self.limits['message'][1]
+                logger.info(f"Throttling messages from user {user.id}")
+                try:
+                    await event.answer("⏳ Слишком много сообщений, подождите немного")
+                except Exception as e:
+                    logger.debug(f"Failed to warn throttled user {user.id}: {e}")
+            return None
+
+        self.passed += 1
+        return await handler(event, data)
+
+    @staticmethod
+    async def _answer_silently(callback: CallbackQuery, text: Optional[str] = None):
+        """Ответить на отброшенный callback (иначе у кнопки крутятся часики)"""
+        try:
+            await callback.answer(text)
+        except Exception as e:
+            logger.debug(f"Failed to answer throttled callback: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики пропущенных и отброшенных апдейтов"""
+        return {
+            'users': len(self._users),
+            'passed': self.passed,
+            'throttled': self.throttled,
+            'duplicates': self.duplicates,
+        }
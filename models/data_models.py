@@ -300,6 +300,19 @@ class Group:
         return max(0, self.max_students - self.current_students)
 
 
+# ============================================
+# КОМПАКТНЫЕ СТРОКИ (для Database.iter_query)
+# ============================================
+# Без __dict__: экземпляр занимает в несколько раз меньше памяти, чем dict
+# строки. Поля перечислены в порядке колонок типичного SELECT.
+
+@dataclass(slots=True)
+class RecipientRow:
+    telegram_id: int
+    name: Optional[str] = None
+
+
+
 # ============================================
 # ПРИМЕРЫ ИСПОЛЬЗОВАНИЯ
 # ============================================
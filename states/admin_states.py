@@ -5,6 +5,7 @@ class AdminStates(StatesGroup):
     # Основные состояния для работы со студентами
     waiting_for_student_id = State()
     waiting_for_student_phone = State()
+    waiting_for_search_query = State()
     waiting_for_trial_time = State()
     waiting_for_lesson_time = State()
 
@@ -0,0 +1,61 @@
+"""
+Тесты резервного копирования: проверка копий и ротация
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import database.backup as backup_module
+from database.backup import BackupService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    db_path = tmp_path / "source.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item {i}",) for i in range(100)])
+    conn.commit()
+    conn.close()
+
+    # Метка времени в имени копии — по секундам; каждая копия получает свою секунду
+    clock = iter(datetime(2025, 1, 1) + timedelta(seconds=i) for i in range(1000))
+    monkeypatch.setattr(backup_module, 'datetime', SimpleNamespace(now=lambda: next(clock)))
+
+    db = SimpleNamespace(db_name=str(db_path), pool=SimpleNamespace(busy_timeout_ms=1000))
+    return BackupService(db, str(tmp_path / "backups"), keep=2)
+
+
+def test_create_verifies_and_rotates(service):
+    infos = [service.create() for _ in range(3)]
+
+    assert all(info['verified']['ok'] for info in infos)
+    assert infos[0]['verified']['tables'] == 1
+    assert [backup['path'] for backup in service.list_backups()] == [infos[2]['path'], infos[1]['path']]
+    assert not os.path.exists(infos[0]['path'])
+
+
+def test_corrupt_backup_does_not_rotate_out_good_ones(service, monkeypatch):
+    good = [service.create() for _ in range(2)]
+
+    monkeypatch.setattr(service, 'verify', lambda path: {
+        'ok': False, 'errors': ['database disk image is malformed'], 'schema_version': None, 'tables': 0
+    })
+    bad = [service.create() for _ in range(3)]
+
+    assert all(info['path'].endswith('.corrupt') and os.path.exists(info['path']) for info in bad)
+    assert [backup['path'] for backup in service.list_backups()] == [good[1]['path'], good[0]['path']]
+    assert service.last_backup is bad[-1]
+
+
+def test_compressed_backup_is_verified(service):
+    service.compress = True
+    info = service.create()
+
+    assert info['path'].endswith('.db.gz')
+    assert info['verified']['ok']
+    assert service.list_backups()[0]['path'] == info['path']
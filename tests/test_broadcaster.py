@@ -0,0 +1,141 @@
+"""
+Тесты рассылок: задание на временной БД, отправка через фейковый бот
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from database.base import Database
+from database.broadcasts import JOB_COMPLETED, JOB_PAUSED, JOB_RUNNING
+from utils.broadcaster import BroadcastEngine, format_job_progress
+
+
+class FakeBot:
+    """Вместо Telegram: запоминает получателей"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(chat_id)
+
+    async def edit_message_text(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "broadcasts.db"))
+    for i in range(7):
+        database.registrations.register_from_telegram(1000 + i, f"User {i}", f"+99890123450{i}",
+                                                      "Python", "Онлайн", "Утро")
+    yield database
+    database.close()
+
+
+def _locked(calls: int):
+    """Ошибка 'database is locked' на первых calls вызовах, дальше — настоящий метод"""
+    def wrap(method):
+        remaining = [calls]
+
+        async def flaky(*args, **kwargs):
+            if remaining[0]:
+                remaining[0] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return await method(*args, **kwargs)
+        return flaky
+    return wrap
+
+
+async def _wait_idle(engine: BroadcastEngine, timeout: float = 10.0):
+    await asyncio.wait_for(asyncio.gather(*engine._tasks.values(), return_exceptions=True), timeout)
+
+
+def test_transient_db_error_is_retried(db, monkeypatch):
+    async def scenario():
+        engine = BroadcastEngine(db, batch_size=3, error_delay=0.01)
+        monkeypatch.setattr(engine.repo, 'aclaim', _locked(2)(engine.repo.aclaim))
+        bot = FakeBot()
+        await engine.start(bot)
+
+        job_id = await db.broadcasts.acreate("Привет", None, 1)
+        engine.submit(job_id)
+        await _wait_idle(engine)
+
+        job = await db.broadcasts.aget(job_id)
+        assert job['status'] == JOB_COMPLETED
+        assert job['sent'] == job['total'] == 7
+        assert sorted(bot.sent) == list(range(1000, 1007))
+
+    asyncio.run(scenario())
+
+
+def test_persistent_error_pauses_job_and_resume_finishes_it(db, monkeypatch):
+    async def scenario():
+        engine = BroadcastEngine(db, batch_size=3, error_retries=2, error_delay=0.01)
+        record = engine.repo.arecord
+        monkeypatch.setattr(engine.repo, 'arecord', _locked(100)(record))
+        bot = FakeBot()
+        await engine.start(bot)
+
+        job_id = await db.broadcasts.acreate("Привет", None, 1)
+        engine.submit(job_id)
+        await _wait_idle(engine)
+
+        # Задание не висит в running без задачи: пауза с причиной
+        job = await db.broadcasts.aget(job_id)
+        assert job['status'] == JOB_PAUSED
+        assert "database is locked" in job['error']
+        assert "Остановлена из-за ошибки" in format_job_progress(job)
+        assert engine.running == []
+        assert len(bot.sent) == 3  # Первая пачка ушла, итоги не записаны
+
+        # "Продолжить" в прогрессе рассылки
+        monkeypatch.setattr(engine.repo, 'arecord', record)
+        assert await db.broadcasts.aset_status(job_id, JOB_RUNNING, (JOB_PAUSED,))
+        engine.submit(job_id)
+        await _wait_idle(engine)
+
+        job = await db.broadcasts.aget(job_id)
+        assert job['status'] == JOB_COMPLETED
+        assert job['error'] is None
+        # Незаписанная пачка не отправляется повторно: считается прерванной
+        assert len(bot.sent) == 7
+        assert (job['sent'], job['failed']) == (4, 3)
+
+    asyncio.run(scenario())
+
+
+def test_resume_while_task_is_finishing_restarts_it(db, monkeypatch):
+    async def scenario():
+        engine = BroadcastEngine(db, batch_size=3)
+        finishing = asyncio.Event()
+        get = engine.repo.aget
+
+        async def slow_get(job_id):
+            job = await get(job_id)
+            if job['status'] == JOB_PAUSED and not finishing.is_set():
+                finishing.set()
+                await asyncio.sleep(0.05)  # Статус прочитан, задача ещё не завершилась
+            return job
+        monkeypatch.setattr(engine.repo, 'aget', slow_get)
+        bot = FakeBot()
+        await engine.start(bot)
+
+        job_id = await db.broadcasts.acreate("Привет", None, 1)
+        await db.broadcasts.aset_status(job_id, JOB_PAUSED, (JOB_RUNNING,))
+        engine.submit(job_id)
+        await asyncio.wait_for(finishing.wait(), 5)  # Задача увидела паузу
+
+        await db.broadcasts.aset_status(job_id, JOB_RUNNING, (JOB_PAUSED,))
+        engine.submit(job_id)
+        await _wait_idle(engine)
+        await _wait_idle(engine)
+
+        job = await db.broadcasts.aget(job_id)
+        assert job['status'] == JOB_COMPLETED
+        assert len(bot.sent) == 7
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+"""
+Тесты создания уроков через LessonRepository
+"""
+
+import asyncio
+
+import pytest
+
+from database.base import Database
+from database.timestamps import format_local, to_epoch
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "lessons.db"))
+    yield database
+    database.close()
+
+
+def test_create_fills_lesson_columns(db):
+    teacher_id = db.execute_insert("INSERT INTO teachers (user_id, full_name) VALUES (?, ?)",
+                                   (1001, "Преподаватель"))
+    course_id = db.reference.all('courses')[0]['id']
+    group_id = db.execute_insert("INSERT INTO groups (name, course_id, teacher_id) VALUES (?, ?, ?)",
+                                 ("Группа", course_id, teacher_id))
+
+    lesson_id = asyncio.run(db.lessons.acreate(group_id, teacher_id, "Тема", "2025-03-10 14:30:00"))
+
+    assert lesson_id is not None
+    row = db.execute_query("SELECT * FROM lessons WHERE id = ?", (lesson_id,))[0]
+    assert row['lesson_ts'] == to_epoch("2025-03-10 14:30:00")
+    assert row['lesson_date'] == format_local(row['lesson_ts'])
+    assert row['lesson_time'] == "14:30"
+    assert row['duration_minutes'] == 60
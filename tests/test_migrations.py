@@ -0,0 +1,112 @@
+"""
+Тесты миграций: версии схемы и фоновые индексы
+"""
+
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+from database.base import Database
+from database.migrations import SCHEMA_VERSION, Migration, MigrationRunner, get_user_version
+
+
+def _create_items(cursor: sqlite3.Cursor):
+    cursor.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, kind TEXT)")
+
+
+def _index_statements(cursor: sqlite3.Cursor):
+    return [
+        "CREATE INDEX IF NOT EXISTS idx_items_name ON items(name)",
+        "CREATE INDEX IF NOT EXISTS idx_items_kind ON items(kind)",
+    ]
+
+
+def _build_indexes(cursor: sqlite3.Cursor):
+    for statement in _index_statements(cursor):
+        cursor.execute(statement)
+
+
+MIGRATIONS = [
+    Migration(1, _create_items),
+    Migration(2, _build_indexes, background=True, statements=_index_statements),
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "migrations.db"), isolation_level=None)
+    yield connection
+    connection.close()
+
+
+def _transactions(conn: sqlite3.Connection, log: list):
+    """Фабрика транзакций как Database.transaction; записывает выполненные запросы"""
+    @contextmanager
+    def transaction(immediate: bool = True):
+        statements = []
+        conn.set_trace_callback(statements.append)
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.set_trace_callback(None)
+            log.append(statements)
+    return transaction
+
+
+def _run(conn, runner: MigrationRunner):
+    conn.execute("BEGIN")
+    deferred = runner.run(conn)
+    conn.execute("COMMIT")
+    return deferred
+
+
+def test_background_indexes_run_one_per_transaction(conn):
+    runner = MigrationRunner(MIGRATIONS)
+    assert [m.version for m in _run(conn, runner)] == [2]
+    assert get_user_version(conn) == 1
+
+    log = []
+    runner.run_deferred(_transactions(conn, log), pause=0)
+
+    index_transactions = [statements for statements in log
+                          if any(s.startswith("CREATE INDEX") for s in statements)]
+    assert len(index_transactions) == 2
+    assert all(sum(s.startswith("CREATE INDEX") for s in statements) == 1
+               for statements in index_transactions)
+    assert get_user_version(conn) == 2
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_items_name', 'idx_items_kind'} <= indexes
+
+
+def test_failed_background_step_is_retried(conn):
+    broken = [
+        MIGRATIONS[0],
+        Migration(2, _build_indexes, background=True,
+                  statements=lambda cursor: ["CREATE INDEX idx_missing ON missing(id)"]),
+    ]
+    runner = MigrationRunner(broken)
+    _run(conn, runner)
+    runner.run_deferred(_transactions(conn, []), pause=0)
+    assert get_user_version(conn) == 1
+
+    runner = MigrationRunner(MIGRATIONS)
+    assert [m.version for m in _run(conn, runner)] == [2]
+    runner.run_deferred(_transactions(conn, []), pause=0)
+    assert get_user_version(conn) == 2
+
+
+def test_fresh_database_reaches_schema_version(tmp_path):
+    db = Database(str(tmp_path / "fresh.db"))
+    try:
+        thread = getattr(db, '_migration_thread', None)
+        if thread is not None:
+            thread.join(30)
+        assert db.schema_version == SCHEMA_VERSION
+    finally:
+        db.close()
@@ -0,0 +1,42 @@
+"""
+Тесты курсоров keyset-пагинации
+"""
+
+from database.pagination import (MAX_CALLBACK_LENGTH, NEXT, KeysetPage, decode_cursor,
+                                 encode_cursor, parse_page_callback)
+
+
+def _page(rows, keys=("created_at", "id"), prefix="view_students_trial", page=2):
+    return KeysetPage(rows=rows, page=page, has_prev=True, has_next=True,
+                      prefix=prefix, page_size=10, keys=keys)
+
+
+def test_cursor_round_trip():
+    values = ("2025-01-31 14:30:00", 123456789, "Иванов, Иван: 100%", None, 1.5, -7)
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+def test_cursor_is_compact():
+    cursor = encode_cursor(("2025-01-31 14:30:00", 123456789))
+    assert len(cursor) <= 16
+    assert ':' not in encode_cursor(("a:b,c",))
+
+
+def test_legacy_cursor_still_decodes():
+    assert decode_cursor("t20250131143000,i42,s%D0%90") == ("2025-01-31 14:30:00", 42, "А")
+
+
+def test_next_callback_fits_and_parses():
+    page = _page([{'created_at': "2025-01-31 14:30:00", 'id': 987654}])
+    data = page.next_callback
+    assert len(data.encode('utf-8')) <= MAX_CALLBACK_LENGTH
+    request = parse_page_callback(data, "view_students_trial")
+    assert request.page == 3 and request.direction == NEXT
+    assert request.cursor == ("2025-01-31 14:30:00", 987654)
+
+
+def test_oversized_cursor_drops_button(caplog):
+    page = _page([{'full_name': "Очень длинное имя студента " * 3, 'id': 1}], keys=("full_name", "id"), page=3)
+    assert page.next_callback is None
+    assert page.prev_callback is None
+    assert "button dropped" in caplog.text
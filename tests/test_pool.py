@@ -0,0 +1,94 @@
+"""
+Тесты пула подключений: аренда по потокам и задачам asyncio
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from database.base import Database
+from database.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=4)
+    yield pool
+    pool.close_all()
+
+
+def test_nested_acquire_returns_same_connection(pool):
+    conn = pool.acquire()
+    assert pool.acquire() is conn
+    assert pool.depth == 2
+    pool.release(conn)
+    pool.release(conn)
+    assert pool.depth == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_threads_get_separate_connections(pool):
+    conn = pool.acquire()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+    with pytest.raises(sqlite3.ProgrammingError):
+        pool.release(other[0])
+    pool.release(conn)
+
+
+def test_tasks_on_loop_thread_get_separate_leases(pool):
+    async def hold(started: asyncio.Event, done: asyncio.Event):
+        conn = pool.acquire()
+        started.set()
+        await done.wait()
+        depth = pool.depth
+        pool.release(conn)
+        return conn, depth
+
+    async def scenario():
+        events = [(asyncio.Event(), asyncio.Event()) for _ in range(2)]
+        tasks = [asyncio.create_task(hold(*pair)) for pair in events]
+        for started, _ in events:
+            await started.wait()
+        assert pool.depth == 0  # Аренды задач не видны вызывающему
+        for _, done in events:
+            done.set()
+        (first, first_depth), (second, second_depth) = await asyncio.gather(*tasks)
+        assert first is not second
+        assert first_depth == second_depth == 1
+
+    asyncio.run(scenario())
+
+
+def test_transaction_held_across_await_is_isolated(tmp_path):
+    db = Database(str(tmp_path / "tx.db"))
+    db.execute_update("CREATE TABLE items (name TEXT)")
+
+    async def failing_unit_of_work(inside: asyncio.Event, proceed: asyncio.Event):
+        with db.transaction():
+            db.execute_update("INSERT INTO items (name) VALUES ('uncommitted')")
+            inside.set()
+            await proceed.wait()
+            raise RuntimeError("rollback")
+
+    async def scenario():
+        inside, proceed = asyncio.Event(), asyncio.Event()
+        task = asyncio.create_task(failing_unit_of_work(inside, proceed))
+        await inside.wait()
+        # Другой обработчик не присоединяется к чужой транзакции
+        assert not db.in_transaction
+        assert db.execute_query("SELECT COUNT(*) AS n FROM items")[0]['n'] == 0
+        proceed.set()
+        with pytest.raises(RuntimeError):
+            await task
+
+    try:
+        asyncio.run(scenario())
+        assert db.execute_query("SELECT COUNT(*) AS n FROM items")[0]['n'] == 0
+    finally:
+        db.close()
@@ -0,0 +1,43 @@
+"""
+Тесты кэша справочников
+"""
+
+import sqlite3
+
+import pytest
+
+from database.base import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "reference.db"))
+    yield database
+    database.close()
+
+
+def test_failed_load_is_not_cached(db, monkeypatch):
+    reference = db.reference
+    reference.invalidate()
+    query = db.execute_query
+
+    def locked(sql, params=()):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, 'execute_query', locked)
+    with pytest.raises(sqlite3.OperationalError):
+        reference.all('courses')
+
+    monkeypatch.setattr(db, 'execute_query', query)
+    courses = reference.all('courses')
+    assert courses
+    assert reference.get_id('courses', courses[0]['name']) == courses[0]['id']
+
+
+def test_invalidate_reloads_table(db):
+    reference = db.reference
+    before = len(reference.all('courses'))
+    db.execute_insert("INSERT INTO courses (name) VALUES (?)", ("Новый курс",))
+    assert len(reference.all('courses')) == before
+    reference.invalidate('courses')
+    assert reference.get_id('courses', "Новый курс") is not None
@@ -0,0 +1,28 @@
+"""
+Тесты статистики регистраций
+"""
+
+import pytest
+
+from database.base import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "registrations.db"))
+    yield database
+    database.close()
+
+
+def test_stats_by_status_follows_counters(db):
+    course = db.reference.all('courses')[0]['name']
+    first = db.registrations.register_from_telegram(1001, "Студент", "+998901234567",
+                                                    course, "", "")
+    db.registrations.register_from_telegram(1002, "Студентка", "+998901234568",
+                                            course, "", "")
+    db.registrations.update_status(first, 'studying')
+
+    assert db.registrations.get_stats_by_status() == {'trial': 1, 'studying': 1}
+
+    db.execute_query("UPDATE stats_counters SET value = 5 WHERE metric = 'status' AND dim1 = 'trial'")
+    assert db.registrations.get_stats_by_status()['trial'] == 5
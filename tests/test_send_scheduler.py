@@ -0,0 +1,130 @@
+"""
+Тесты планировщика отправок: приоритеты, flood control, повторы
+"""
+
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, SendMessage
+
+from utils.send_scheduler import PRIORITY_BULK, SendScheduler, TokenBucket, send_priority
+
+
+class FakeApi:
+    """make_request для middleware: записывает отправки, по заказу отвечает 429"""
+
+    def __init__(self):
+        self.calls = []
+        self.retry_after = {}  # chat_id -> [retry_after, ...] на ближайшие вызовы
+
+    async def __call__(self, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        self.calls.append((method.__api_method__, chat_id, getattr(method, 'text', None), time.monotonic()))
+        pending = self.retry_after.get(chat_id)
+        if pending:
+            raise TelegramRetryAfter(method, "Too Many Requests", pending.pop(0))
+        return True
+
+
+def _send(scheduler: SendScheduler, api: FakeApi, chat_id, text: str):
+    return scheduler(api, None, SendMessage(chat_id=chat_id, text=text))
+
+
+def test_token_bucket_reserve_queues_in_order():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == 0
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    assert bucket.idle(now + 10)
+
+
+def test_interactive_overtakes_queued_bulk():
+    async def scenario():
+        # Лимит чатов не мешает: очередь только за общими токенами (20/с, запас 4)
+        scheduler = SendScheduler(global_rate=20, chat_rate=1000, chat_burst=1000)
+        api = FakeApi()
+        try:
+            with send_priority(PRIORITY_BULK):
+                bulk = [asyncio.create_task(_send(scheduler, api, 1000 + i, f"bulk {i}")) for i in range(20)]
+            await asyncio.sleep(0.05)
+            assert scheduler.stats()['queued']['bulk'] > 10
+
+            started = time.monotonic()
+            await _send(scheduler, api, 1, "reply")
+            waited = time.monotonic() - started
+
+            texts = [text for _, _, text, _ in api.calls]
+            assert waited < 0.2
+            assert texts.index("reply") <= 6
+            assert sum(not task.done() for task in bulk) > 10
+
+            await asyncio.gather(*bulk)
+            assert scheduler.stats()['sent'] == {'interactive': 1, 'notify': 0, 'bulk': 20}
+        finally:
+            await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_blocks_chat_and_pauses_bulk():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=100, chat_rate=100, chat_burst=10)
+        api = FakeApi()
+        api.retry_after[1] = [1]
+        try:
+            started = time.monotonic()
+            first = asyncio.create_task(_send(scheduler, api, 1, "to blocked chat"))
+            await asyncio.sleep(0.05)
+            assert scheduler.stats()['retry_after'] == 1
+            assert scheduler.stats()['bulk_paused_s'] > 0.5
+
+            # Ответ в другой чат идёт сразу, рассылка ждёт конца паузы
+            await _send(scheduler, api, 2, "other chat")
+            assert time.monotonic() - started < 0.5
+            with send_priority(PRIORITY_BULK):
+                await _send(scheduler, api, 3, "bulk")
+            assert time.monotonic() - started >= 0.9
+
+            assert await first is True
+            retried = [at for _, chat_id, _, at in api.calls if chat_id == 1]
+            assert len(retried) == 2
+            assert retried[1] - retried[0] >= 0.9
+        finally:
+            await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_reraised_after_max_retries():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=100, chat_rate=100, chat_burst=10, max_retries=2)
+        api = FakeApi()
+        api.retry_after[1] = [0, 0, 0, 0]
+        try:
+            with pytest.raises(TelegramRetryAfter):
+                await _send(scheduler, api, 1, "flooded")
+            assert len(api.calls) == 3
+            assert scheduler.stats()['retry_after'] == 3
+            assert scheduler.stats()['sent']['interactive'] == 0
+        finally:
+            await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_unlimited_methods_bypass_scheduler():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=1, chat_rate=1, chat_burst=1)
+        api = FakeApi()
+        started = time.monotonic()
+        for _ in range(5):
+            await scheduler(api, None, GetMe())
+        assert time.monotonic() - started < 0.1
+        assert len(api.calls) == 5
+        await scheduler.close()
+
+    asyncio.run(scenario())
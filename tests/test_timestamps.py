@@ -0,0 +1,48 @@
+"""
+Тесты перевода местного времени в UTC epoch
+"""
+
+import zoneinfo
+from datetime import datetime, timezone
+
+import pytest
+
+from config import Config
+from database import timestamps
+from database.timestamps import from_epoch, local_timezone, to_epoch
+
+
+@pytest.fixture(autouse=True)
+def fresh_timezone():
+    local_timezone.cache_clear()
+    yield
+    local_timezone.cache_clear()
+
+
+def _no_tzdata(monkeypatch):
+    def missing(name):
+        raise zoneinfo.ZoneInfoNotFoundError(f"No time zone found with key {name}")
+    monkeypatch.setattr(zoneinfo, 'ZoneInfo', missing)
+
+
+def test_tashkent_without_tzdata_uses_fixed_offset(monkeypatch, caplog):
+    monkeypatch.setattr(Config, 'TIMEZONE', 'Asia/Tashkent')
+    _no_tzdata(monkeypatch)
+
+    assert to_epoch("2025-03-10 14:00") == int(datetime(2025, 3, 10, 9, 0, tzinfo=timezone.utc).timestamp())
+    assert from_epoch(to_epoch("2025-07-01 09:30")).strftime("%H:%M") == "09:30"
+    warnings = [record for record in caplog.records if record.name == timestamps.__name__]
+    assert len(warnings) == 1
+
+
+def test_unknown_timezone_fails(monkeypatch):
+    monkeypatch.setattr(Config, 'TIMEZONE', 'Mars/Olympus')
+    with pytest.raises(ValueError):
+        local_timezone()
+
+
+def test_unknown_timezone_without_tzdata_fails(monkeypatch):
+    monkeypatch.setattr(Config, 'TIMEZONE', 'Europe/Moscow')
+    _no_tzdata(monkeypatch)
+    with pytest.raises(ValueError):
+        to_epoch("2025-03-10 14:00")
@@ -0,0 +1,210 @@
+"""
+Тесты вебхука: run_webhook против локального фейкового Telegram API
+"""
+
+import asyncio
+import json
+import socket
+from contextlib import asynccontextmanager
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+
+from utils.webhook import DrainingRequestHandler, run_webhook
+
+TOKEN = "42:TEST"
+SECRET = "test-secret"
+PATH = "/webhook"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 5, "type": "private"},
+            "from": {"id": 5, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+@asynccontextmanager
+async def fake_telegram_api():
+    """Локальный Bot API: записывает вызванные методы и на всё отвечает ok"""
+    calls = []
+
+    async def api_method(request: web.Request) -> web.Response:
+        data = await request.post()
+        calls.append((request.match_info["method"], dict(data)))
+        method = request.match_info["method"]
+        if method == "sendMessage":
+            result = {"message_id": 1, "date": 0, "chat": {"id": int(data["chat_id"]), "type": "private"},
+                      "text": data["text"]}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api_method)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = _free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    try:
+        yield f"http://127.0.0.1:{port}", calls
+    finally:
+        await runner.cleanup()
+
+
+def _make_bot(api_base: str) -> Bot:
+    return Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api_base)))
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+@asynccontextmanager
+async def running_webhook(dp: Dispatcher, bot: Bot, calls, **kwargs):
+    """run_webhook в фоне; выход из контекста останавливает сервер"""
+    port = _free_port()
+    stop_event = asyncio.Event()
+    task = asyncio.create_task(run_webhook(
+        dp, bot, url="https://bot.example.com", path=PATH, host="127.0.0.1", port=port,
+        secret_token=SECRET, stop_event=stop_event, **kwargs
+    ))
+    await _wait_for(lambda: any(method == "setWebhook" for method, _ in calls) or task.done())
+    if task.done():
+        task.result()
+    try:
+        yield f"http://127.0.0.1:{port}{PATH}"
+    finally:
+        stop_event.set()
+        await asyncio.wait_for(task, 10)
+
+
+def test_run_webhook_registers_and_checks_secret():
+    async def scenario():
+        async with fake_telegram_api() as (api_base, calls):
+            bot = _make_bot(api_base)
+            dp = Dispatcher()
+            received = []
+
+            @dp.message()
+            async def echo(message: Message):
+                received.append(message.text)
+                await message.answer(f"echo: {message.text}")
+
+            async with running_webhook(dp, bot, calls) as webhook_url:
+                set_webhook = next(data for method, data in calls if method == "setWebhook")
+                assert set_webhook["url"] == "https://bot.example.com" + PATH
+                assert set_webhook["secret_token"] == SECRET
+                assert json.loads(set_webhook["allowed_updates"]) == ["message"]
+
+                async with aiohttp.ClientSession() as client:
+                    async with client.post(webhook_url, json=_update(1, "forged"),
+                                           headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}) as resp:
+                        assert resp.status in (401, 403)
+                    async with client.post(webhook_url, json=_update(2, "hello"),
+                                           headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as resp:
+                        assert resp.status == 200
+
+                await _wait_for(lambda: any(method == "sendMessage" for method, _ in calls))
+
+            assert received == ["hello"]
+            send = next(data for method, data in calls if method == "sendMessage")
+            assert send["text"] == "echo: hello"
+
+    asyncio.run(scenario())
+
+
+def test_run_webhook_reply_in_response():
+    async def scenario():
+        async with fake_telegram_api() as (api_base, calls):
+            bot = _make_bot(api_base)
+            dp = Dispatcher()
+
+            @dp.message()
+            async def echo(message: Message):
+                # Метод возвращается, а не вызывается — уходит в теле ответа вебхука
+                return message.answer(f"echo: {message.text}")
+
+            async with running_webhook(dp, bot, calls, reply_in_webhook=True) as webhook_url:
+                async with aiohttp.ClientSession() as client:
+                    async with client.post(webhook_url, json=_update(1, "hello"),
+                                           headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as resp:
+                        assert resp.status == 200
+                        body = await resp.text()
+
+            assert "sendMessage" in body
+            assert "echo: hello" in body
+            assert not any(method == "sendMessage" for method, _ in calls)
+
+    asyncio.run(scenario())
+
+
+def test_drain_rejects_new_updates_and_finishes_inflight():
+    async def scenario():
+        async with fake_telegram_api() as (api_base, calls):
+            bot = _make_bot(api_base)
+            dp = Dispatcher()
+            started = asyncio.Event()
+            release = asyncio.Event()
+            finished = []
+
+            @dp.message()
+            async def slow(message: Message):
+                started.set()
+                await release.wait()
+                finished.append(message.text)
+
+            handler = DrainingRequestHandler(dp, bot, drain_timeout=5, secret_token=SECRET)
+            app = web.Application()
+            handler.register(app, path=PATH)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            port = _free_port()
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+            url = f"http://127.0.0.1:{port}{PATH}"
+            headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+            try:
+                async with aiohttp.ClientSession() as client:
+                    async with client.post(url, json=_update(1, "slow"), headers=headers) as resp:
+                        assert resp.status == 200
+                    await asyncio.wait_for(started.wait(), 5)
+                    assert handler.busy == 1
+
+                    drain = asyncio.create_task(handler.drain())
+                    await asyncio.sleep(0.05)
+                    assert not drain.done()
+
+                    async with client.post(url, json=_update(2, "late"), headers=headers) as resp:
+                        assert resp.status == 503
+                    assert handler.rejected == 1
+
+                    release.set()
+                    assert await asyncio.wait_for(drain, 5) is True
+            finally:
+                await runner.cleanup()
+                await bot.session.close()
+
+            assert finished == ["slow"]
+            assert handler.busy == 0
+
+    asyncio.run(scenario())
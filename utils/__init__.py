@@ -1,10 +1,10 @@
 # utils/__init__.py
 # ✅ ИСПРАВЛЕНО: Удален импорт Database, который создавал циклический импорт
 
-from .validators import validate_name, validate_phone, format_phone
+from .validators import validate_name, validate_phone, format_phone, normalize_phone
 from helpers import is_admin, extract_id, get_grade_from_progress, get_student_by_id
 
 __all__ = [
-    'validate_name', 'validate_phone', 'format_phone',
+    'validate_name', 'validate_phone', 'format_phone', 'normalize_phone',
     'is_admin', 'extract_id', 'get_grade_from_progress', 'get_student_by_id'
 ]
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Admin Notifier
+Уведомления администраторам в фоне: всем админам одновременно, без повторов
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter, TelegramServerError)
+
+from database.notifications import NOTIFY_FAILED, NOTIFY_SENT
+from .send_scheduler import PRIORITY_NOTIFY, send_priority
+
+logger = logging.getLogger(__name__)
+
+
+class AdminNotifier:
+    """
+    Рассылка событий (новая регистрация, отзыв) всем администраторам
+
+    notify() только ставит событие в очередь и сразу возвращает
+    управление — обработчик не ждёт N запросов к Telegram. Отправка
+    всем админам идёт параллельно с приоритетом уведомлений. Повтор
+    одного и того же события (двойное нажатие, повторный апдейт)
+    отбрасывается: сначала по памяти, затем по admin_notifications,
+    где записывается и результат доставки каждому админу.
+
+    Example:
+        >>> notifier = get_admin_notifier()
+        >>> notifier.notify(bot, 'registration', reg_id, text)
+    """
+
+    def __init__(self, db, admin_ids: Iterable[int], retries: int = 2, retry_delay: float = 5.0,
+                 remember: int = 1000):
+        """
+        Args:
+            db: Database
+            admin_ids: Кому отправлять
+            retries: Повторов при сетевых ошибках и flood control
+            retry_delay: Пауза перед повтором (сек)
+            remember: Сколько последних событий помнить для отсева повторов
+        """
+        self.db = db
+        self.admin_ids = tuple(admin_ids)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.remember = max(1, remember)
+        self._recent: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Статистика
+        self.queued = 0
+        self.duplicates = 0
+        self.sent = 0
+        self.failed = 0
+
+    def notify(self, bot: Bot, kind: str, ref, text: str, parse_mode: Optional[str] = "Markdown") -> bool:
+        """
+        Поставить уведомление в очередь
+
+        Args:
+            bot: Bot
+            kind: Тип события ('registration', 'feedback')
+            ref: ID события (повтор с тем же ID не отправляется)
+            text: Текст уведомления
+            parse_mode: Разметка текста
+
+        Returns:
+            bool: False если событие уже отправлялось
+        """
+        key = (kind, str(ref))
+        if key in self._recent:
+            self.duplicates += 1
+            return False
+        self._recent[key] = None
+        while len(self._recent) > self.remember:
+            self._recent.popitem(last=False)
+
+        self.queued += 1
+        task = asyncio.create_task(self._fan_out(bot, key, text, parse_mode))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _fan_out(self, bot: Bot, key: Tuple[str, str], text: str, parse_mode: Optional[str]):
+        kind, ref = key
+        try:
+            admins = await self.db.notifications.aclaim(kind, ref, self.admin_ids)
+            if not admins:
+                self.duplicates += 1
+                return
+            with send_priority(PRIORITY_NOTIFY):
+                results = await asyncio.gather(*(self._send(bot, admin_id, text, parse_mode)
+                                                 for admin_id in admins))
+            await self.db.notifications.arecord(kind, ref, list(results))
+
+            delivered = sum(1 for _, status, _, _ in results if status == NOTIFY_SENT)
+            self.sent += delivered
+            self.failed += len(results) - delivered
+            logger.info(f"Notification {kind} #{ref} sent to {delivered}/{len(results)} admins")
+        except Exception as e:
+            logger.error(f"Error notifying admins about {kind} #{ref}: {e}", exc_info=True)
+
+    async def _send(self, bot: Bot, admin_id: int, text: str,
+                    parse_mode: Optional[str]) -> Tuple[int, str, Optional[str], int]:
+        """Отправить одному админу; вернуть (admin_id, статус, ошибка, попыток)"""
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                await bot.send_message(admin_id, text, parse_mode=parse_mode)
+                return admin_id, NOTIFY_SENT, None, attempts
+            except TelegramForbiddenError as e:
+                logger.warning(f"Admin {admin_id} blocked the bot")
+                return admin_id, NOTIFY_FAILED, e.message[:200], attempts
+            except TelegramBadRequest as e:
+                if parse_mode and "parse entities" in e.message:
+                    # Имя или текст пользователя сломали Markdown — отправляем как есть
+                    parse_mode = None
+                    continue
+                logger.error(f"Error sending notification to admin {admin_id}: {e}")
+                return admin_id, NOTIFY_FAILED, e.message[:200], attempts
+            except (TelegramRetryAfter, TelegramNetworkError, TelegramServerError) as e:
+                if attempts > self.retries:
+                    logger.error(f"Error sending notification to admin {admin_id}: {e}")
+                    return admin_id, NOTIFY_FAILED, str(e)[:200], attempts
+                delay = e.retry_after if isinstance(e, TelegramRetryAfter) else self.retry_delay
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Unexpected error sending notification to admin {admin_id}: {e}")
+                return admin_id, NOTIFY_FAILED, str(e)[:200], attempts
+
+    @property
+    def pending(self) -> int:
+        """Уведомлений в работе"""
+        return len(self._tasks)
+
+    async def close(self, timeout: float = 10.0):
+        """Дождаться уведомлений в работе (при остановке бота)"""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики уведомлений"""
+        return {
+            'queued': self.queued,
+            'pending': self.pending,
+            'duplicates': self.duplicates,
+            'sent': self.sent,
+            'failed': self.failed,
+        }
+
+
+_notifier: Optional[AdminNotifier] = None
+
+
+def get_admin_notifier() -> AdminNotifier:
+    """Уведомления админам из Config.ADMIN_IDS"""
+    global _notifier
+    if _notifier is None:
+        from config import Config
+        from database import get_db
+        _notifier = AdminNotifier(get_db(), Config.ADMIN_IDS)
+    return _notifier
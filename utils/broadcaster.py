@@ -0,0 +1,291 @@
+"""
+Broadcast Engine
+Выполнение заданий рассылок в фоне: с возобновлением после перезапуска
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter, TelegramServerError)
+
+from database.broadcasts import (DELIVERY_BLOCKED, DELIVERY_FAILED, DELIVERY_PENDING, DELIVERY_SENT,
+                                 JOB_CANCELLED, JOB_COMPLETED, JOB_PAUSED, JOB_RUNNING)
+from database.timestamps import now_epoch
+from .send_scheduler import PRIORITY_BULK, send_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_NAMES = {
+    JOB_RUNNING: '▶️ идёт',
+    JOB_PAUSED: '⏸ на паузе',
+    JOB_CANCELLED: '⏹ отменена',
+    JOB_COMPLETED: '✅ завершена',
+}
+
+
+def format_job_progress(job: Dict) -> str:
+    """Текст прогресса рассылки для админа"""
+    done = job['sent'] + job['failed'] + job['blocked']
+    total = job['total']
+    percent = done * 100 // total if total else 100
+    preview = job['text'] if len(job['text']) <= 100 else job['text'][:100] + "…"
+    error = f"⚠️ Остановлена из-за ошибки: {job['error']}\n\n" if job.get('error') else ""
+    return (
+        f"📢 Рассылка #{job['id']} — {JOB_STATUS_NAMES.get(job['status'], job['status'])}\n\n"
+        f"Прогресс: {done}/{total} ({percent}%)\n"
+        f"✅ Доставлено: {job['sent']}\n"
+        f"❌ Ошибки: {job['failed']}\n"
+        f"🚫 Заблокировали бота: {job['blocked']}\n\n"
+        f"{error}"
+        f"{preview}"
+    )
+
+
+class BroadcastEngine:
+    """
+    Фоновое выполнение рассылок из broadcast_jobs
+
+    Каждое задание — отдельная задача asyncio: пачка получателей
+    забирается из БД, отправляется workers параллельными отправками
+    (темп держит планировщик отправок, приоритет — рассылка), итоги
+    пачки записываются одной транзакцией. Пауза и отмена — смена
+    статуса задания в БД, задача замечает её после текущей пачки.
+    Сетевые ошибки и исчерпанный flood control — повтор с
+    экспоненциальной задержкой; TelegramForbiddenError — пользователь
+    отмечается как заблокировавший бота. Ошибка самого задания (например,
+    БД заблокирована) повторяется error_retries раз с нарастающей паузой,
+    после чего задание ставится на паузу с причиной — админ продолжит
+    его кнопкой.
+
+    Example:
+        >>> engine = get_broadcaster()
+        >>> await engine.start(bot)  # продолжает задания, прерванные перезапуском
+        >>> job_id = await db.broadcasts.acreate("Текст", 'active', admin_id)
+        >>> engine.submit(job_id)
+    """
+
+    def __init__(self, db, workers: int = 8, batch_size: int = 50, max_attempts: int = 5,
+                 retry_base: float = 30.0, progress_interval: float = 3.0,
+                 error_retries: int = 5, error_delay: float = 1.0):
+        """
+        Args:
+            db: Database
+            workers: Одновременных отправок в задании
+            batch_size: Получателей в одной пачке
+            max_attempts: Попыток на получателя
+            retry_base: Первая задержка повтора (сек), дальше удваивается
+            progress_interval: Как часто обновлять сообщение с прогрессом (сек)
+            error_retries: Повторов после ошибки задания до паузы
+            error_delay: Первая пауза перед повтором (сек), дальше удваивается
+        """
+        self.db = db
+        self.repo = db.broadcasts
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.progress_interval = progress_interval
+        self.error_retries = max(0, error_retries)
+        self.error_delay = error_delay
+        self.bot: Optional[Bot] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._last_progress: Dict[int, float] = {}
+        self._resubmit: Set[int] = set()
+        self._stopping = False
+
+    # ============================================
+    # ЗАПУСК И ОСТАНОВКА
+    # ============================================
+
+    async def start(self, bot: Bot):
+        """Продолжить незавершённые задания (после перезапуска)"""
+        self.bot = bot
+        self._stopping = False
+        for job in await self.repo.aget_active():
+            await self.repo.arecover_interrupted(job['id'])
+            if job['status'] == JOB_RUNNING:
+                logger.info(f"Resuming broadcast job {job['id']}")
+                self.submit(job['id'])
+
+    def submit(self, job_id: int):
+        """Запустить выполнение задания (если оно ещё не выполняется)"""
+        if self.bot is None:
+            raise RuntimeError("Broadcast engine is not started")
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+        else:
+            # Задача может как раз завершаться (увидела паузу) — перезапустим после неё
+            self._resubmit.add(job_id)
+
+    async def stop(self, timeout: float = 30.0):
+        """
+        Дождаться текущих пачек и остановиться
+
+        Задания остаются в статусе running и продолжатся при следующем start().
+        """
+        self._stopping = True
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+            logger.warning(f"Broadcast engine stopped with {len(pending)} unfinished batches")
+
+    @property
+    def running(self) -> List[int]:
+        """ID выполняющихся заданий"""
+        return [job_id for job_id, task in self._tasks.items() if not task.done()]
+
+    # ============================================
+    # ВЫПОЛНЕНИЕ
+    # ============================================
+
+    async def _run(self, job_id: int):
+        failures = 0
+        recovered = False
+        unrecorded = None  # Итоги отправленной пачки, которые не удалось записать
+        try:
+            while not self._stopping:
+                try:
+                    if not recovered:
+                        # Пачка, оставшаяся в 'sending' после остановки из-за ошибки
+                        await self.repo.arecover_interrupted(job_id)
+                        recovered = True
+                    if unrecorded is not None:
+                        await self.repo.arecord(job_id, unrecorded)
+                        unrecorded = None
+
+                    job = await self.repo.aget(job_id)
+                    if job is None or job['status'] != JOB_RUNNING:
+                        break
+
+                    batch = await self.repo.aclaim(job_id, self.batch_size)
+                    failures = 0
+                    if not batch:
+                        retry_at = await self.repo.anext_retry_at(job_id)
+                        if retry_at is None:
+                            await self.repo.aset_status(job_id, JOB_COMPLETED, (JOB_RUNNING,))
+                            logger.info(f"Broadcast job {job_id} completed")
+                            break
+                        # Ждём повторов небольшими шагами, чтобы заметить паузу и отмену
+                        await asyncio.sleep(min(max(retry_at - now_epoch(), 1), self.progress_interval))
+                        continue
+
+                    unrecorded = await self._send_batch(job['text'], batch)
+                    await self.repo.arecord(job_id, unrecorded)
+                    unrecorded = None
+                    await self._report(job_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    failures += 1
+                    if failures > self.error_retries:
+                        logger.error(f"Broadcast job {job_id} failed {failures} times, pausing: {e}",
+                                     exc_info=True)
+                        await self._pause_on_error(job_id, e)
+                        break
+                    delay = self.error_delay * 2 ** (failures - 1)
+                    logger.warning(f"Broadcast job {job_id} error, retry {failures}/{self.error_retries} "
+                                   f"in {delay:g}s: {e}")
+                    await asyncio.sleep(delay)
+        finally:
+            if self._tasks.get(job_id) is asyncio.current_task():
+                del self._tasks[job_id]
+            if not self._stopping:
+                await self._report(job_id, force=True)
+                if job_id in self._resubmit:
+                    self._resubmit.discard(job_id)
+                    self.submit(job_id)
+
+    async def _pause_on_error(self, job_id: int, error: Exception):
+        """Остановить задание с причиной, чтобы админ мог продолжить его кнопкой"""
+        try:
+            await self.repo.apause_on_error(job_id, str(error)[:200] or type(error).__name__)
+        except Exception as e:
+            # БД недоступна: задание остаётся running и продолжится при следующем start()
+            logger.error(f"Failed to pause broadcast job {job_id}: {e}")
+
+    async def _send_batch(self, text: str, batch: List[Tuple[int, int]]) -> List[Tuple[int, str, Optional[str], int]]:
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def deliver(telegram_id: int, attempts: int):
+            async with semaphore:
+                return await self._deliver(text, telegram_id, attempts)
+
+        with send_priority(PRIORITY_BULK):
+            return list(await asyncio.gather(*(deliver(telegram_id, attempts)
+                                               for telegram_id, attempts in batch)))
+
+    async def _deliver(self, text: str, telegram_id: int, attempts: int) -> Tuple[int, str, Optional[str], int]:
+        """Отправить одному получателю; вернуть (telegram_id, статус, ошибка, следующая попытка)"""
+        try:
+            await self.bot.send_message(telegram_id, f"📢 {text}")
+            return telegram_id, DELIVERY_SENT, None, 0
+        except TelegramForbiddenError as e:
+            return telegram_id, DELIVERY_BLOCKED, e.message[:200], 0
+        except (TelegramRetryAfter, TelegramNetworkError, TelegramServerError) as e:
+            error = str(e)[:200]
+            if attempts + 1 >= self.max_attempts:
+                return telegram_id, DELIVERY_FAILED, error, 0
+            delay = self.retry_base * 2 ** attempts
+            if isinstance(e, TelegramRetryAfter):
+                delay = max(delay, e.retry_after)
+            return telegram_id, DELIVERY_PENDING, error, now_epoch() + int(delay)
+        except TelegramBadRequest as e:
+            return telegram_id, DELIVERY_FAILED, e.message[:200], 0
+        except Exception as e:
+            logger.error(f"Unexpected error sending broadcast to {telegram_id}: {e}")
+            return telegram_id, DELIVERY_FAILED, str(e)[:200], 0
+
+    # ============================================
+    # ПРОГРЕСС
+    # ============================================
+
+    async def _report(self, job_id: int, force: bool = False):
+        """Обновить сообщение с прогрессом (не чаще progress_interval)"""
+        now = time.monotonic()
+        if not force and now - self._last_progress.get(job_id, 0.0) < self.progress_interval:
+            return
+        self._last_progress[job_id] = now
+        try:
+            job = await self.repo.aget(job_id)
+            if not job or not job['progress_message_id']:
+                return
+            from keyboards.admin_kb import get_broadcast_job_keyboard
+            await self.bot.edit_message_text(
+                format_job_progress(job),
+                chat_id=job['progress_chat_id'],
+                message_id=job['progress_message_id'],
+                reply_markup=get_broadcast_job_keyboard(job_id, job['status'])
+            )
+        except TelegramBadRequest:
+            pass  # Текст не изменился или сообщение удалено
+        except Exception as e:
+            logger.warning(f"Failed to update broadcast {job_id} progress: {e}")
+
+
+_broadcaster: Optional[BroadcastEngine] = None
+
+
+def get_broadcaster() -> BroadcastEngine:
+    """Исполнитель рассылок основной БД (параметры из Config)"""
+    global _broadcaster
+    if _broadcaster is None:
+        from config import Config
+        from database import get_db
+        _broadcaster = BroadcastEngine(
+            get_db(),
+            workers=Config.BROADCAST_WORKERS,
+            batch_size=Config.BROADCAST_BATCH_SIZE,
+            max_attempts=Config.BROADCAST_MAX_ATTEMPTS,
+            retry_base=Config.BROADCAST_RETRY_BASE
+        )
+    return _broadcaster
@@ -0,0 +1,307 @@
+"""
+Metrics
+Задержки обработчиков и вызовы Telegram API: Prometheus-формат и JSON
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы (сек): от быстрого ответа из кэша до таймаута
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (как histogram в Prometheus)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя — +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по корзинам (линейно внутри корзины)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Накопленные счётчики для le=... (формат Prometheus)"""
+        result = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            running += bucket_count
+            result.append((f"{bound:g}", running))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class _Series:
+    """Метрики одного обработчика или метода API"""
+
+    __slots__ = ('latency', 'errors', 'in_flight')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.latency = Histogram(buckets)
+        self.errors = 0
+        self.in_flight = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса бота
+
+    Обработчики: гистограмма задержки, ошибки и выполняющиеся сейчас —
+    по паре (router, handler). Telegram API: то же по методу. Сводки
+    других компонентов (планировщик отправок, антифлуд) подключаются
+    через add_collector() и выводятся как gauge.
+
+    Example:
+        >>> metrics = get_metrics()
+        >>> metrics.render_prometheus()
+        '# HELP bot_handler_duration_seconds ...'
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._handlers: Dict[Tuple[str, str], _Series] = {}
+        self._api: Dict[str, _Series] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    # ============================================
+    # ЗАПИСЬ
+    # ============================================
+
+    def handler_series(self, router: str, handler: str) -> _Series:
+        key = (router, handler)
+        series = self._handlers.get(key)
+        if series is None:
+            with self._lock:
+                series = self._handlers.setdefault(key, _Series(self.buckets))
+        return series
+
+    def api_series(self, method: str) -> _Series:
+        series = self._api.get(method)
+        if series is None:
+            with self._lock:
+                series = self._api.setdefault(method, _Series(self.buckets))
+        return series
+
+    def add_collector(self, prefix: str, collect: Callable[[], Dict[str, Any]]):
+        """
+        Подключить сводку компонента (например, SendScheduler.stats)
+
+        Числовые значения выводятся как gauge {prefix}_{ключ},
+        вложенные словари — через подчёркивание.
+        """
+        self._collectors[prefix] = collect
+
+    # ============================================
+    # ВЫВОД
+    # ============================================
+
+    @staticmethod
+    def _series_summary(series: _Series) -> Dict[str, Any]:
+        latency = series.latency
+        return {
+            'count': latency.count,
+            'errors': series.errors,
+            'in_flight': series.in_flight,
+            'avg_ms': round(latency.total / latency.count * 1000, 2) if latency.count else 0.0,
+            'p50_ms': round(latency.quantile(0.5) * 1000, 2),
+            'p99_ms': round(latency.quantile(0.99) * 1000, 2),
+            'max_ms': round(latency.max * 1000, 2),
+        }
+
+    def _collect(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+
+        def flatten(prefix: str, data: Dict[str, Any]):
+            for key, value in data.items():
+                name = f"{prefix}_{key}"
+                if isinstance(value, dict):
+                    flatten(name, value)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[name] = value
+
+        for prefix, collect in list(self._collectors.items()):
+            try:
+                flatten(prefix, collect())
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {e}")
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сводка для JSON: по обработчикам (самые медленные по p99 сверху) и методам API"""
+        handlers = [
+            {'router': router, 'handler': handler, **self._series_summary(series)}
+            for (router, handler), series in list(self._handlers.items())
+        ]
+        handlers.sort(key=lambda item: item['p99_ms'], reverse=True)
+        api = {method: self._series_summary(series) for method, series in sorted(self._api.items())}
+        return {
+            'uptime_s': round(time.time() - self.started_at),
+            'handlers': handlers,
+            'telegram_api': api,
+            'gauges': self._collect(),
+        }
+
+    def _render_series(self, lines: List[str], name: str, help_text: str,
+                       items: List[Tuple[str, _Series]]):
+        lines.append(f"# HELP {name}_duration_seconds {help_text}")
+        lines.append(f"# TYPE {name}_duration_seconds histogram")
+        for labels, series in items:
+            for le, value in series.latency.cumulative():
+                lines.append(f'{name}_duration_seconds_bucket{{{labels},le="{le}"}} {value}')
+            lines.append(f"{name}_duration_seconds_sum{{{labels}}} {series.latency.total:.6f}")
+            lines.append(f"{name}_duration_seconds_count{{{labels}}} {series.latency.count}")
+        lines.append(f"# TYPE {name}_errors_total counter")
+        for labels, series in items:
+            lines.append(f"{name}_errors_total{{{labels}}} {series.errors}")
+        lines.append(f"# TYPE {name}_in_flight gauge")
+        for labels, series in items:
+            lines.append(f"{name}_in_flight{{{labels}}} {series.in_flight}")
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines: List[str] = []
+        self._render_series(
+            lines, 'bot_handler', "Handler latency",
+            [(_labels(router=router, handler=handler), series)
+             for (router, handler), series in sorted(self._handlers.items())]
+        )
+        self._render_series(
+            lines, 'bot_telegram_api', "Telegram Bot API request latency",
+            [(_labels(method=method), series) for method, series in sorted(self._api.items())]
+        )
+        for name, value in sorted(self._collect().items()):
+            lines.append(f"# TYPE bot_{name} gauge")
+            lines.append(f"bot_{name} {value}")
+        lines.append("# TYPE bot_uptime_seconds gauge")
+        lines.append(f"bot_uptime_seconds {time.time() - self.started_at:.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str) -> str:
+        """Сохранить snapshot() в JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: число, ошибки и задержка вызовов Telegram API по методу
+
+    Регистрируется после SendScheduler, поэтому время ожидания лимитов
+    в задержку не входит.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        series = self.registry.api_series(method.__api_method__)
+        series.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            series.errors += 1
+            raise
+        finally:
+            series.in_flight -= 1
+            series.latency.observe(time.perf_counter() - started)
+
+
+class MetricsServer:
+    """
+    Локальный HTTP для сбора метрик
+
+    GET /metrics — формат Prometheus, GET /metrics.json — snapshot().
+    Слушает 127.0.0.1 по умолчанию: наружу метрики не публикуются.
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9101):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _prometheus(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render_prometheus(),
+                            content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def _json(self, request: web.Request) -> web.Response:
+        return web.json_response(self.registry.snapshot(),
+                                 dumps=lambda data: json.dumps(data, ensure_ascii=False))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._prometheus)
+        app.router.add_get('/metrics.json', self._json)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Метрики процесса"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
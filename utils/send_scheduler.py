@@ -0,0 +1,335 @@
+"""
+Send Scheduler
+Единый планировщик исходящих сообщений с учётом лимитов Telegram
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты (меньше — раньше)
+PRIORITY_INTERACTIVE = 0  # Ответы пользователю в хендлерах
+PRIORITY_NOTIFY = 1  # Уведомления админам
+PRIORITY_BULK = 2  # Рассылки
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_NOTIFY: 'notify', PRIORITY_BULK: 'bulk'}
+
+# Приоритет текущей задачи: по умолчанию всё считается ответом пользователю
+_priority: ContextVar[int] = ContextVar('send_priority', default=PRIORITY_INTERACTIVE)
+
+# Методы, не создающие сообщений, лимитами на сообщения не ограничиваются
+UNLIMITED_METHODS = frozenset({'sendChatAction'})
+LIMITED_PREFIXES = ('send', 'copy', 'forward', 'edit')
+
+
+@contextmanager
+def send_priority(priority: int):
+    """
+    Отправки внутри блока идут с указанным приоритетом
+
+    Example:
+        >>> with send_priority(PRIORITY_BULK):
+        ...     await bot.send_message(chat_id, text)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity про запас
+
+    Токены можно занимать наперёд (reserve): баланс уходит в минус,
+    и каждый следующий ждёт своей очереди.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько ждать до свободного токена (сек)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def reserve(self, now: float) -> float:
+        """Занять токен; вернуть, сколько ждать до момента, когда он станет доступен"""
+        wait = self.delay(now)
+        self.tokens -= 1
+        return wait
+
+    def block(self, now: float, seconds: float):
+        """Не выдавать токены ближайшие seconds секунд (после 429)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def idle(self, now: float) -> bool:
+        """Ведро полное — можно забыть (состояние восстановится как новое)"""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: все исходящие сообщения через общие лимиты
+
+    Каждая отправка занимает токен в ведре своего чата (около 1 в
+    секунду, в группах — 20 в минуту) и в общем ведре бота (около 30
+    в секунду). Общие токены выдаются по приоритету: ответ пользователю
+    не стоит в очереди за рассылкой. На TelegramRetryAfter чат
+    блокируется на retry_after, а массовые отправки приостанавливаются
+    целиком; запрос повторяется автоматически до max_retries раз.
+
+    Example:
+        >>> scheduler = SendScheduler(global_rate=25)
+        >>> bot.session.middleware(scheduler)
+        >>> scheduler.stats()['queued']
+        {'interactive': 0, 'notify': 0, 'bulk': 0}
+    """
+
+    def __init__(self, global_rate: float = 25.0, chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 group_rate: float = 20 / 60, max_retries: int = 3, max_chats: int = 10000):
+        """
+        Args:
+            global_rate: Сообщений в секунду на весь бот
+            chat_rate: Сообщений в секунду в один личный чат
+            chat_burst: Сколько сообщений в чат можно отправить подряд без ожидания
+            group_rate: Сообщений в секунду в группу/канал
+            max_retries: Повторов после TelegramRetryAfter
+            max_chats: Сколько вёдер чатов держать в памяти
+        """
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max(1, max_chats)
+
+        self._global = TokenBucket(global_rate, max(1.0, global_rate / 5))
+        self._chats: "OrderedDict[Union[int, str], TokenBucket]" = OrderedDict()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._bulk_paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._grant_task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.chat_waiting = 0
+        self.sent: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+        self.retry_after_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    # ============================================
+    # ВЁДРА
+    # ============================================
+
+    def _chat_bucket(self, chat_id: Union[int, str], now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is not None:
+            self._chats.move_to_end(chat_id)
+            return bucket
+        # Отрицательный id или @username — группа/канал
+        is_group = not isinstance(chat_id, int) or chat_id < 0
+        rate = self.group_rate if is_group else self.chat_rate
+        bucket = TokenBucket(rate, self.chat_burst)
+        self._chats[chat_id] = bucket
+        if len(self._chats) > self.max_chats:
+            self._evict(now)
+        return bucket
+
+    def _evict(self, now: float):
+        """Забыть самые давние вёдра (только полные — у остальных есть долг)"""
+        for key in list(self._chats)[:len(self._chats) - self.max_chats]:
+            if self._chats[key].idle(now):
+                del self._chats[key]
+
+    # ============================================
+    # ОЧЕРЕДЬ ОБЩИХ ТОКЕНОВ
+    # ============================================
+
+    def _global_delay(self, priority: int, now: float) -> float:
+        delay = self._global.delay(now)
+        if priority >= PRIORITY_BULK:
+            delay = max(delay, self._bulk_paused_until - now)
+        return delay
+
+    async def _acquire_global(self, priority: int):
+        now = time.monotonic()
+        if not self._waiters and self._global_delay(priority, now) <= 0:
+            self._global.take(now)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._grant_task is None or self._grant_task.done():
+            self._grant_task = asyncio.create_task(self._grant_loop())
+        await future
+
+    async def _grant_loop(self):
+        """Выдавать общие токены ожидающим по приоритету"""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():  # Отправку отменили, пока ждали
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            delay = self._global_delay(priority, now)
+            if delay > 0:
+                # Пришёл более срочный — пересматриваем голову очереди раньше
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._waiters)
+            self._global.take(now)
+            future.set_result(None)
+
+    async def acquire(self, chat_id: Optional[Union[int, str]], priority: int = PRIORITY_INTERACTIVE):
+        """
+        Дождаться права отправить сообщение в чат
+
+        Args:
+            chat_id: Чат (None — только общий лимит)
+            priority: PRIORITY_*
+        """
+        started = time.monotonic()
+        if chat_id is not None:
+            wait = self._chat_bucket(chat_id, started).reserve(started)
+            if wait > 0:
+                self.chat_waiting += 1
+                try:
+                    await asyncio.sleep(wait)
+                finally:
+                    self.chat_waiting -= 1
+        await self._acquire_global(priority)
+
+        waited = time.monotonic() - started
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def penalize(self, chat_id: Optional[Union[int, str]], retry_after: float, priority: int):
+        """Учесть 429: чат заблокирован на retry_after, рассылки на паузе"""
+        now = time.monotonic()
+        self.retry_after_count += 1
+        if chat_id is not None:
+            self._chat_bucket(chat_id, now).block(now, retry_after)
+        self._bulk_paused_until = max(self._bulk_paused_until, now + retry_after)
+        if priority < PRIORITY_BULK and chat_id is None:
+            self._global.block(now, retry_after)
+        logger.warning(f"Telegram flood control: retry after {retry_after}s "
+                       f"(chat {chat_id}, {PRIORITY_NAMES.get(priority, priority)})")
+
+    # ============================================
+    # MIDDLEWARE
+    # ============================================
+
+    async def __call__(self, make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        if api_method in UNLIMITED_METHODS or not api_method.startswith(LIMITED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, 'chat_id', None)
+        priority = _priority.get()
+        attempt = 0
+        while True:
+            await self.acquire(chat_id, priority)
+            try:
+                response = await make_request(bot, method)
+                self.sent[priority] = self.sent.get(priority, 0) + 1
+                return response
+            except TelegramRetryAfter as e:
+                self.penalize(chat_id, e.retry_after, priority)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+
+    # ============================================
+    # МЕТРИКИ
+    # ============================================
+
+    def stats(self) -> Dict[str, Any]:
+        """Глубина очередей и счётчики отправок"""
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+        total_sent = sum(self.sent.values())
+        return {
+            'queued': queued,
+            'chat_waiting': self.chat_waiting,
+            'sent': {PRIORITY_NAMES.get(p, str(p)): n for p, n in self.sent.items()},
+            'retry_after': self.retry_after_count,
+            'avg_wait_ms': round(self.wait_total / total_sent * 1000, 1) if total_sent else 0.0,
+            'max_wait_ms': round(self.wait_max * 1000, 1),
+            'bulk_paused_s': round(max(0.0, self._bulk_paused_until - time.monotonic()), 1),
+            'chats': len(self._chats),
+        }
+
+    async def close(self):
+        """Остановить выдачу токенов (ожидающие отправки отменяются)"""
+        if self._grant_task is not None:
+            self._grant_task.cancel()
+            try:
+                await self._grant_task
+            except asyncio.CancelledError:
+                pass
+            self._grant_task = None
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+
+_scheduler: Optional[SendScheduler] = None
+
+
+def get_send_scheduler() -> SendScheduler:
+    """Планировщик отправок бота (лимиты из Config)"""
+    global _scheduler
+    if _scheduler is None:
+        from config import Config
+        _scheduler = SendScheduler(
+            global_rate=Config.SEND_GLOBAL_RATE,
+            chat_rate=Config.SEND_CHAT_RATE,
+            chat_burst=Config.SEND_CHAT_BURST,
+            group_rate=Config.SEND_GROUP_RATE_PER_MIN / 60,
+            max_retries=Config.SEND_MAX_RETRIES
+        )
+    return _scheduler
@@ -1,4 +1,8 @@
 import re
+from typing import Optional
+
+# Код страны по умолчанию (Узбекистан) для локальных 9-значных номеров
+DEFAULT_COUNTRY_CODE = '998'
 
 
 def validate_name(name: str) -> tuple[bool, str]:
@@ -21,7 +25,37 @@ def is_valid_email(email: str) -> bool:
     return re.match(pattern, email) is not None
 
 
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Привести телефон к цифрам E.164 без '+' (998901234567)
+
+    Локальный 9-значный номер дополняется кодом страны, префикс
+    международного вызова 00 отбрасывается.
+
+    Returns:
+        str: Цифры номера или None, если цифр меньше 7
+    """
+    if not phone:
+        return None
+    digits = re.sub(r'\D', '', str(phone))
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if len(digits) == 9:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    if len(digits) < 7 or len(digits) > 15:
+        return None
+    return digits
+
+
+def reverse_phone(phone_e164: Optional[str]) -> Optional[str]:
+    """Цифры номера в обратном порядке (для поиска по последним цифрам)"""
+    return phone_e164[::-1] if phone_e164 else None
+
+
 def format_phone(phone: str) -> str:
+    normalized = normalize_phone(phone)
+    if normalized:
+        return '+' + normalized
     clean_phone = re.sub(r'[^\d+]', '', phone)
     if not clean_phone.startswith('+'):
         clean_phone = '+' + clean_phone
@@ -0,0 +1,182 @@
+"""
+Webhook Runner
+Приём апдейтов через вебхук (aiohttp) вместо long polling
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, List, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    """
+    SimpleRequestHandler с плавной остановкой
+
+    Проверку секрета (X-Telegram-Bot-Api-Secret-Token) и ответ методом
+    прямо в теле ответа вебхука делает SimpleRequestHandler. Здесь
+    добавлено: при остановке новые апдейты получают 503 (Telegram
+    повторит их после перезапуска), а уже принятые — и обрабатываемые
+    в запросе, и фоновые — дорабатывают до drain_timeout.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, drain_timeout: float = 30.0, **kwargs: Any):
+        """
+        Args:
+            dispatcher: Dispatcher
+            bot: Bot
+            drain_timeout: Сколько ждать начатые апдейты при остановке (сек)
+            **kwargs: Параметры SimpleRequestHandler (secret_token, handle_in_background, ...)
+        """
+        super().__init__(dispatcher, bot, **kwargs)
+        self.drain_timeout = drain_timeout
+        self.inflight = 0
+        self.handled = 0
+        self.rejected = 0
+        self._closing = False
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self._closing:
+            self.rejected += 1
+            return web.Response(status=503, text="Shutting down")
+        self.inflight += 1
+        try:
+            response = await super().handle(request)
+            if response.status == 200:
+                self.handled += 1
+            return response
+        finally:
+            self.inflight -= 1
+
+    __call__ = handle
+
+    @property
+    def busy(self) -> int:
+        """Апдейтов в работе: в запросах и в фоне"""
+        return self.inflight + len(self._background_feed_update_tasks)
+
+    async def drain(self) -> bool:
+        """
+        Перестать принимать апдейты и дождаться начатых
+
+        Returns:
+            bool: True если всё доработало до drain_timeout
+        """
+        self._closing = True
+        deadline = time.monotonic() + self.drain_timeout
+        if self.busy:
+            logger.info(f"Draining {self.busy} webhook updates...")
+        while self.busy:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            tasks = set(self._background_feed_update_tasks)
+            if tasks:
+                await asyncio.wait(tasks, timeout=min(remaining, 0.5))
+            else:
+                await asyncio.sleep(min(remaining, 0.05))
+
+        if not self.busy:
+            return True
+        logger.warning(f"Drain timeout: cancelling {len(self._background_feed_update_tasks)} background updates, "
+                       f"{self.inflight} requests still running")
+        for task in list(self._background_feed_update_tasks):
+            task.cancel()
+        return False
+
+    async def close(self) -> None:
+        """Дождаться начатых апдейтов, затем закрыть сессию бота"""
+        await self.drain()
+        logger.info(f"Webhook handler closed: handled={self.handled}, rejected={self.rejected}")
+        await super().close()
+
+
+def _install_stop_signals(stop_event: asyncio.Event) -> List[int]:
+    """SIGINT/SIGTERM останавливают сервер (на Windows останется KeyboardInterrupt)"""
+    loop = asyncio.get_running_loop()
+    installed = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+            installed.append(sig)
+        except (NotImplementedError, RuntimeError):
+            pass
+    return installed
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, *, url: str, path: str = "/webhook",
+                      host: str = "0.0.0.0", port: int = 8080,
+                      secret_token: Optional[str] = None, max_connections: int = 40,
+                      reply_in_webhook: bool = False, drain_timeout: float = 30.0,
+                      drop_pending_updates: bool = False,
+                      allowed_updates: Optional[List[str]] = None,
+                      stop_event: Optional[asyncio.Event] = None) -> None:
+    """
+    Поднять aiohttp-сервер, зарегистрировать вебхук и работать до остановки
+
+    Вебхук при остановке не удаляется: пока бот перезапускается,
+    Telegram копит апдейты и доставит их новому процессу.
+
+    Args:
+        dp: Dispatcher
+        bot: Bot
+        url: Публичный адрес (https://bot.example.com), к нему добавляется path
+        path: Путь вебхука на этом сервере
+        host: Адрес, на котором слушать (за reverse proxy — 127.0.0.1)
+        port: Порт
+        secret_token: Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+        max_connections: Одновременных HTTPS-подключений Telegram к вебхуку (1-100)
+        reply_in_webhook: Обрабатывать апдейт в запросе и отвечать методом в теле ответа
+            (без отдельного запроса к API); иначе сразу 200 и обработка в фоне
+        drain_timeout: Сколько ждать начатые апдейты при остановке (сек)
+        drop_pending_updates: Сбросить накопившиеся апдейты при регистрации вебхука
+        allowed_updates: Типы апдейтов (по умолчанию — используемые диспетчером)
+        stop_event: Событие остановки (по умолчанию — SIGINT/SIGTERM)
+    """
+    if not url:
+        raise ValueError("Webhook URL is not set (WEBHOOK_URL)")
+
+    app = web.Application()
+    handler = DrainingRequestHandler(
+        dp, bot,
+        drain_timeout=drain_timeout,
+        secret_token=secret_token,
+        handle_in_background=not reply_in_webhook
+    )
+    # Порядок важен: сначала дожидаемся апдейтов, потом shutdown диспетчера (запись FSM)
+    handler.register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    # Ожидание незавершённых запросов aiohttp — с тем же запасом, что и drain
+    runner = web.AppRunner(app, shutdown_timeout=drain_timeout, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+
+    stop_event = stop_event or asyncio.Event()
+    installed = _install_stop_signals(stop_event)
+    try:
+        webhook_url = url.rstrip('/') + path
+        await bot.set_webhook(
+            webhook_url,
+            secret_token=secret_token,
+            max_connections=max_connections,
+            allowed_updates=allowed_updates if allowed_updates is not None else dp.resolve_used_update_types(),
+            drop_pending_updates=drop_pending_updates
+        )
+        logger.info(f"Webhook set to {webhook_url} (listening on {host}:{port}, "
+                    f"max_connections={max_connections}, reply_in_webhook={reply_in_webhook})")
+        await stop_event.wait()
+        logger.info("Stopping webhook server...")
+    finally:
+        loop = asyncio.get_running_loop()
+        for sig in installed:
+            loop.remove_signal_handler(sig)
+        await runner.cleanup()